@@ -35,6 +35,8 @@ Commands
     {key_add_selected} - add selected feed/episode to queue
     {key_clear} - clear the queue
     {key_clear_progress} - clear progress of selected episode
+    {key_restore_archived} - restore archived episodes of feed/search
+    {key_retention} - set retention rules of the selected feed
     {key_next} - go to the next episode in the queue
     {key_invert} - invert the order of the menu
     {key_filter} - filter the contents of the menu
@@ -45,7 +47,7 @@ Commands
     {key_volume_increase/key_volume_decrease} - increase/decrease volume
     {key_rate_increase/key_rate_decrease} - increase/decrease playback speed
     {key_show_url} - show episode URL
-    {1-5} - change between client layouts
+    {1-6} - change between client layouts
 """ % (
     __title__,
     __version__,
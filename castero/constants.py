@@ -1 +1,2 @@
 MILLISECONDS_IN_SECOND = 1000
+SECONDS_IN_DAY = 86400
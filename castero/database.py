@@ -1,19 +1,48 @@
+import collections
 import json
 import os
 import sys
+import threading
+import time
 import sqlite3
+import weakref
 import grequests
-from typing import List
+from typing import Dict, List, Tuple
 from io import StringIO
 
-from castero import helpers
+from castero import constants, helpers
 from castero.config import Config
 from castero.datafile import DataFile
 from castero.episode import Episode
+from castero.episodeindex import EpisodeIndex
 from castero.feed import Feed, FeedError
 from castero.queue import Queue
 from castero.net import Net
 
+FeedStats = collections.namedtuple("FeedStats", ["episodes", "unplayed", "newest", "in_progress"])
+FeedStats.__doc__ = """Statistics about the episodes of a feed.
+
+The number of episodes, the number which have not been played, the published
+time of the newest (see Database.episodes_page), and the number with progress.
+"""
+
+Retention = collections.namedtuple("Retention", ["max_episodes", "max_age", "keep_unplayed", "download_quota"])
+Retention.__doc__ = """The rules for which episodes of a feed are kept.
+
+The maximum number of episodes, the maximum age of episodes in days, whether
+to keep unplayed episodes regardless of those limits, and the maximum size of
+the feed's downloaded episodes in megabytes; -1 means no limit. Each rule is
+None where the feed uses the config's setting (see Database.retention).
+"""
+
+Changes = collections.namedtuple("Changes", ["tables", "feed_keys", "ep_ids"])
+Changes.__doc__ = """A summary of the changes to the database since a version.
+
+The names of the tables which changed, the keys of the feeds whose rows or
+statistics changed, and the ids of the episodes whose rows changed. If rows
+may have been added or removed, the keys and ids are None.
+"""
+
 
 class Database:
     """The user's database.
@@ -26,31 +55,100 @@ class Database:
     see _create_from_old_feeds().
 
     For schema details, see $PACKAGE/templates/migrations.
+
+    Changes made through this class are numbered and logged, so that the
+    display can find what changed since it last read the data (see
+    changes_since).
     """
 
+    MAX_LOGGED_CHANGES = 1000
+
     PATH = os.path.join(DataFile.DATA_DIR, "castero.db")
     OLD_PATH = os.path.join(DataFile.DATA_DIR, "feeds")
     MIGRATIONS_DIR = os.path.join(DataFile.PACKAGE, "templates/migrations")
 
-    SQL_EPISODES_BY_FEED_WITH_PROGRESS = "select episode.id, episode.title, episode.description, episode.link, episode.pubdate, episode.copyright, episode.enclosure, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id where feed_key=? order by episode.id"
-    SQL_EPISODES_WITH_PROGRESS = "select episode.feed_key, episode.id, episode.title, episode.description, episode.link, episode.pubdate, episode.copyright, episode.enclosure, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id order by episode.id"
-    SQL_EPISODES_BY_ID = "select episode.feed_key, episode.id, episode.title, episode.description, episode.link, episode.pubdate, episode.copyright, episode.enclosure, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id where episode.id=?"
-    SQL_UNPLAYED_EPISODES_BY_FEED = "select episode.id, episode.title, episode.description, episode.link, episode.pubdate, episode.copyright, episode.enclosure, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id where feed_key=? and played=0 order by episode.id"
-    SQL_EPISODE_REPLACE = "replace into episode (id, title, feed_key, description, link, pubdate, copyright, enclosure, played)\nvalues (?,?,?,?,?,?,?,?,?)"
-    SQL_EPISODE_REPLACE_NOID = "replace into episode (title, feed_key, description, link, pubdate, copyright, enclosure, played)\nvalues (?,?,?,?,?,?,?,?)"
+    # distance between the ordering keys of adjacent queue entries; leaves room
+    # to insert entries between existing ones without renumbering the table
+    QUEUE_KEY_GAP = 1024
+
+    SQL_EPISODES_BY_FEED_WITH_PROGRESS = "select episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode left join progress on episode.id=progress.ep_id where feed_key=? order by episode.id"
+    SQL_EPISODES_WITH_PROGRESS = "select episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode left join progress on episode.id=progress.ep_id order by episode.id"
+    SQL_EPISODES_BY_ID = "select episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode left join progress on episode.id=progress.ep_id where episode.id=?"
+    SQL_UNPLAYED_EPISODES_BY_FEED = "select episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode left join progress on episode.id=progress.ep_id where feed_key=? and played=0 order by episode.id"
+    SQL_EPISODE_DETAILS_BY_ID = "select description, plain_description, copyright from episode where id=?"
+    SQL_EPISODE_STATE_UPDATE = "update episode set played=?, duration=coalesce(?, duration) where id=?"
+    # an upsert rather than "replace into", which would delete the existing row
+    # and with it the episode's queue entries and progress (on delete cascade)
+    SQL_EPISODE_REPLACE = "insert into episode (id, title, feed_key, description, plain_description, link, pubdate, copyright, enclosure, played, duration, published)\nvalues (?,?,?,?,?,?,?,?,?,?,?,?)\non conflict(id) do update set title=excluded.title, feed_key=excluded.feed_key, description=excluded.description, plain_description=excluded.plain_description, link=excluded.link, pubdate=excluded.pubdate, copyright=excluded.copyright, enclosure=excluded.enclosure, played=excluded.played, duration=coalesce(excluded.duration, duration), published=excluded.published"
+    SQL_EPISODE_REPLACE_NOID = "replace into episode (title, feed_key, description, plain_description, link, pubdate, copyright, enclosure, played, published)\nvalues (?,?,?,?,?,?,?,?,?,?)"
+    SQL_EPISODES_PAGE = "select episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration, episode.published from episode left join progress on episode.id=progress.ep_id where %s order by episode.published %s, episode.id limit ?"
+    SQL_EPISODES_COUNT_ALL = "select coalesce(sum(episodes), 0), coalesce(sum(unplayed), 0) from feed_stats"
+    SQL_EPISODES_COUNT = "select count(*), count(*) - coalesce(sum(played), 0) from episode where %s"
+    SQL_EPISODES_FILTER = "instr(lower(coalesce(episode.title, episode.description)), ?) > 0"
+    SQL_EPISODES_AFTER_DESC = "episode.published <= ? and (episode.published < ? or episode.id > ?)"
+    SQL_EPISODES_AFTER_ASC = "episode.published >= ? and (episode.published > ? or episode.id > ?)"
+    SQL_EPISODES_BY_IDS = "select episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode left join progress on episode.id=progress.ep_id where episode.id in (%s)"
+    SQL_EPISODE_INDEX = "select episode.id, episode.feed_key, episode.published, episode.played, progress.time, lower(coalesce(episode.title, episode.description)) from episode left join progress on episode.id=progress.ep_id order by episode.published desc, episode.id"
+    SQL_EPISODE_INDEX_BY_IDS = "select episode.id, episode.feed_key, episode.published, episode.played, progress.time, lower(coalesce(episode.title, episode.description)) from episode left join progress on episode.id=progress.ep_id where episode.id in (%s)"
+    SQL_EPISODE_STATES_BY_FEED = "select episode.id, episode.feed_key, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id where episode.feed_key=?"
+    SQL_EPISODE_STATES_BY_IDS = "select episode.id, episode.feed_key, episode.played, progress.time from episode left join progress on episode.id=progress.ep_id where episode.id in (%s)"
+    SQL_EPISODES_SEARCH = "select episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from episode_search join episode on episode_search.rowid=episode.id left join progress on episode.id=progress.ep_id where episode_search match ? order by bm25(episode_search, 10.0, 1.0, 5.0) limit ?"
+    SQL_EPISODES_ARCHIVABLE = "played and published >= 0 and published < ? and id not in (select ep_id from queue) and id not in (select ep_id from progress) and id not in (select ep_id from prefetch)"
+    SQL_EPISODES_ARCHIVABLE_IDS = "select id from episode where %s"
+    SQL_EPISODES_ARCHIVE = "insert into episode_archive (feed_key, title, description, plain_description, link, pubdate, copyright, enclosure, played, duration, published)\nselect feed_key, title, description, plain_description, link, pubdate, copyright, enclosure, played, duration, published from episode where %s order by id"
+    SQL_EPISODES_ARCHIVED_DELETE = "delete from episode where %s"
+    SQL_ARCHIVED_BY_FEED = "feed_key=?"
+    SQL_ARCHIVED_BY_SEARCH = "id in (select -rowid from episode_search where episode_search match ? and rowid < 0)"
+    SQL_ARCHIVED_COUNT = "select count(*) from episode_archive where %s"
+    # restored episodes are numbered from the in-memory copy's ids, so that
+    # they have the same ids in the file (see restore_archived)
+    SQL_ARCHIVED_RESTORE = "replace into episode (id, feed_key, title, description, plain_description, link, pubdate, copyright, enclosure, played, duration, published)\nselect ? + row_number() over (order by id), feed_key, title, description, plain_description, link, pubdate, copyright, enclosure, played, duration, published from episode_archive where %s order by id"
+    SQL_ARCHIVED_DELETE = "delete from episode_archive where %s"
+    SQL_EPISODES_MAX_ID = "select coalesce(max(id), 0) from episode"
+    SQL_ARCHIVED_KEYS_BY_FEED = "select title, enclosure from episode_archive where feed_key=?"
+    SQL_RETENTION_BY_FEED = "select max_episodes, max_age, keep_unplayed, download_quota from retention where feed_key=?"
+    SQL_RETENTION_REPLACE = "replace into retention (feed_key, max_episodes, max_age, keep_unplayed, download_quota)\nvalues (?,?,?,?,?)"
+    SQL_EPISODES_EXPIRED = "select id from (select episode.id, episode.played, episode.published, row_number() over (partition by episode.feed_key order by episode.published desc, episode.id desc) as position, coalesce(retention.max_episodes, ?) as max_episodes, coalesce(retention.max_age, ?) as max_age, coalesce(retention.keep_unplayed, ?) as keep_unplayed from episode left join retention on episode.feed_key=retention.feed_key) where ((max_episodes >= 0 and position > max_episodes) or (max_age >= 0 and published >= 0 and published < ? - max_age * 86400)) and not (keep_unplayed and not played) and id not in (select ep_id from queue) and id not in (select ep_id from prefetch)"
+    SQL_EPISODE_IDS_BY_IDS = "select id from episode where id in (%s)"
+    SQL_EPISODES_DELETE_BY_IDS = "delete from episode where id in (%s)"
+    SQL_EPISODES_PLAYED_BY_IDS = "select id, played from episode where id in (%s)"
+    SQL_EPISODES_UNPUBLISHED = "select id, pubdate from episode where published is null"
+    SQL_EPISODE_PUBLISHED_UPDATE = "update episode set published=? where id=?"
+    SQL_EPISODES_UNCONVERTED = "select id, description from episode where plain_description is null and description is not null"
+    SQL_EPISODE_PLAIN_DESCRIPTION_UPDATE = "update episode set plain_description=? where id=?"
+    SQL_ARCHIVED_UNCONVERTED = "select id, description from episode_archive where plain_description is null and description is not null"
+    SQL_ARCHIVED_PLAIN_DESCRIPTION_UPDATE = "update episode_archive set plain_description=? where id=?"
+    SQL_FEEDS_UNCONVERTED = "select key, description from feed where plain_description is null and description is not null"
+    SQL_FEED_PLAIN_DESCRIPTION_UPDATE = "update feed set plain_description=? where key=?"
     SQL_FEEDS_ALL = (
-        "select key, title, description, link, last_build_date, copyright from feed order by lower(title)"
+        "select key, title, description, link, last_build_date, copyright, plain_description from feed order by lower(title)"
     )
+    SQL_FEEDS_ALL_BY_NEWEST = "select feed.key, feed.title, feed.description, feed.link, feed.last_build_date, feed.copyright, feed.plain_description from feed left join feed_stats on feed.key=feed_stats.feed_key order by feed_stats.newest desc, lower(feed.title)"
+    SQL_FEEDS_COUNT = "select count(*) from feed where title<>''"
+    SQL_FEED_STATS_ALL = "select feed_key, episodes, unplayed, newest, in_progress from feed_stats"
+    SQL_FEED_STATS_BY_KEY = "select feed_key, episodes, unplayed, newest, in_progress from feed_stats where feed_key=?"
     SQL_FEED_BY_KEY = (
-        "select key, title, description, link, last_build_date, copyright from feed where key=?"
-    )
-    SQL_FEED_REPLACE = (
-        "replace into feed (key, title, description, link, last_build_date, copyright)\nvalues (?,?,?,?,?,?)"
+        "select key, title, description, link, last_build_date, copyright, plain_description from feed where key=?"
     )
+    # an upsert rather than "replace into", which would delete the existing row
+    # and with it the feed's episodes and their queue entries, progress and
+    # prefetch marks (on delete cascade)
+    SQL_FEED_REPLACE = "insert into feed (key, title, description, link, last_build_date, copyright, plain_description)\nvalues (?,?,?,?,?,?,?)\non conflict(key) do update set title=excluded.title, description=excluded.description, link=excluded.link, last_build_date=excluded.last_build_date, copyright=excluded.copyright, plain_description=excluded.plain_description"
     SQL_FEED_DELETE = "delete from feed where key=?"
-    SQL_QUEUE_ALL = "select id, ep_id from queue"
+    SQL_QUEUE_ALL = "select queue.id, episode.feed_key, episode.id, episode.title, case when episode.title is null then episode.description end, episode.link, episode.pubdate, episode.enclosure, episode.played, progress.time, episode.duration from queue join episode on queue.ep_id=episode.id left join progress on episode.id=progress.ep_id order by queue.id"
+    SQL_QUEUE_LAST_KEY = "select max(id) from queue"
     SQL_QUEUE_REPLACE = "replace into queue (id, ep_id)\nvalues (?,?)"
     SQL_QUEUE_DELETE = "delete from queue"
+    SQL_QUEUE_DELETE_BY_KEY = "delete from queue where id=?"
+    SQL_PREFETCH_BY_EP_ID = "select ep_id from prefetch where ep_id=?"
+    SQL_PREFETCH_REPLACE = "replace into prefetch (ep_id)\nvalues (?)"
+    SQL_PREFETCH_DELETE_BY_IDS = "delete from prefetch where ep_id in (%s)"
+    SQL_EPISODES_MARK_PLAYED_BY_FEED = "update episode set played=? where feed_key=?"
+    SQL_EPISODES_MARK_PLAYED_BY_IDS = "update episode set played=? where id in (%s)"
+    SQL_EPISODES_TOGGLE_PLAYED_BY_FEED = "update episode set played=not played where feed_key=?"
+    SQL_EPISODES_TOGGLE_PLAYED_BY_IDS = "update episode set played=not played where id in (%s)"
+    SQL_PROGRESS_DELETE_BY_FEED = "delete from progress where ep_id in (select id from episode where feed_key=?)"
+    SQL_PROGRESS_DELETE_BY_IDS = "delete from progress where ep_id in (%s)"
     SQL_EPISODE_PROGRESS_REPLACE = "replace into progress (ep_id, time)\nvalues (?,?)"
     SQL_EPISODE_PROGRESS_DELETE = "delete from progress where ep_id=?"
 
@@ -64,20 +162,46 @@ class Database:
 
         self._using_memory = not helpers.is_true(Config["restrict_memory_usage"])
 
-        file_conn = sqlite3.connect(self.PATH, check_same_thread=False)
+        # the file is migrated before any in-memory copy is made so that
+        # statements written through to it (see _execute_durable) always
+        # match the current schema
+        self._conn = sqlite3.connect(self.PATH, check_same_thread=False)
+        self._file_conn = None
+        # writes may come from a WriteQueue's thread, and a commit commits
+        # every statement executed on a connection, so all writes hold this
+        self._write_lock = threading.RLock()
+        self._feeds_by_key = {}  # see _create_feed
+        self._episodes_by_id = weakref.WeakValueDictionary()  # see _create_episode
+        self._episode_index = None  # see episode_index
+        self._episode_index_thread = None
+        self._episode_index_writes = 0  # see _update_episode_index
+        self._version = 0  # see _record_change
+        self._table_versions = {"feed": 0, "episode": 0, "progress": 0}
+        self._change_log = collections.deque(maxlen=self.MAX_LOGGED_CHANGES)
+
+        if not existed and os.path.exists(self.OLD_PATH):
+            self._create_from_old_feeds()
+
+        self.migrate()
+        self._enable_incremental_vacuum()
+        self._fill_published()
+        self._fill_plain_descriptions()
+
+        archive_after_days = int(Config["archive_after_days"])
+        if archive_after_days >= 0:
+            self.archive_played(int(time.time()) - archive_after_days * constants.SECONDS_IN_DAY)
 
         if self._using_memory:
+            file_conn = self._conn
             memory_conn = sqlite3.connect(":memory:", check_same_thread=False)
             self._copy_database(file_conn, memory_conn)
+            file_conn.close()
             self._conn = memory_conn
-        else:
-            self._conn = file_conn
-
-        if not existed and os.path.exists(self.OLD_PATH):
-            self._create_from_old_feeds()
+            self._file_conn = sqlite3.connect(self.PATH, check_same_thread=False)
+            # rows written through to the file must refer to rows it has
+            self._file_conn.execute("PRAGMA foreign_keys = ON")
 
         self._conn.execute("PRAGMA foreign_keys = ON")
-        self.migrate()
 
     def close(self):
         """Close the database.
@@ -86,6 +210,7 @@ class Database:
         to the database file here.
         """
         if self._using_memory:
+            self._file_conn.close()
             DataFile.ensure_path(self.PATH)
             os.rename(self.PATH, self.PATH + ".old")
 
@@ -109,6 +234,133 @@ class Database:
                 with open(path, "rt") as f:
                     cursor.executescript(f.read())
 
+    def _execute_durable(self, sql, parameters=()) -> None:
+        """Execute and commit a statement whose effect must survive a crash.
+
+        When using an in-memory copy of the data, nothing reaches the database
+        file until close() is called. The statement is therefore also applied
+        to the file directly. Every write to the feed and episode tables goes
+        through here, with explicit episode ids (see _next_episode_ids), so
+        that rows in the file which refer to episodes refer to the same
+        episodes as in the in-memory copy.
+
+        :param sql the statement to execute
+        :param parameters (optional) the parameters for the statement
+        """
+        self._execute_durable_many([(sql, parameters)])
+
+    def _execute_durable_many(self, statements) -> None:
+        """Execute and commit statements in a single transaction, as in
+        _execute_durable.
+
+        :param statements a list of (sql, parameters) pairs
+        """
+        with self._write_lock:
+            for connection in (self._conn, self._file_conn):
+                if connection is not None:
+                    with connection:
+                        for (sql, parameters) in statements:
+                            connection.execute(sql, parameters)
+
+    def _execute_durable_batch(self, sql, parameters_list) -> None:
+        """Execute and commit a statement once for each set of parameters in a
+        single transaction, as in _execute_durable.
+
+        :param sql the statement to execute
+        :param parameters_list a list of parameters for the statement
+        """
+        with self._write_lock:
+            for connection in (self._conn, self._file_conn):
+                if connection is not None:
+                    with connection:
+                        connection.executemany(sql, parameters_list)
+
+    def _next_episode_ids(self, count: int) -> List[int]:
+        """Choose the ids of episodes which are about to be inserted.
+
+        The ids are chosen from the in-memory copy, rather than by each
+        connection, so that an episode has the same id in the file. The caller
+        must hold the write lock until the episodes are inserted.
+
+        :param count the number of ids to choose
+        :returns List[int]: the ids
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_MAX_ID)
+        last_id = cursor.fetchone()[0]
+        return list(range(last_id + 1, last_id + 1 + count))
+
+    def _enable_incremental_vacuum(self) -> None:
+        """Have the database file keep track of its free pages, so that they
+        can be returned to the file system without rebuilding it (see
+        _compact).
+
+        Databases created before this was enabled are rebuilt once.
+        """
+        cursor = self._conn.cursor()
+        if cursor.execute("pragma auto_vacuum").fetchone()[0] != 2:
+            cursor.execute("pragma auto_vacuum = incremental")
+            cursor.execute("vacuum")
+
+    def _compact(self) -> None:
+        """Return the database's free pages to the file system and update the
+        statistics used to plan queries, if enough of the database is free.
+
+        The portion of free pages at which this is done is the
+        vacuum_threshold config parameter.
+        """
+        threshold = int(Config["vacuum_threshold"])
+        if threshold < 0:
+            return
+
+        with self._write_lock:
+            for connection in (self._conn, self._file_conn):
+                if connection is not None:
+                    page_count = connection.execute("pragma page_count").fetchone()[0]
+                    freelist_count = connection.execute("pragma freelist_count").fetchone()[0]
+                    if page_count > 0 and freelist_count * 100 >= page_count * threshold:
+                        # the pragma only frees every page when it is stepped
+                        # to completion, which executescript does
+                        connection.executescript("pragma incremental_vacuum; analyze;")
+
+    def _fill_published(self) -> None:
+        """Set the published time of episodes stored before it was recorded.
+
+        The published time is the episode's pubdate as a timestamp, which
+        episodes are ordered by (see episodes_page).
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_UNPUBLISHED)
+        rows = cursor.fetchall()
+        if len(rows) > 0:
+            cursor.executemany(
+                self.SQL_EPISODE_PUBLISHED_UPDATE,
+                [(helpers.timestamp_from_rfc822(pubdate), ep_id) for (ep_id, pubdate) in rows],
+            )
+            self._conn.commit()
+
+    def _fill_plain_descriptions(self) -> None:
+        """Convert the descriptions of feeds and episodes stored before their
+        plain text was recorded.
+
+        Descriptions are otherwise converted when they are stored, so that
+        showing metadata doesn't parse their html (see
+        Episode.plain_description).
+        """
+        cursor = self._conn.cursor()
+        for (sql_unconverted, sql_update) in (
+            (self.SQL_EPISODES_UNCONVERTED, self.SQL_EPISODE_PLAIN_DESCRIPTION_UPDATE),
+            (self.SQL_ARCHIVED_UNCONVERTED, self.SQL_ARCHIVED_PLAIN_DESCRIPTION_UPDATE),
+            (self.SQL_FEEDS_UNCONVERTED, self.SQL_FEED_PLAIN_DESCRIPTION_UPDATE),
+        ):
+            cursor.execute(sql_unconverted)
+            rows = cursor.fetchall()
+            if len(rows) > 0:
+                cursor.executemany(
+                    sql_update, [(helpers.html_to_plain(description), key) for (key, description) in rows]
+                )
+        self._conn.commit()
+
     def _copy_database(self, from_connection, to_connection):
         """Copy database contents from one connection to another."""
         if sys.version_info.major == 3 and sys.version_info.minor >= 7:
@@ -152,6 +404,7 @@ class Database:
                     feed_dict["link"],
                     feed_dict["last_build_date"],
                     feed_dict["copyright"],
+                    None,
                 ),
             )
 
@@ -162,11 +415,13 @@ class Database:
                         episode_dict["title"],
                         key,
                         episode_dict["description"],
+                        None,
                         episode_dict["link"],
                         episode_dict["pubdate"],
                         episode_dict["copyright"],
                         episode_dict["enclosure"],
                         False,
+                        helpers.timestamp_from_rfc822(episode_dict["pubdate"]),
                     ),
                 )
 
@@ -179,9 +434,245 @@ class Database:
 
         :param feed the Feed to delete, which is in the database
         """
+        self._execute_durable(self.SQL_FEED_DELETE, (feed.key,))
+        self._feeds_by_key.pop(feed.key, None)
+        self._forget_episodes(feed=feed)
+        self._update_episode_index(lambda index: index.remove(feed_key=feed.key))
+        self._record_change(("feed", "episode", "progress"))
+
+    def mark_played(self, played: bool, feed: Feed = None, ep_ids: List[int] = None) -> None:
+        """Set whether the episodes of a feed, or a set of episodes, have been
+        played.
+
+        Exactly one of either feed or ep_ids must be given. The episodes are
+        updated with a single statement.
+
+        :param played whether the episodes have been played
+        :param feed (optional) the Feed whose episodes to update
+        :param ep_ids (optional) the database ids of the episodes to update
+        """
+        self._execute_bulk(
+            "episode",
+            self.SQL_EPISODES_MARK_PLAYED_BY_FEED,
+            self.SQL_EPISODES_MARK_PLAYED_BY_IDS,
+            feed,
+            ep_ids,
+            (played,),
+        )
+        self._update_episode_index(lambda index: index.set_played(played, None if feed is None else feed.key, ep_ids))
+
+    def toggle_played(self, feed: Feed = None, ep_ids: List[int] = None) -> None:
+        """Invert whether each of the episodes of a feed, or a set of
+        episodes, has been played.
+
+        Exactly one of either feed or ep_ids must be given. The episodes are
+        updated with a single statement.
+
+        :param feed (optional) the Feed whose episodes to update
+        :param ep_ids (optional) the database ids of the episodes to update
+        """
+        self._execute_bulk(
+            "episode", self.SQL_EPISODES_TOGGLE_PLAYED_BY_FEED, self.SQL_EPISODES_TOGGLE_PLAYED_BY_IDS, feed, ep_ids
+        )
+        self._update_episode_index(lambda index: index.set_played(None, None if feed is None else feed.key, ep_ids))
+
+    def clear_progress(self, feed: Feed = None, ep_ids: List[int] = None) -> None:
+        """Delete the progress of the episodes of a feed, or a set of episodes.
+
+        Exactly one of either feed or ep_ids must be given. The progress is
+        deleted with a single statement.
+
+        :param feed (optional) the Feed whose episodes to update
+        :param ep_ids (optional) the database ids of the episodes to update
+        """
+        self._execute_bulk(
+            "progress", self.SQL_PROGRESS_DELETE_BY_FEED, self.SQL_PROGRESS_DELETE_BY_IDS, feed, ep_ids
+        )
+        self._update_episode_index(lambda index: index.set_progress(0, None if feed is None else feed.key, ep_ids))
+
+    def _execute_bulk(self, table, sql_by_feed, sql_by_ids, feed, ep_ids, parameters=()) -> None:
+        """Execute a statement on the episodes of a feed or a set of episodes.
+
+        The statement is durable (see _execute_durable). Instances of the
+        episodes which are held elsewhere are updated to match their rows (see
+        _refresh_episodes).
+
+        :param table the name of the table the statement changes
+        :param sql_by_feed the statement to use for a feed, whose last
+          parameter is the feed's key
+        :param sql_by_ids the statement to use for a set of episodes, with a
+          placeholder for the list of ids
+        :param feed a Feed, or None
+        :param ep_ids a list of episode ids, or None
+        :param parameters (optional) the parameters preceding the feed's key
+          or the ids
+        """
+        assert (feed is None) != (ep_ids is None)
+
+        if feed is not None:
+            self._execute_durable(sql_by_feed, parameters + (feed.key,))
+            self._refresh_episodes(table, self.SQL_EPISODE_STATES_BY_FEED, (feed.key,))
+        else:
+            ep_ids = tuple(ep_ids)
+            if len(ep_ids) > 0:
+                placeholders = ",".join("?" * len(ep_ids))
+                self._execute_durable(sql_by_ids % placeholders, parameters + ep_ids)
+                self._refresh_episodes(table, self.SQL_EPISODE_STATES_BY_IDS % placeholders, ep_ids)
+
+    def _refresh_episodes(self, table, sql, parameters) -> None:
+        """Update the played state and progress of held episodes to match
+        their rows, and record the change.
+
+        :param table the name of the table which changed
+        :param sql the statement selecting the id, feed key, played state and
+          progress of the episodes which changed
+        :param parameters the parameters for the statement
+        """
         cursor = self._conn.cursor()
-        cursor.execute(self.SQL_FEED_DELETE, (feed.key,))
-        self._conn.commit()
+        cursor.execute(sql, parameters)
+        feed_keys = set()
+        ep_ids = set()
+        for (ep_id, feed_key, played, progress) in cursor.fetchall():
+            episode = self._episodes_by_id.get(ep_id)
+            if episode is not None:
+                episode.played = played
+                episode.progress = progress
+            feed_keys.add(feed_key)
+            ep_ids.add(ep_id)
+        self._record_change((table,), feed_keys, ep_ids)
+
+    def _record_change(self, tables, feed_keys=None, ep_ids=None) -> None:
+        """Number a change to the database and add it to the change log.
+
+        :param tables the names of the tables which changed
+        :param feed_keys (optional) the keys of the feeds whose rows or
+          statistics changed
+        :param ep_ids (optional) the database ids of the episodes whose rows
+          changed
+        If neither feed_keys nor ep_ids are given, rows may have been added or
+        removed.
+        """
+        with self._write_lock:
+            self._version += 1
+            for table in tables:
+                self._table_versions[table] = self._version
+            self._change_log.append((self._version, tables, feed_keys, ep_ids))
+
+    def _update_episode_index(self, update) -> None:
+        """Apply a write to the episode index, if it has been created.
+
+        Every write to the columns of the index must be applied here, after
+        it is committed. Writes made while the index is being created have it
+        created again (see _create_episode_index).
+
+        :param update a function which applies the write to an EpisodeIndex
+        """
+        with self._write_lock:
+            self._episode_index_writes += 1
+            if self._episode_index is not None:
+                update(self._episode_index)
+
+    def _index_episodes(self, ep_ids) -> None:
+        """Add episodes which were inserted or changed to the episode index,
+        if it has been created.
+
+        :param ep_ids the database ids of the episodes
+        """
+        ep_ids = list(ep_ids)
+
+        def insert(index):
+            cursor = self._conn.cursor()
+            cursor.execute(self.SQL_EPISODE_INDEX_BY_IDS % ",".join("?" * len(ep_ids)), ep_ids)
+            index.insert(cursor.fetchall())
+
+        if len(ep_ids) > 0:
+            self._update_episode_index(insert)
+
+    def version(self, table: str = None) -> int:
+        """Retrieve the number of the latest change to a table, or to any
+        table.
+
+        :param table (optional) the name of the table: "feed", "episode" or
+          "progress"
+        :returns int: the number of the latest change, or 0 if there have been
+          none
+        """
+        if table is None:
+            return self._version
+        return self._table_versions[table]
+
+    def changes_since(self, version: int) -> Changes:
+        """Summarize the changes since a version.
+
+        If the change log no longer goes back to the version, the changes are
+        summarized as if rows had been added or removed.
+
+        :param version the number of a change, as from version()
+        :returns Changes: the changes after the version
+        """
+        with self._write_lock:
+            changes = [change for change in self._change_log if change[0] > version]
+            complete = version >= self._version - len(self._change_log)
+
+        tables = set()
+        feed_keys = set() if complete else None
+        ep_ids = set() if complete else None
+        for (change_version, change_tables, change_feed_keys, change_ep_ids) in changes:
+            tables.update(change_tables)
+            if change_feed_keys is None and change_ep_ids is None:
+                feed_keys = ep_ids = None
+            elif feed_keys is not None:
+                feed_keys.update(change_feed_keys or ())
+                ep_ids.update(change_ep_ids or ())
+        return Changes(tables, feed_keys, ep_ids)
+
+    def _refresh_episode_rows(self, ep_ids) -> None:
+        """Update held instances of episodes to match their rows, after the
+        rows were written other than by save_episodes.
+
+        Instances are updated in place, so that everything holding an episode
+        keeps sharing it (see _create_episode). Their progress is not changed
+        (see Episode.refresh).
+
+        :param ep_ids the database ids of the episodes whose rows were written
+        """
+        ep_ids = [ep_id for ep_id in ep_ids if ep_id in self._episodes_by_id]
+        if len(ep_ids) == 0:
+            return
+
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_BY_IDS % ",".join("?" * len(ep_ids)), ep_ids)
+        for row in cursor.fetchall():
+            episode = self._episodes_by_id.get(row[1])
+            if episode is not None:
+                episode.refresh(
+                    self.feed(row[0]),
+                    title=row[2],
+                    description=row[3],
+                    link=row[4],
+                    pubdate=row[5],
+                    enclosure=row[6],
+                    played=row[7],
+                    duration=row[9],
+                    details=self.episode_details,
+                )
+
+    def _forget_episodes(self, feed: Feed = None, ep_ids=()) -> None:
+        """Stop sharing episodes whose rows were deleted.
+
+        The next read of these ids creates new instances from their rows (see
+        _create_episode). Instances which are already held elsewhere are not
+        changed.
+
+        :param feed (optional) a Feed whose episodes to forget
+        :param ep_ids (optional) the database ids of episodes to forget
+        """
+        if feed is not None:
+            ep_ids = [
+                ep_id for (ep_id, episode) in list(self._episodes_by_id.items()) if episode._feed.key == feed.key
+            ]
+        for ep_id in ep_ids:
+            self._episodes_by_id.pop(ep_id, None)
 
     def replace_feed(self, feed: Feed) -> None:
         """Replace (or insert) a feed in the database.
@@ -190,12 +681,23 @@ class Database:
 
         :param feed the Feed to replace
         """
-        cursor = self._conn.cursor()
-        cursor.execute(
+        self._execute_durable(
             self.SQL_FEED_REPLACE,
-            (feed.key, feed.title, feed.description, feed.link, feed.last_build_date, feed.copyright),
+            (
+                feed.key,
+                feed.title,
+                feed.description,
+                feed.link,
+                feed.last_build_date,
+                feed.copyright,
+                feed.plain_description,
+            ),
         )
-        self._conn.commit()
+        self._feeds_by_key.pop(feed.key, None)
+        self._refresh_episode_rows(
+            [ep_id for (ep_id, episode) in list(self._episodes_by_id.items()) if episode._feed.key == feed.key]
+        )
+        self._record_change(("feed", "episode", "progress"))
 
     def replace_episode(self, feed: Feed, episode: Episode) -> None:
         """Replace (or insert) an episode in the database.
@@ -210,38 +712,53 @@ class Database:
         :param feed the Feed the episode is a part of
         :param episode the Episode to replace
         """
-        cursor = self._conn.cursor()
-        if episode.ep_id is None:
-            cursor.execute(
-                self.SQL_EPISODE_REPLACE_NOID,
-                (
-                    episode.title,
-                    feed.key,
-                    episode.description,
-                    episode.link,
-                    episode.pubdate,
-                    episode.copyright,
-                    episode.enclosure,
-                    episode.played,
-                ),
-            )
-            episode.ep_id = cursor.lastrowid
-        else:
-            cursor.execute(
-                self.SQL_EPISODE_REPLACE,
-                (
-                    episode.ep_id,
-                    episode.title,
-                    feed.key,
-                    episode.description,
-                    episode.link,
-                    episode.pubdate,
-                    episode.copyright,
-                    episode.enclosure,
-                    episode.played,
-                ),
-            )
-        self._conn.commit()
+        with self._write_lock:
+            if episode.ep_id is None:
+                episode.ep_id = self._next_episode_ids(1)[0]
+            self._execute_durable(self.SQL_EPISODE_REPLACE, self._episode_parameters(feed, episode))
+        # the row may not match the episode (see SQL_EPISODE_REPLACE)
+        self._refresh_episode_rows([episode.ep_id])
+        self._index_episodes([episode.ep_id])
+        self._record_change(("episode",))
+
+    def save_episodes(self, episodes: List[Episode]) -> None:
+        """Store the state of a list of episodes which are already in the
+        database, along with their progress.
+
+        Only the state which the client changes (played, duration and
+        progress) is written, so episodes whose details have not been loaded
+        (see _create_episode) are stored safely.
+
+        The episodes are written in a single transaction, which is also
+        applied to the database file (see _execute_durable).
+
+        :param episodes the Episodes to store
+        """
+        with self._write_lock:
+            statements = []
+            for episode in episodes:
+                if episode.ep_id is None:
+                    self.replace_episode(episode._feed, episode)
+                statements.append(
+                    (self.SQL_EPISODE_STATE_UPDATE, (episode.played, episode.duration, episode.ep_id))
+                )
+                if episode.progress == 0:
+                    statements.append((self.SQL_EPISODE_PROGRESS_DELETE, (episode.ep_id,)))
+                else:
+                    statements.append((self.SQL_EPISODE_PROGRESS_REPLACE, (episode.ep_id, episode.progress)))
+            self._execute_durable_many(statements)
+
+        def update(index):
+            for episode in episodes:
+                index.set_played(episode.played, ep_ids=[episode.ep_id])
+                index.set_progress(episode.progress, ep_ids=[episode.ep_id])
+
+        self._update_episode_index(update)
+        self._record_change(
+            ("episode", "progress"),
+            {episode._feed.key for episode in episodes},
+            {episode.ep_id for episode in episodes},
+        )
 
     def replace_episodes(self, feed: Feed, episodes: List[Episode]) -> None:
         """Replace (or insert) a list of episodes in the database.
@@ -251,100 +768,152 @@ class Database:
         :param feed the Feed all episode are a part of
         :param episodes a list of Episode's to replace
         """
-        cursor = self._conn.cursor()
-
-        # there are different sql queries depending on whether the episode
-        # has an id, so we separate them into 2 operations
-        episodes_without_id = []
-        episodes_with_id = []
+        with self._write_lock:
+            # episodes with an id are updated, and the others are inserted
+            episodes_with_id = [episode for episode in episodes if episode.ep_id is not None]
+            episodes_without_id = [episode for episode in episodes if episode.ep_id is None]
+            for (episode, ep_id) in zip(episodes_without_id, self._next_episode_ids(len(episodes_without_id))):
+                episode.ep_id = ep_id
+            self._execute_durable_batch(
+                self.SQL_EPISODE_REPLACE, [self._episode_parameters(feed, episode) for episode in episodes]
+            )
+        self._refresh_episode_rows([episode.ep_id for episode in episodes_with_id])
+        self._index_episodes([episode.ep_id for episode in episodes])
+        self._record_change(("episode",))
 
-        for episode in episodes:
-            if episode.ep_id is None:
-                episodes_without_id.append(episode)
-            else:
-                episodes_with_id.append(episode)
+    @staticmethod
+    def _episode_parameters(feed: Feed, episode: Episode) -> tuple:
+        """Get the parameters of SQL_EPISODE_REPLACE for an episode.
 
-        if len(episodes_without_id) > 0:
-            cursor.executemany(
-                self.SQL_EPISODE_REPLACE_NOID,
-                (
-                    (
-                        episode.title,
-                        feed.key,
-                        episode.description,
-                        episode.link,
-                        episode.pubdate,
-                        episode.copyright,
-                        episode.enclosure,
-                        episode.played,
-                    )
-                    for episode in episodes_without_id
-                ),
-            )
-        if len(episodes_with_id) > 0:
-            cursor.executemany(
-                self.SQL_EPISODE_REPLACE,
-                (
-                    (
-                        episode.ep_id,
-                        episode.title,
-                        feed.key,
-                        episode.description,
-                        episode.link,
-                        episode.pubdate,
-                        episode.copyright,
-                        episode.enclosure,
-                        episode.played,
-                    )
-                    for episode in episodes_with_id
-                ),
-            )
-        self._conn.commit()
+        :param feed the Feed the episode is a part of
+        :param episode the Episode, which has an ep_id
+        :returns tuple: the parameters
+        """
+        return (
+            episode.ep_id,
+            episode.title,
+            feed.key,
+            episode.description,
+            episode.plain_description,
+            episode.link,
+            episode.pubdate,
+            episode.copyright,
+            episode.enclosure,
+            episode.played,
+            episode.duration,
+            helpers.timestamp_from_rfc822(episode.pubdate),
+        )
 
     def delete_queue(self) -> None:
         """Clear the queue table."""
-        cursor = self._conn.cursor()
-        cursor.execute(self.SQL_QUEUE_DELETE)
-        self._conn.commit()
+        self._execute_durable(self.SQL_QUEUE_DELETE)
 
     def replace_queue(self, queue: Queue) -> None:
         """Replace the queue in the database.
 
-        This method overwrites the existing queue.
+        This method overwrites the existing queue. Changes to a Queue are
+        already stored as they happen (see append_queue and remove_queue), so
+        this is only needed to store a queue wholesale.
 
         :param queue the Queue to replace from
         """
+        with self._write_lock:
+            self.delete_queue()
+            self.append_queue([player.episode for player in queue])
+
+    def append_queue(self, episodes: List[Episode]) -> List[int]:
+        """Add episodes to the end of the stored queue.
+
+        The entries are stored in a single transaction. Episodes which are not
+        in the database are not stored.
+
+        :param episodes the Episodes to add, in order
+        :returns List[int]: the ordering key of each episode's new queue
+          entry, or None for episodes which were not stored
+        """
+        ep_ids = [episode.ep_id for episode in episodes if episode.ep_id is not None]
+        if len(ep_ids) == 0:
+            return [None] * len(episodes)
+
+        with self._write_lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self.SQL_EPISODE_IDS_BY_IDS % ",".join("?" * len(ep_ids)), ep_ids)
+            stored = {row[0] for row in cursor.fetchall()}
+            cursor.execute(self.SQL_QUEUE_LAST_KEY)
+            key = cursor.fetchone()[0] or 0
+
+            keys = []
+            for episode in episodes:
+                if episode.ep_id in stored:
+                    key += self.QUEUE_KEY_GAP
+                    keys.append(key)
+                else:
+                    keys.append(None)
+            self._execute_durable_batch(
+                self.SQL_QUEUE_REPLACE,
+                [(key, episode.ep_id) for (key, episode) in zip(keys, episodes) if key is not None],
+            )
+        return keys
+
+    def remove_queue(self, key: int) -> None:
+        """Remove an entry from the stored queue.
+
+        :param key the ordering key of the entry, from append_queue or
+          queue_entries
+        """
+        self._execute_durable(self.SQL_QUEUE_DELETE_BY_KEY, (key,))
+
+    def prefetched(self, episode: Episode) -> bool:
+        """Check whether an episode was downloaded by prefetching.
+
+        :param episode the Episode to check
+        :returns bool: whether the episode is marked as prefetched
+        """
         cursor = self._conn.cursor()
+        cursor.execute(self.SQL_PREFETCH_BY_EP_ID, (episode.ep_id,))
+        return cursor.fetchone() is not None
 
-        self.delete_queue()
+    def add_prefetch(self, episode: Episode) -> None:
+        """Mark an episode as downloaded by prefetching.
 
-        i = 1
-        for player in queue:
-            episode = player.episode
-            if self.episode(episode.ep_id) is not None:
-                cursor.execute(self.SQL_QUEUE_REPLACE, (i, player.episode.ep_id))
-                i += 1
-        self._conn.commit()
+        Episodes which are not in the database are not marked.
+
+        :param episode the Episode to mark
+        """
+        if self.episode(episode.ep_id) is not None:
+            self._execute_durable(self.SQL_PREFETCH_REPLACE, (episode.ep_id,))
+
+    def remove_prefetch(self, episodes: List[Episode]) -> None:
+        """Unmark episodes as downloaded by prefetching.
+
+        The episodes are unmarked in a single transaction.
+
+        :param episodes the Episodes to unmark
+        """
+        ep_ids = [episode.ep_id for episode in episodes if episode.ep_id is not None]
+        if len(ep_ids) == 0:
+            return
+
+        sql = self.SQL_PREFETCH_DELETE_BY_IDS % ",".join("?" * len(ep_ids))
+        self._execute_durable_many([(sql, ep_ids)])
 
     def feeds(self) -> List[Feed]:
         """Retrieve the list of Feeds.
 
+        Feeds are ordered by title, or by their newest episode if the
+        feed_order config option is "newest".
+
         :returns List[Feed]: all Feed's in the database
         """
         cursor = self._conn.cursor()
-        cursor.execute(self.SQL_FEEDS_ALL)
+        if Config["feed_order"] == "newest":
+            cursor.execute(self.SQL_FEEDS_ALL_BY_NEWEST)
+        else:
+            cursor.execute(self.SQL_FEEDS_ALL)
 
         feeds = []
         for row in cursor.fetchall():
-            feed = Feed(
-                url=row[0] if row[0].startswith("http") else None,
-                file=row[0] if not row[0].startswith("http") else None,
-                title=row[1],
-                description=row[2],
-                link=row[3],
-                last_build_date=row[4],
-                copyright=row[5],
-            )
+            feed = self._create_feed(row)
 
             if feed.title:
                 feeds.append(feed)
@@ -370,26 +939,402 @@ class Database:
                 if feed_key not in feed_entries:
                     feed_entries[feed_key] = self.feed(feed_key)
 
-            return [
-                Episode(
-                    feed_entries[row[0]],
-                    ep_id=row[1],
-                    title=row[2],
-                    description=row[3],
-                    link=row[4],
-                    pubdate=row[5],
-                    copyright=row[6],
-                    enclosure=row[7],
-                    played=row[8],
-                    progress=row[9],
-                )
-                for row in rows
-            ]
+            return [self._create_episode(feed_entries[row[0]], row[1:]) for row in rows]
         else:
             cursor.execute(self.SQL_EPISODES_BY_FEED_WITH_PROGRESS, (feed.key,))
             rows = cursor.fetchall()
             return self._create_feed_episode_list(feed, rows)
 
+    def episodes_page(
+        self, after: Tuple[int, int] = None, limit: int = 100, descending: bool = True, filter_text: str = ""
+    ) -> List[Tuple[Tuple[int, int], Episode]]:
+        """Retrieve a page of all episodes, ordered by their published time.
+
+        Pages are found by the ordering key of the episode before them rather
+        than by an offset, so that retrieving a page does not require reading
+        all episodes before it.
+
+        :param after (optional) the ordering key of the episode before the
+          page, or None for the first page
+        :param limit (optional) the maximum number of episodes to retrieve
+        :param descending (optional) whether to order the newest episodes
+          first; episodes published at the same time are ordered by id
+        :param filter_text (optional) text which episode titles must contain,
+          in lowercase
+        :returns List[Tuple[Tuple[int, int], Episode]]: (ordering key, Episode)
+          pairs, where the ordering key is the (published, id) pair to use as
+          the next page's after
+        """
+        conditions = ["1"]
+        parameters = []
+        if filter_text != "":
+            conditions.append(self.SQL_EPISODES_FILTER)
+            parameters.append(filter_text)
+        if after is not None:
+            conditions.append(self.SQL_EPISODES_AFTER_DESC if descending else self.SQL_EPISODES_AFTER_ASC)
+            parameters.extend([after[0], after[0], after[1]])
+        parameters.append(limit)
+
+        cursor = self._conn.cursor()
+        cursor.execute(
+            self.SQL_EPISODES_PAGE % (" and ".join(conditions), "desc" if descending else "asc"),
+            parameters,
+        )
+        rows = cursor.fetchall()
+
+        feed_entries = {}
+        for row in rows:
+            feed_key = row[0]
+            if feed_key not in feed_entries:
+                feed_entries[feed_key] = self.feed(feed_key)
+
+        return [((row[10], row[1]), self._create_episode(feed_entries[row[0]], row[1:])) for row in rows]
+
+    def episode_index(self, wait: bool = False) -> EpisodeIndex:
+        """Retrieve the index of all episodes, which orders and filters them
+        without retrieving each one.
+
+        The index is created in the background when it is first needed, since
+        reading every episode takes too long to wait for before showing a
+        menu; until it is ready, episodes can be paged instead (see
+        episodes_page). Once created, it is updated as episodes are written
+        here (see _update_episode_index).
+
+        :param wait (optional) whether to wait for the index to be created
+        :returns EpisodeIndex: the index, or None if it is being created
+        """
+        with self._write_lock:
+            index = self._episode_index
+            thread = self._episode_index_thread
+            if index is None and thread is None:
+                thread = threading.Thread(target=self._create_episode_index, name="episode_index", daemon=True)
+                self._episode_index_thread = thread
+                thread.start()
+
+        if index is None and wait:
+            thread.join()
+            index = self._episode_index
+        return index
+
+    def _create_episode_index(self) -> None:
+        """Create the episode index (see episode_index).
+
+        Episodes written while the index is created may not be reflected in
+        it, so it is created again until none are.
+        """
+        while True:
+            writes = self._episode_index_writes
+            cursor = self._conn.cursor()
+            cursor.execute(self.SQL_EPISODE_INDEX)
+            index = EpisodeIndex(self, cursor.fetchall())
+            with self._write_lock:
+                if self._episode_index_writes == writes:
+                    self._episode_index = index
+                    self._episode_index_thread = None
+                    return
+
+    def episodes_by_ids(self, ep_ids: List[int]) -> List[Episode]:
+        """Retrieve a set of episodes.
+
+        :param ep_ids the database ids of the episodes to retrieve
+        :returns List[Episode]: the Episodes which exist, in the order of
+          their ids in ep_ids
+        """
+        if len(ep_ids) == 0:
+            return []
+
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_BY_IDS % ",".join("?" * len(ep_ids)), tuple(ep_ids))
+        rows = {row[1]: row for row in cursor.fetchall()}
+
+        episodes = []
+        for ep_id in ep_ids:
+            if ep_id in rows:
+                row = rows[ep_id]
+                episodes.append(self._create_episode(self.feed(row[0]), row[1:]))
+        return episodes
+
+    def episodes_count(self, filter_text: str = "") -> Tuple[int, int]:
+        """Count all episodes, as retrieved by episodes_page.
+
+        :param filter_text (optional) text which episode titles must contain,
+          in lowercase
+        :returns Tuple[int, int]: the number of episodes, and the number of
+          those which have not been played
+        """
+        cursor = self._conn.cursor()
+        if filter_text == "":
+            cursor.execute(self.SQL_EPISODES_COUNT_ALL)
+        else:
+            cursor.execute(self.SQL_EPISODES_COUNT % self.SQL_EPISODES_FILTER, (filter_text,))
+        return tuple(cursor.fetchone())
+
+    def feeds_count(self) -> int:
+        """Count the feeds retrieved by feeds().
+
+        :returns int: the number of feeds
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_FEEDS_COUNT)
+        return cursor.fetchone()[0]
+
+    def feed_stats(self, feed: Feed) -> FeedStats:
+        """Retrieve statistics about the episodes of a feed.
+
+        The statistics are kept up to date by triggers in the database, so
+        this does not read the feed's episodes.
+
+        :param feed the Feed to retrieve statistics of
+        :returns FeedStats: the feed's statistics, or None if the feed is not
+          in the database
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_FEED_STATS_BY_KEY, (feed.key,))
+        row = cursor.fetchone()
+        return None if row is None else FeedStats(*row[1:])
+
+    def all_feed_stats(self) -> Dict[str, FeedStats]:
+        """Retrieve statistics about the episodes of every feed, as in
+        feed_stats.
+
+        :returns Dict[str, FeedStats]: the statistics of each feed by its key
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_FEED_STATS_ALL)
+        return {row[0]: FeedStats(*row[1:]) for row in cursor.fetchall()}
+
+    def search(self, text: str, limit: int = 100) -> List[Episode]:
+        """Search the titles and descriptions of all episodes and the titles of
+        their feeds.
+
+        Episodes must contain every word of the text, where the last word may
+        be incomplete (i.e. while it is being typed). Results are ranked by
+        relevance, with matching episode titles weighted most heavily.
+
+        :param text the text to search for
+        :param limit (optional) the maximum number of episodes to retrieve
+        :returns List[Episode]: the matching episodes, most relevant first
+        """
+        query = self._search_query(text)
+        if query == "":
+            return []
+
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_SEARCH, (query, limit))
+        rows = cursor.fetchall()
+
+        feed_entries = {}
+        for row in rows:
+            feed_key = row[0]
+            if feed_key not in feed_entries:
+                feed_entries[feed_key] = self.feed(feed_key)
+
+        return [self._create_episode(feed_entries[row[0]], row[1:]) for row in rows]
+
+    def archive_played(self, before: int) -> int:
+        """Move played episodes published before a time to the archive.
+
+        Archived episodes are not retrieved with the episodes of their feed or
+        of all feeds, and are skipped when their feed is reloaded. They can
+        still be found by search, and are moved back when they are restored
+        (see restore_archived). Episodes which are queued, prefetched or have
+        progress are not archived.
+
+        :param before a timestamp; episodes published before it are archived
+        :returns int: the number of episodes archived
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_ARCHIVABLE_IDS % self.SQL_EPISODES_ARCHIVABLE, (before,))
+        ep_ids = [row[0] for row in cursor.fetchall()]
+        if len(ep_ids) == 0:
+            return 0
+
+        self._execute_durable_many(
+            [
+                (self.SQL_EPISODES_ARCHIVE % self.SQL_EPISODES_ARCHIVABLE, (before,)),
+                (self.SQL_EPISODES_ARCHIVED_DELETE % self.SQL_EPISODES_ARCHIVABLE, (before,)),
+            ]
+        )
+        self._forget_episodes(ep_ids=ep_ids)
+        self._update_episode_index(lambda index: index.remove(ep_ids=ep_ids))
+        self._record_change(("episode",))
+        return len(ep_ids)
+
+    def restore_archived(self, feed: Feed = None, text: str = None) -> int:
+        """Move the archived episodes of a feed, or those which match a
+        search, back out of the archive.
+
+        Exactly one of either feed or text must be given. Restored episodes
+        are given new ids.
+
+        :param feed (optional) the Feed whose episodes to restore
+        :param text (optional) text to search for, as in search()
+        :returns int: the number of episodes restored
+        """
+        assert (feed is None) != (text is None)
+
+        if feed is not None:
+            condition, parameters = self.SQL_ARCHIVED_BY_FEED, (feed.key,)
+        else:
+            query = self._search_query(text)
+            if query == "":
+                return 0
+            condition, parameters = self.SQL_ARCHIVED_BY_SEARCH, (query,)
+
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_ARCHIVED_COUNT % condition, parameters)
+        count = cursor.fetchone()[0]
+        if count == 0:
+            return 0
+
+        with self._write_lock:
+            cursor.execute(self.SQL_EPISODES_MAX_ID)
+            last_id = cursor.fetchone()[0]
+            self._execute_durable_many(
+                [
+                    (self.SQL_ARCHIVED_RESTORE % condition, (last_id,) + parameters),
+                    (self.SQL_ARCHIVED_DELETE % condition, parameters),
+                ]
+            )
+        self._index_episodes(range(last_id + 1, last_id + 1 + count))
+        self._record_change(("episode",))
+        return count
+
+    def retention(self, feed: Feed) -> Retention:
+        """Retrieve the retention rules which override the config's for a
+        feed.
+
+        :param feed the Feed whose rules to retrieve
+        :returns Retention: the feed's rules, which are None where the feed
+          uses the config's
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_RETENTION_BY_FEED, (feed.key,))
+        row = cursor.fetchone()
+        if row is None:
+            return Retention(None, None, None, None)
+
+        return Retention(row[0], row[1], None if row[2] is None else bool(row[2]), row[3])
+
+    def replace_retention(self, feed: Feed, retention: Retention) -> None:
+        """Replace the retention rules which override the config's for a feed.
+
+        The rules are applied when feeds are next reloaded (see
+        enforce_retention).
+
+        :param feed the Feed whose rules to replace
+        :param retention the feed's rules, which are None where the feed uses
+          the config's
+        """
+        self._execute_durable(self.SQL_RETENTION_REPLACE, (feed.key,) + tuple(retention))
+
+    def enforce_retention(self) -> int:
+        """Delete the episodes, and the downloaded episodes, which the
+        retention rules of their feeds no longer keep.
+
+        Episodes are deleted for all feeds in a single statement. The newest
+        episodes are kept, along with episodes which are queued or prefetched.
+        Episodes are kept by the config's max_episodes, max_episode_age and
+        retain_unplayed_episodes parameters, unless their feed overrides them
+        (see replace_retention).
+
+        :returns int: the number of episodes deleted
+        """
+        parameters = (
+            int(Config["max_episodes"]),
+            int(Config["max_episode_age"]),
+            helpers.is_true(Config["retain_unplayed_episodes"]),
+            int(time.time()),
+        )
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_EXPIRED, parameters)
+        ep_ids = [row[0] for row in cursor.fetchall()]
+        if len(ep_ids) > 0:
+            # the expired episodes are chosen once, on the in-memory copy,
+            # so that the same episodes are deleted from the file
+            self._execute_durable(self.SQL_EPISODES_DELETE_BY_IDS % ",".join("?" * len(ep_ids)), ep_ids)
+            self._forget_episodes(ep_ids=ep_ids)
+            self._update_episode_index(lambda index: index.remove(ep_ids=ep_ids))
+            self._record_change(("episode", "progress"))
+
+        for feed in self.feeds():
+            self._enforce_download_quota(feed)
+
+        self._compact()
+        return len(ep_ids)
+
+    def _enforce_download_quota(self, feed: Feed) -> None:
+        """Delete the downloaded episodes of a feed which exceed its download
+        quota.
+
+        Downloads of episodes which are no longer in the database are deleted
+        first, then those of played episodes, oldest first. Unplayed episodes
+        are only deleted if the feed doesn't keep them (see enforce_retention).
+
+        :param feed the Feed whose downloaded episodes to delete
+        """
+        retention = self.retention(feed)
+        quota = retention.download_quota
+        if quota is None:
+            quota = int(Config["download_quota"])
+        if quota < 0:
+            return
+
+        downloaded = Episode.downloaded_files(feed)
+        sizes = {ep_id: os.path.getsize(path) for (ep_id, path) in downloaded.items()}
+        excess = sum(sizes.values()) - quota * 1000 * 1000
+        if excess <= 0:
+            return
+
+        keep_unplayed = retention.keep_unplayed
+        if keep_unplayed is None:
+            keep_unplayed = helpers.is_true(Config["retain_unplayed_episodes"])
+
+        ep_ids = list(downloaded)
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODES_PLAYED_BY_IDS % ",".join("?" * len(ep_ids)), ep_ids)
+        played = dict(cursor.fetchall())
+        # missing episodes sort first, and older (lower) ids before newer
+        candidates = sorted(
+            (ep_id for ep_id in ep_ids if played.get(ep_id, True) or not keep_unplayed),
+            key=lambda ep_id: (ep_id in played, not played.get(ep_id, True), ep_id),
+        )
+
+        to_delete = []
+        for ep_id in candidates:
+            if excess <= 0:
+                break
+            to_delete.append(ep_id)
+            excess -= sizes[ep_id]
+        Episode.delete_downloads(feed, to_delete)
+        for ep_id in to_delete:
+            episode = self._episodes_by_id.get(ep_id)
+            if episode is not None:
+                episode.check_downloaded()
+
+    def _archived_keys(self, feed: Feed) -> set:
+        """Retrieve the titles and enclosures of the archived episodes of a
+        feed, to recognize them when the feed is reloaded.
+
+        :param feed the Feed whose archived episodes to find
+        :returns set: (title, enclosure) pairs, as the episodes were stored
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_ARCHIVED_KEYS_BY_FEED, (feed.key,))
+        return set(cursor.fetchall())
+
+    @staticmethod
+    def _search_query(text: str) -> str:
+        """Create an FTS5 query from text entered by the user.
+
+        Each word is quoted so that characters in it are never interpreted as
+        query syntax, and is matched as a prefix.
+
+        :param text the text to search for
+        :returns str: the query, or an empty string if there are no words
+        """
+        return " ".join('"%s"*' % word.replace('"', '""') for word in text.split())
+
     def unplayed_episodes(self, feed: Feed) -> List[Episode]:
         """Retrieve all unplayed episodes for a feed.
 
@@ -407,21 +1352,58 @@ class Database:
         :param episode_rows Query result rows
         :returns List[Episode]: List of the episodes
         """
-        return [
-            Episode(
+        return [self._create_episode(feed, row) for row in episode_rows]
+
+    def _create_episode(self, feed: Feed, row) -> Episode:
+        """Create an episode from the columns selected by episode queries.
+
+        Queries only select the columns which are shown in menus. The
+        description (unless the episode has no title, in which case menus show
+        it instead), its plain text and the copyright are retrieved when they
+        are first used; see episode_details.
+
+        While an episode is held anywhere in the client, reading it again gives
+        the same instance rather than a copy, so that every menu, the queue
+        and the modified episodes share its played state and progress. The
+        instance is updated in place when its row is written other than by
+        save_episodes (see _refresh_episode_rows), and only replaced once its
+        row is deleted (see _forget_episodes).
+
+        :param feed the Feed the episode is from
+        :param row the id, title, description, link, pubdate, enclosure,
+          played, progress and duration columns of the episode
+        :returns Episode: the episode
+        """
+        episode = self._episodes_by_id.get(row[0])
+        if episode is None:
+            episode = Episode(
                 feed,
                 ep_id=row[0],
                 title=row[1],
                 description=row[2],
                 link=row[3],
                 pubdate=row[4],
-                copyright=row[5],
-                enclosure=row[6],
-                played=row[7],
-                progress=row[8],
+                enclosure=row[5],
+                played=row[6],
+                progress=row[7],
+                duration=row[8],
+                details=self.episode_details,
             )
-            for row in episode_rows
-        ]
+            self._episodes_by_id[row[0]] = episode
+        return episode
+
+    def episode_details(self, ep_id: int) -> Tuple[str, str, str]:
+        """Retrieve the columns of an episode which are not selected by
+        episode queries.
+
+        :param ep_id the id of the episode
+        :returns Tuple[str, str, str]: the description, plain description and
+          copyright of the episode, which are None if it does not exist
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_EPISODE_DETAILS_BY_ID, (ep_id,))
+        result = cursor.fetchone()
+        return (None, None, None) if result is None else tuple(result)
 
     def feed(self, key) -> Feed:
         """Retrieve a feed by key.
@@ -430,6 +1412,9 @@ class Database:
           key in the database
         :returns Feed: the matching Feed, if it exists, or None
         """
+        if key in self._feeds_by_key:
+            return self._feeds_by_key[key]
+
         cursor = self._conn.cursor()
         cursor.execute(self.SQL_FEED_BY_KEY, (key,))
 
@@ -437,16 +1422,34 @@ class Database:
         if result is None:
             return None
         else:
-            return Feed(
-                url=result[0] if result[0].startswith("http") else None,
-                file=result[0] if not result[0].startswith("http") else None,
-                title=result[1],
-                description=result[2],
-                link=result[3],
-                last_build_date=result[4],
-                copyright=result[5],
-                episodes=[],
+            return self._create_feed(result)
+
+    def _create_feed(self, row) -> Feed:
+        """Create a feed from the columns selected by feed queries.
+
+        Feeds are shared by key between everything read from the database, so
+        that episodes of the same feed don't each have their own copy. The
+        shared instance is replaced when the feed is written, and held
+        episodes are moved to the new one (see replace_feed).
+
+        :param row the key, title, description, link, last_build_date,
+          copyright and plain_description columns of the feed
+        :returns Feed: the feed
+        """
+        feed = self._feeds_by_key.get(row[0])
+        if feed is None:
+            feed = Feed(
+                url=row[0] if row[0].startswith("http") else None,
+                file=row[0] if not row[0].startswith("http") else None,
+                title=row[1],
+                description=row[2],
+                link=row[3],
+                last_build_date=row[4],
+                copyright=row[5],
+                plain_description=row[6],
             )
+            self._feeds_by_key[row[0]] = feed
+        return feed
 
     def episode(self, ep_id: int) -> Episode:
         """Retrieve an episode by ep_id.
@@ -462,63 +1465,41 @@ class Database:
         if result is None:
             return None
         else:
-            feed = self.feed(result[0])
-            return Episode(
-                feed,
-                ep_id=result[1],
-                title=result[2],
-                description=result[3],
-                link=result[4],
-                pubdate=result[5],
-                copyright=result[6],
-                enclosure=result[7],
-                played=result[8],
-                progress=result[9],
-            )
+            return self._create_episode(self.feed(result[0]), result[1:])
 
     def queue(self) -> List[Episode]:
         """Retrieve all episodes in the queue.
 
         :returns List[Episode]: all Episode's in the queue
         """
-        cursor = self._conn.cursor()
+        return [episode for (key, episode) in self.queue_entries()]
 
-        # get ep_id's of episodes to retrieve
-        cursor.execute(self.SQL_QUEUE_ALL, ())
-        ep_ids = [row[1] for row in cursor.fetchall()]
+    def queue_entries(self) -> List[Tuple[int, Episode]]:
+        """Retrieve all entries in the queue, in order.
 
-        if len(ep_ids) == 0:
-            return []
+        Entries for episodes which no longer exist are skipped.
 
-        # bulk retrieve all episodes
-        sql = self.SQL_EPISODES_BY_ID
-        for ep_id in ep_ids[1:]:
-            sql += " OR id=?"
-        cursor.execute(sql, tuple(ep_ids))
+        :returns List[Tuple[int, Episode]]: the ordering key and Episode of
+          each entry in the queue
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(self.SQL_QUEUE_ALL, ())
 
+        # the queue may contain repeated ep_id's, so episodes are cached
+        # to share a single instance between entries
         episodes_cache = {}
         feeds_cache = {}
+        entries = []
         for result in cursor.fetchall():
-            ep_id = result[1]
+            ep_id = result[2]
             if ep_id not in episodes_cache:
-                feed_key = result[0]
-                feed = feeds_cache[feed_key] if feed_key in feeds_cache else self.feed(feed_key)
-                episodes_cache[ep_id] = Episode(
-                    feed,
-                    ep_id=ep_id,
-                    title=result[2],
-                    description=result[3],
-                    link=result[4],
-                    pubdate=result[5],
-                    copyright=result[6],
-                    enclosure=result[7],
-                    played=result[8],
-                    progress=result[9],
-                )
+                feed_key = result[1]
+                if feed_key not in feeds_cache:
+                    feeds_cache[feed_key] = self.feed(feed_key)
+                episodes_cache[ep_id] = self._create_episode(feeds_cache[feed_key], result[2:])
+            entries.append((result[0], episodes_cache[ep_id]))
 
-        # queue may contain repeated ep_id's, so we need to go back to the
-        # retrieved ep_ids to get complete list of desired episodes
-        return [episodes_cache[ep_id] for ep_id in ep_ids]
+        return entries
 
     def reload(self, display=None, feeds=None) -> None:
         """Reload feeds in the database.
@@ -539,8 +1520,8 @@ class Database:
         does not require episode titles to be globally unique (that is,
         episodes with the same name in different feeds will never have issues).
 
-        This method adheres to the max_episodes config parameter to limit the
-        number of episodes saved per feed.
+        Once the feeds are reloaded, episodes which the retention rules of
+        their feed no longer keep are deleted (see enforce_retention).
 
         :param display (optional) the display to write status updates to
         :param feeds (optional) a list of feeds to reload. If not specified,
@@ -608,21 +1589,23 @@ class Database:
             except FeedError:
                 errors += 1
 
+        self.enforce_retention()
+
         if display is not None:
             display.change_status("Successfully reloaded %d feeds" % total_feeds)
             display.menus_valid = False
 
     def replace_progress(self, episode: Episode, progress: int):
-        cursor = self._conn.cursor()
-        cursor.execute(self.SQL_EPISODE_PROGRESS_REPLACE, (episode.ep_id, progress))
+        self._execute_durable(self.SQL_EPISODE_PROGRESS_REPLACE, (episode.ep_id, progress))
         episode.progress = progress
-        self._conn.commit()
+        self._update_episode_index(lambda index: index.set_progress(progress, ep_ids=[episode.ep_id]))
+        self._record_change(("progress",), {episode._feed.key}, {episode.ep_id})
 
     def delete_progress(self, episode: Episode):
-        cursor = self._conn.cursor()
-        cursor.execute(self.SQL_EPISODE_PROGRESS_DELETE, (episode.ep_id,))
+        self._execute_durable(self.SQL_EPISODE_PROGRESS_DELETE, (episode.ep_id,))
         episode.progress = None
-        self._conn.commit()
+        self._update_episode_index(lambda index: index.set_progress(0, ep_ids=[episode.ep_id]))
+        self._record_change(("progress",), {episode._feed.key}, {episode.ep_id})
 
     def _reload_feed_data(self, old_feed: Feed, new_feed: Feed):
         """Helper method to update a feed and its episodes in the database.
@@ -630,28 +1613,32 @@ class Database:
         :param old_feed the original Feed to be replaced
         :param new_feed a Feed with new/updated data
         """
-        # keep user metadata for episodes intact
-        new_episodes = new_feed.parse_episodes()
+        # keep user metadata for episodes intact, and leave archived episodes
+        # in the archive
+        archived = self._archived_keys(new_feed)
+        new_episodes = [
+            episode for episode in new_feed.parse_episodes() if (episode.title, episode.enclosure) not in archived
+        ]
         old_episodes = self.episodes(new_feed)
-        episode_progresses = {}
+        matched_olds = set()
         for new_ep in new_episodes:
             matching_olds = [old_ep for old_ep in old_episodes if str(old_ep) == str(new_ep)]
             if len(matching_olds) == 1:
                 new_ep.replace_from(matching_olds[0])
-                if matching_olds[0].progress != 0:
-                    episode_progresses[str(new_ep)] = new_ep.progress
-
-        # limit number of episodes, if necessary
-        max_episodes = int(Config["max_episodes"])
-        if max_episodes != -1:
-            new_episodes = new_episodes[:max_episodes]
+                matched_olds.add(matching_olds[0].ep_id)
 
-        # update the feed and its episodes in the database
+        # update the feed and its episodes in the database; matched episodes
+        # keep their rows, and with them their queue entries and progress
         self.replace_feed(new_feed)
         self.replace_episodes(new_feed, new_episodes)
 
-        # ensure episodes have their progress carried over, if necessary
-        added_episodes = self.episodes(new_feed)
-        for episode in added_episodes:
-            if str(episode) in episode_progresses:
-                self.replace_progress(episode, episode.progress)
+        # delete episodes which are no longer in the feed, unless they are
+        # kept; the number of episodes is limited afterward (see
+        # enforce_retention)
+        if not helpers.is_true(Config["retain_absent_episodes"]):
+            absent_ids = [old_ep.ep_id for old_ep in old_episodes if old_ep.ep_id not in matched_olds]
+            if len(absent_ids) > 0:
+                self._execute_durable(self.SQL_EPISODES_DELETE_BY_IDS % ",".join("?" * len(absent_ids)), absent_ids)
+                self._forget_episodes(ep_ids=absent_ids)
+                self._update_episode_index(lambda index: index.remove(ep_ids=absent_ids))
+                self._record_change(("episode", "progress"))
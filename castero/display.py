@@ -2,14 +2,13 @@ import curses
 import glob
 import importlib
 import threading
-from typing import List
 import subprocess
 from os.path import dirname, basename, isfile
 
 import castero
 from castero import helpers
 from castero.config import Config
-from castero.database import Database
+from castero.database import Database, Retention
 from castero.downloadqueue import DownloadQueue
 from castero.feed import (
     Feed,
@@ -23,7 +22,9 @@ from castero.episode import Episode
 from castero.menu import Menu
 from castero.perspective import Perspective
 from castero.queue import Queue
-from castero.player import Player
+from castero.player import PlayerDependencyError
+from castero.streamcache import StreamCache
+from castero.writequeue import WriteQueue
 
 
 class DisplayError(Exception):
@@ -78,13 +79,16 @@ class Display:
         self._footer_window = None
         self._queue = Queue(self)
         self._download_queue = DownloadQueue(self)
+        self._stream_cache = StreamCache()
         self._status = ""
         self._header_str = ""
         self._footer_str = ""
         self._status_timer = self.STATUS_TIMEOUT
         self._update_timer = self.UPDATE_TIMEOUT
         self._menus_valid = True
-        self._modified_episodes = []
+        self._stale_perspectives = set()  # see update
+        self._database_version = database.version()
+        self._modified_episodes = WriteQueue(database)
 
         # basic preliminary operations
         self._stdscr.timeout(self.INPUT_TIMEOUT)
@@ -176,7 +180,11 @@ class Display:
             self._perspectives[inst.ID] = inst
 
     def _load_players(self) -> None:
-        """Load player classes from the `players` package."""
+        """Load player classes from the `players` package.
+
+        Each player's dependencies are checked here, so that the (cached)
+        result is ready when players are created.
+        """
         # load a list of modules names by manually detecting .py files
         module_files = glob.glob(dirname(__file__) + "/players/*.py")
         module_names = [basename(f)[:-3] for f in module_files if isfile(f)]
@@ -186,13 +194,15 @@ class Display:
             p_cls = getattr(p_mod, dir(p_mod)[[cls.lower() == name for cls in dir(p_mod)].index(True)])
             self.AVAILABLE_PLAYERS[p_cls.NAME] = p_cls
 
+            try:
+                p_cls.check_dependencies()
+            except PlayerDependencyError:
+                pass
+
     def _restore_queue(self) -> None:
         """Recreate players in queue from the database."""
-        for episode in self.database.queue():
-            player = Player.create_instance(
-                self.AVAILABLE_PLAYERS, str(episode), episode.get_playable(), episode
-            )
-            self.queue.add(player)
+        for (key, episode) in self.database.queue_entries():
+            self.queue.add(episode, key=key)
 
     def _create_windows(self) -> None:
         """Creates and sets basic parameters for the windows.
@@ -299,8 +309,11 @@ class Display:
         # check if the screen size has changed
         self.update_parent_dimensions()
 
-        # decrement the update timer
+        # decrement the update timer; if the current player's media has ended
+        # we update now so the queue can move on without waiting for the timer
         self._update_timer -= 1
+        if self._queue.first is not None and self._queue.first.ended:
+            self._update_timer = 0
         if self._update_timer <= 0:
             self._update_timer = self.UPDATE_TIMEOUT
             self.update()
@@ -348,16 +361,27 @@ class Display:
 
         self.clear()
         self._active_perspective = perspective_id
+        self._update_stale_perspective()
         self._perspectives[perspective_id].made_active()
         self.display_all()
 
-    def _get_input_str(self, prompt) -> str:
+    def _update_stale_perspective(self) -> None:
+        """Update the menus of the active perspective, if they may not match
+        the data they show (see update).
+        """
+        if self._active_perspective in self._stale_perspectives:
+            self._stale_perspectives.discard(self._active_perspective)
+            self._perspectives[self._active_perspective].update_menus()
+
+    def _get_input_str(self, prompt, on_change=None) -> str:
         """Prompts the user for input and returns the resulting string.
 
         This method assumes that all input strings will be obtained in the
         footer window.
 
         :param prompt a string to inform the user of what they need to enter
+        :param on_change (optional) a function to call with the input so far
+          each time it changes
         :returns str: the user's input
         """
         assert self._footer_window is not None
@@ -392,6 +416,11 @@ class Display:
                     entry_pad.addch(0, current_x, input_char)
                     current_x += 1
 
+                # let the caller react before the cursor returns to the pad
+                if on_change is not None:
+                    entered = entry_pad.instr(0, 0, current_x)
+                    on_change(entered.decode("utf-8").strip())
+
                 # display current portion of pad
                 entry_pad.refresh(
                     0,
@@ -468,7 +497,6 @@ class Display:
             if feed.validated:
                 self.database.replace_feed(feed)
                 self.database.replace_episodes(feed, feed.parse_episodes())
-            self.menus_valid = False
             self.change_status("Feed '%s' successfully added" % str(feed))
         except FeedError as e:
             if isinstance(e, FeedLoadError):
@@ -498,7 +526,6 @@ class Display:
                 should_delete = self._get_y_n("Are you sure you want to delete this feed? (y/n): ")
             if should_delete:
                 self.database.delete_feed(feed)
-                self.menus_valid = False
                 self.change_status("Feed successfully deleted")
 
     def reload_feeds(self) -> None:
@@ -510,7 +537,8 @@ class Display:
         This method starts the reloading in a new un-managed thread.
         """
         should_reload = True
-        if len(self.database.feeds()) >= int(Config["reload_feeds_threshold"]):
+        feeds_count = self.database.feeds_count()
+        if feeds_count >= int(Config["reload_feeds_threshold"]):
             should_reload = self._get_y_n("Are you sure you want to reload all of your feeds?" " (y/n): ")
         if should_reload:
             t = threading.Thread(target=self.database.reload, args=[self])
@@ -524,6 +552,83 @@ class Display:
         t = threading.Thread(target=self.database.reload, args=[self, [feed]])
         t.start()
 
+    def restore_archived(self, feed: Feed = None, text: str = None) -> None:
+        """Restore the archived episodes of a feed, or those which match a
+        search.
+
+        Exactly one of either feed or text must be given.
+
+        :param feed (optional) the Feed whose episodes to restore
+        :param text (optional) the text which episodes to restore match
+        """
+        num_restored = self.database.restore_archived(feed=feed, text=text)
+        self.change_status("Restored %d archived episodes" % num_restored)
+
+    def set_retention(self, feed: Feed) -> None:
+        """Prompt the user for the retention rules of a feed.
+
+        The user is prompted for each rule in turn, and can enter nothing to
+        use the config's rule. The rules are applied when feeds are next
+        reloaded.
+
+        :param feed the Feed whose retention rules to set
+        """
+
+        def parse_y_n(text):
+            if text not in ("y", "n"):
+                raise ValueError(text)
+            return text == "y"
+
+        current = self.database.retention(feed)
+        try:
+            retention = Retention(
+                self._get_retention_rule(
+                    "Max episodes", current.max_episodes, int
+                ),
+                self._get_retention_rule(
+                    "Max age in days", current.max_age, int
+                ),
+                self._get_retention_rule(
+                    "Keep unplayed (y/n)", current.keep_unplayed, parse_y_n
+                ),
+                self._get_retention_rule(
+                    "Download quota in MB", current.download_quota, int
+                ),
+            )
+        except ValueError:
+            self.change_status(
+                "Invalid retention rule; the rules were not changed"
+            )
+            return
+
+        self.database.replace_retention(feed, retention)
+        self.change_status(
+            "Retention rules will be applied when feeds are next reloaded"
+        )
+
+    def _get_retention_rule(self, prompt, current, parse):
+        """Prompts the user for one retention rule of a feed.
+
+        :param prompt a string to inform the user of which rule to enter
+        :param current the feed's current rule, or None if it uses the config's
+        :param parse a function which converts the input to the rule, raising
+          ValueError if it is invalid
+        :returns: the rule, or None if the user entered nothing
+        """
+        if current is None:
+            current_str = "default"
+        elif isinstance(current, bool):
+            current_str = "y" if current else "n"
+        else:
+            current_str = str(current)
+
+        text = self._get_input_str(
+            "%s [%s] (blank for default): " % (prompt, current_str)
+        )
+        if text == "":
+            return None
+        return parse(text)
+
     def save_episodes(self, feed=None, episode=None) -> None:
         """Save a feed or episode.
 
@@ -535,9 +640,10 @@ class Display:
         assert (feed is None or episode is None) and (feed is not episode)
 
         if feed is not None:
+            downloaded = Episode.downloaded_files(feed)
             num_to_save = 0
             for episode in self.database.episodes(feed):
-                if not episode.downloaded:
+                if episode.ep_id not in downloaded:
                     num_to_save += 1
 
             if num_to_save == 0:
@@ -547,12 +653,17 @@ class Display:
                 "Are you sure you want to download %d" " episodes from this feed? (y/n): " % num_to_save
             )
             if should_delete:
+                saved = []
                 for episode in self.database.episodes(feed):
-                    if not episode.downloaded:
+                    if episode.ep_id not in downloaded:
                         self._download_queue.add(episode)
+                        saved.append(episode)
+                self.database.remove_prefetch(saved)
         else:
             if not episode.downloaded:
                 self._download_queue.add(episode)
+            # keep the episode after it is played, even if it was prefetched
+            self.database.remove_prefetch([episode])
 
     def delete_episodes(self, feed=None, episode=None) -> None:
         """Delete a downloaded episode, or all of those from a feed.
@@ -565,12 +676,7 @@ class Display:
         assert (feed is None or episode is None) and (feed is not episode)
 
         if feed is not None:
-            num_deleted = 0
-            num_to_delete = 0
-            for episode in self.database.episodes(feed):
-                if episode.downloaded:
-                    num_to_delete += 1
-
+            num_to_delete = len(Episode.downloaded_files(feed))
             if num_to_delete == 0:
                 return
 
@@ -579,10 +685,7 @@ class Display:
                 " episodes from this feed? (y/n): " % num_to_delete
             )
             if should_delete:
-                for episode in self.database.episodes(feed):
-                    if episode.downloaded:
-                        episode.delete(self)
-                        num_deleted += 1
+                num_deleted = Episode.delete_downloads(feed)
                 self.menus_valid = False
                 self.change_status("Successfully deleted %d episodes" % num_deleted)
         else:
@@ -597,6 +700,21 @@ class Display:
         menu.filter_text = self._get_input_str("Filter: ")
         self.menus_valid = False
 
+    def search_menu(self, menu: Menu) -> None:
+        """Prompts the user for text to search for, updating a menu's
+        results as it is typed.
+
+        :param menu the menu to search with, which is updated with the text
+        """
+
+        def show_results(text):
+            menu.update_items(text)
+            menu.display()
+            menu.window.refresh()
+
+        show_results(self._get_input_str("Search: ", on_change=show_results))
+        self.menus_valid = False
+
     def execute_command(self, episode: Episode) -> None:
         """Execute a system command on an episode's enclosure.
 
@@ -650,8 +768,10 @@ class Display:
         before the object is destroyed.
         """
         self._queue.stop()
+        self._queue.release_engines()
+        self._stream_cache.stop()
 
-        self.database.replace_queue(self._queue)
+        self._modified_episodes.close()
         self.database.close()
 
         curses.nocbreak()
@@ -709,12 +829,26 @@ class Display:
             self.change_status("OSError: %s" % str(e))
             return
 
-        # check to see if menu contents have been invalidated
+        # check to see if menu contents have been invalidated; perspectives
+        # which aren't visible are only updated once they are shown
         if not self.menus_valid:
-            for perspective_id in self._perspectives:
-                self._perspectives[perspective_id].update_menus()
+            self._stale_perspectives.update(self._perspectives)
             self.menus_valid = True
 
+        # refresh only the menu items whose data changed in the database, if
+        # rows were not added or removed
+        database_version = self._database.version()
+        if database_version != self._database_version:
+            changes = self._database.changes_since(self._database_version)
+            self._database_version = database_version
+            for perspective_id in self._perspectives:
+                if perspective_id not in self._stale_perspectives:
+                    perspective = self._perspectives[perspective_id]
+                    if perspective.database_changed(changes):
+                        self._stale_perspectives.add(perspective_id)
+
+        self._update_stale_perspective()
+
         # update the header text
         max_width = self._header_window.getmaxyx()[1]
         header_str = "%s " % castero.__title__
@@ -751,17 +885,9 @@ class Display:
                 # status_timer should be reset during the next change_status()
                 self._status = ""
 
-        # write any episode modifications to the database
+        # write any episode modifications to the database, in the background
         if len(self._modified_episodes) > 0:
-            for episode in self._modified_episodes:
-                self.database.replace_episode(episode._feed, episode)
-                if episode.progress is None:
-                    self.database.delete_progress(episode, episode.progress)
-                else:
-                    self.database.replace_progress(episode, episode.progress)
-
-            self.menus_valid = False
-            self._modified_episodes = []
+            self._modified_episodes.flush()
 
     @property
     def parent_x(self) -> int:
@@ -788,6 +914,11 @@ class Display:
         """Queue: the Queue of Player's"""
         return self._queue
 
+    @property
+    def download_queue(self) -> DownloadQueue:
+        """DownloadQueue: the queue of episode downloads"""
+        return self._download_queue
+
     @property
     def menus_valid(self) -> bool:
         """bool: whether the menu contents are valid (!need_to_be_updated)"""
@@ -798,6 +929,11 @@ class Display:
         self._menus_valid = menus_valid
 
     @property
-    def modified_episodes(self) -> List[Episode]:
-        """List[Episode]: database episodes to save on the next update"""
+    def stream_cache(self) -> StreamCache:
+        """StreamCache: the cache of streamed episodes"""
+        return self._stream_cache
+
+    @property
+    def modified_episodes(self) -> WriteQueue:
+        """WriteQueue: database episodes to save on the next update"""
         return self._modified_episodes
@@ -4,24 +4,51 @@ from castero.episode import Episode
 
 
 class DownloadQueue:
-    """A FIFO ordered queue for handling episode downloads."""
+    """A FIFO ordered queue for handling episode downloads.
+
+    Background downloads (i.e. prefetched episodes) are kept after all other
+    downloads, so that they never delay a download the user requested.
+    """
 
     def __init__(self, display=None) -> None:
         self._episodes = []
+        self._background = []
         self._display = display
 
+    def __contains__(self, episode) -> bool:
+        return episode in self._episodes
+
     def next(self) -> None:
         """Proceed to the next episode in the queue."""
         if len(self._episodes) > 0:
-            self._episodes.pop(0)
+            episode = self._episodes.pop(0)
+            if episode in self._background:
+                self._background.remove(episode)
             self.start()
 
-    def add(self, episode) -> None:
-        """Adds an episode to the end of the queue."""
+    def add(self, episode, background=False) -> None:
+        """Adds an episode to the queue.
+
+        :param episode the Episode to download
+        :param background (optional) whether this is a background download,
+          which is added to the very end of the queue; other downloads are
+          added before any background downloads which have not started
+        """
         assert isinstance(episode, Episode)
 
-        if episode not in self._episodes:
+        if episode in self._episodes:
+            return
+
+        if background:
+            self._background.append(episode)
             self._episodes.append(episode)
+        else:
+            index = len(self._episodes)
+            for i, queued in enumerate(self._episodes[1:], 1):
+                if queued in self._background:
+                    index = i
+                    break
+            self._episodes.insert(index, episode)
 
     def start(self) -> None:
         """Start downloading the first episode in the queue."""
@@ -33,7 +60,7 @@ class DownloadQueue:
         # if nothing is downloading, start downloading the first episode
         found_downloading = False
         for thread in threading.enumerate():
-            if thread.getName().startswith("download"):
+            if thread.name.startswith("download"):
                 found_downloading = True
         if not found_downloading and len(self._episodes) > 0:
             self.start()
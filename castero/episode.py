@@ -8,10 +8,33 @@ from castero.datafile import DataFile
 
 
 class Episode:
-    """A single episode from a podcast feed."""
+    """A single episode from a podcast feed.
+
+    Menus may hold many episodes at once, so instances use slots rather than
+    a per-instance dict. They can be weakly referenced (see
+    Database._create_episode).
+    """
 
     PROGRESS_INDICATOR = "*"
 
+    __slots__ = (
+        "_feed",
+        "_ep_id",
+        "_title",
+        "_description",
+        "_plain_description",
+        "_link",
+        "_pubdate",
+        "_copyright",
+        "_enclosure",
+        "_played",
+        "_progress",
+        "_duration",
+        "_downloaded",
+        "_details",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         feed,
@@ -24,6 +47,9 @@ class Episode:
         enclosure=None,
         played=False,
         progress=None,
+        duration=None,
+        details=None,
+        plain_description=None,
     ) -> None:
         """
         At least one of a title or description must be specified.
@@ -36,6 +62,13 @@ class Episode:
         :param copyright (optional) the copyright notice of the episode
         :param enclosure (optional) a url to a media file
         :param played (optional) whether the episode has been played
+        :param progress (optional) the playback progress, in milliseconds
+        :param duration (optional) the length of the media, in milliseconds
+        :param details (optional) a function which retrieves the description,
+          plain description and copyright of the episode by its ep_id, if they
+          were not given; it is called the first time any is used
+        :param plain_description (optional) the description with html
+          removed; it is converted from the description if not given
         """
         assert title is not None or description is not None
 
@@ -43,13 +76,16 @@ class Episode:
         self._ep_id = ep_id
         self._title = title
         self._description = description
+        self._plain_description = plain_description
         self._link = link
         self._pubdate = pubdate
         self._copyright = copyright
         self._enclosure = enclosure
         self._played = played
         self._progress = progress
+        self._duration = duration
         self._downloaded = None
+        self._details = details
 
     def __str__(self) -> str:
         """Represent this object as a single-line string.
@@ -73,7 +109,18 @@ class Episode:
 
         :returns str: a path to the feed directory
         """
-        feed_dirname = helpers.sanitize_path(str(self._feed))
+        return Episode.feed_directory(self._feed)
+
+    @staticmethod
+    def feed_directory(feed) -> str:
+        """Gets the path to the directory of a feed's downloaded episodes.
+
+        This method does not ensure whether the directory exists.
+
+        :param feed the Feed whose directory to get
+        :returns str: a path to the feed directory
+        """
+        feed_dirname = helpers.sanitize_path(str(feed))
         if Config is None or Config["custom_download_dir"] == "":
             path = DataFile.DEFAULT_DOWNLOADED_DIR
         else:
@@ -82,6 +129,49 @@ class Episode:
                 path = "/%s" % path
         return os.path.join(path, feed_dirname)
 
+    @staticmethod
+    def downloaded_files(feed) -> dict:
+        """Finds the downloaded episodes of a feed.
+
+        The feed's directory is only listed once, however many episodes it
+        has.
+
+        :param feed the Feed whose downloaded episodes to find
+        :returns dict: the paths to the downloaded files, by episode id
+        """
+        result = {}
+        feed_directory = Episode.feed_directory(feed)
+        if os.path.exists(feed_directory):
+            for File in os.listdir(feed_directory):
+                ep_id = File.split("-")[0]
+                if ep_id.isdigit():
+                    result[int(ep_id)] = os.path.join(feed_directory, File)
+        return result
+
+    @staticmethod
+    def delete_downloads(feed, ep_ids=None) -> int:
+        """Deletes the downloaded episodes of a feed.
+
+        :param feed the Feed whose downloaded episodes to delete
+        :param ep_ids (optional) the ids of the episodes to delete, if not all
+          of them
+        :returns int: the number of files deleted
+        """
+        deleted = 0
+        for (ep_id, path) in Episode.downloaded_files(feed).items():
+            if ep_ids is None or ep_id in ep_ids:
+                os.remove(path)
+                deleted += 1
+
+        # if there are no more files in the feed directory, delete it
+        feed_directory = Episode.feed_directory(feed)
+        if (
+            os.path.exists(feed_directory)
+            and len(os.listdir(feed_directory)) == 0
+        ):
+            os.rmdir(feed_directory)
+        return deleted
+
     def get_playable(self) -> str:
         """Gets a playable path for this episode.
 
@@ -101,6 +191,21 @@ class Episode:
 
         return playable
 
+    def get_download_path(self) -> str:
+        """Gets the path which this episode is downloaded to.
+
+        This method does not ensure whether the file exists. It requires the
+        episode to have an enclosure.
+
+        :returns str: a path to the episode's downloaded file
+        """
+        filename = "%s-%s%s" % (
+            self.ep_id,
+            helpers.sanitize_path(str(self)),
+            str(os.path.splitext(self._enclosure)[1].split("?")[0]),
+        )
+        return os.path.join(self._feed_directory(), filename)
+
     def download(self, download_queue, display=None):
         """Downloads this episode to the file system.
 
@@ -116,13 +221,7 @@ class Episode:
                 display.change_status("Download failed: episode does not have" " a valid media source")
             return
 
-        feed_directory = self._feed_directory()
-        filename = "%s-%s%s" % (
-            self.ep_id,
-            helpers.sanitize_path(str(self)),
-            str(os.path.splitext(self._enclosure)[1].split("?")[0]),
-        )
-        output_path = os.path.join(feed_directory, filename)
+        output_path = self.get_download_path()
         DataFile.ensure_path(output_path)
 
         if display is not None:
@@ -170,6 +269,17 @@ class Episode:
                     self._downloaded = True
         return self._downloaded
 
+    def _load_details(self) -> None:
+        """Retrieve the description, plain description and copyright, if they
+        weren't given."""
+        if self._details is not None:
+            (
+                self._description,
+                self._plain_description,
+                self._copyright,
+            ) = self._details(self._ep_id)
+            self._details = None
+
     def replace_from(self, episode) -> None:
         """Replace metadata from the given episode.
 
@@ -178,6 +288,49 @@ class Episode:
         self._ep_id = episode._ep_id
         self._played = episode._played
         self._progress = episode._progress
+        self._duration = episode._duration
+
+    def refresh(
+        self,
+        feed,
+        title,
+        description,
+        link,
+        pubdate,
+        enclosure,
+        played,
+        duration,
+        details,
+    ) -> None:
+        """Replace the stored fields of the episode, other than its progress,
+        after they were written to the database.
+
+        The progress is kept since these writes don't change it, and this
+        instance's may not have been stored yet.
+
+        :param feed the feed that this episode is a part of
+        :param title the title of the episode
+        :param description the description of the episode, or None if it is
+          retrieved by details
+        :param link a link to the episode
+        :param pubdate the date the episode was published, as a string
+        :param enclosure a url to a media file
+        :param played whether the episode has been played
+        :param duration the length of the media, in milliseconds
+        :param details a function which retrieves the description, plain
+          description and copyright of the episode, as in __init__
+        """
+        self._feed = feed
+        self._title = title
+        self._description = description
+        self._plain_description = None
+        self._link = link
+        self._pubdate = pubdate
+        self._copyright = None
+        self._enclosure = enclosure
+        self._played = played
+        self._duration = duration
+        self._details = details
 
     @property
     def downloaded(self) -> bool:
@@ -221,11 +374,25 @@ class Episode:
     @property
     def description(self) -> str:
         """str: the description of the episode"""
+        self._load_details()
         result = self._description
         if result is None:
             result = "Description not available."
         return result
 
+    @property
+    def plain_description(self) -> str:
+        """str: the description of the episode with html removed
+
+        The description is converted when the episode is parsed, and stored
+        with it, so this is only converted here for episodes created
+        otherwise.
+        """
+        self._load_details()
+        if self._plain_description is None:
+            self._plain_description = helpers.html_to_plain(self.description)
+        return self._plain_description
+
     @property
     def link(self) -> str:
         """str: the link of/for the episode"""
@@ -245,6 +412,7 @@ class Episode:
     @property
     def copyright(self) -> str:
         """str: the copyright of the episode"""
+        self._load_details()
         result = self._copyright
         if result is None:
             result = "No copyright specified."
@@ -279,16 +447,31 @@ class Episode:
     def progress(self, progress) -> None:
         self._progress = progress
 
+    @property
+    def duration(self) -> int:
+        """int: the length of the media in milliseconds, or None if unknown"""
+        return self._duration
+
+    @duration.setter
+    def duration(self, duration) -> None:
+        self._duration = duration
+
     @property
     def metadata(self) -> str:
         """str: the user-displayed metadata of the episode"""
         description = (
-            helpers.html_to_plain(self.description)
+            self.plain_description
             if helpers.is_true(Config["clean_html_descriptions"])
             else self.description
         )
         description = description.replace("\n", "")
-        progress = helpers.seconds_to_time(self.progress / constants.MILLISECONDS_IN_SECOND)
+        progress = helpers.seconds_to_time(
+            self.progress / constants.MILLISECONDS_IN_SECOND
+        )
+        if self.duration is not None:
+            progress += "/" + helpers.seconds_to_time(
+                self.duration / constants.MILLISECONDS_IN_SECOND
+            )
         downloaded = (
             "Episode downloaded and available for offline playback."
             if self.downloaded
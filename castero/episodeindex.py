@@ -0,0 +1,281 @@
+import array
+import bisect
+
+from castero.episode import Episode
+
+
+class EpisodeIndex:
+    """The columns of all episodes in the database which are needed to order
+    and filter them, kept in memory.
+
+    Each column is an array with one entry per episode, so ordering or
+    filtering the whole library does not create an object for each episode.
+    Episodes are only retrieved for the entries which are used (see
+    EpisodeSelection).
+
+    Entries are ordered with the newest episodes first, and episodes published
+    at the same time by id (see Database.episodes_page). The index is kept up
+    to date as episodes are written, by inserting and removing entries rather
+    than indexing every episode again.
+    """
+
+    def __init__(self, database, rows) -> None:
+        """
+        :param database the Database to retrieve episodes from
+        :param rows the id, feed key, published time, played, progress and
+          title (in lowercase) of each episode, in order
+        """
+        self._database = database
+        self._ids = array.array("q")
+        self._feeds = array.array("l")  # indexes of _feed_keys
+        self._published = array.array("q")
+        self._played = array.array("b")
+        self._progress = array.array("q")
+        self._titles = []
+        self._feed_keys = []
+        self._feed_indexes = {}
+        # changed whenever entries move, i.e. are inserted or removed
+        self._generation = 0
+
+        for (ep_id, feed_key, published, played, progress, title) in rows:
+            self._ids.append(ep_id)
+            self._feeds.append(self._feed_index(feed_key))
+            self._published.append(published or 0)
+            self._played.append(bool(played))
+            self._progress.append(progress or 0)
+            self._titles.append(title or "")
+
+        # the ids in order, with the published time of each, to find the
+        # entry of an id without a dict entry for each episode (see _find)
+        by_id = sorted(range(len(self._ids)), key=self._ids.__getitem__)
+        self._sorted_ids = array.array("q", (self._ids[e] for e in by_id))
+        self._sorted_published = array.array(
+            "q", (self._published[e] for e in by_id)
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _feed_index(self, feed_key) -> int:
+        """Find the index of a feed's key in _feed_keys, adding it if needed.
+
+        :param feed_key the key of the feed
+        :returns int: the index
+        """
+        if feed_key not in self._feed_indexes:
+            self._feed_indexes[feed_key] = len(self._feed_keys)
+            self._feed_keys.append(feed_key)
+        return self._feed_indexes[feed_key]
+
+    def _position(self, published, ep_id) -> int:
+        """Find where an episode is, or would be, in the order of entries.
+
+        :param published the published time of the episode
+        :param ep_id the database id of the episode
+        :returns int: the entry
+        """
+        low, high = 0, len(self._ids)
+        while low < high:
+            middle = (low + high) // 2
+            key = (-self._published[middle], self._ids[middle])
+            if key < (-published, ep_id):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, ep_id) -> int:
+        """Find the entry of an episode.
+
+        :param ep_id the database id of the episode
+        :returns int: the entry, or None if the episode is not indexed
+        """
+        position = bisect.bisect_left(self._sorted_ids, ep_id)
+        if (
+            position == len(self._sorted_ids)
+            or self._sorted_ids[position] != ep_id
+        ):
+            return None
+        return self._position(self._sorted_published[position], ep_id)
+
+    def _entries(self, feed_key=None, ep_ids=None) -> list:
+        """Find the entries of the episodes of a feed, or of a set of
+        episodes.
+
+        :param feed_key (optional) the key of the feed whose entries to find
+        :param ep_ids (optional) the database ids of the episodes whose
+          entries to find; ids which are not indexed are ignored
+        :returns list: the entries
+        """
+        if feed_key is not None:
+            if feed_key not in self._feed_indexes:
+                return []
+            feed_index = self._feed_indexes[feed_key]
+            return [
+                entry
+                for entry in range(len(self._feeds))
+                if self._feeds[entry] == feed_index
+            ]
+
+        entries = (self._find(ep_id) for ep_id in ep_ids)
+        return [entry for entry in entries if entry is not None]
+
+    def insert(self, rows) -> None:
+        """Add episodes to the index, in their place in the order.
+
+        Episodes which are already indexed are replaced.
+
+        :param rows the id, feed key, published time, played, progress and
+          title (in lowercase) of each episode, as in __init__
+        """
+        rows = list(rows)
+        self.remove(ep_ids=[row[0] for row in rows])
+        self._generation += 1
+        for (ep_id, feed_key, published, played, progress, title) in rows:
+            published = published or 0
+            entry = self._position(published, ep_id)
+            self._ids.insert(entry, ep_id)
+            self._feeds.insert(entry, self._feed_index(feed_key))
+            self._published.insert(entry, published)
+            self._played.insert(entry, bool(played))
+            self._progress.insert(entry, progress or 0)
+            self._titles.insert(entry, title or "")
+
+            position = bisect.bisect_left(self._sorted_ids, ep_id)
+            self._sorted_ids.insert(position, ep_id)
+            self._sorted_published.insert(position, published)
+
+    def remove(self, feed_key=None, ep_ids=None) -> None:
+        """Remove the episodes of a feed, or a set of episodes, from the
+        index.
+
+        Exactly one of either feed_key or ep_ids must be given.
+
+        :param feed_key (optional) the key of the feed whose episodes to
+          remove
+        :param ep_ids (optional) the database ids of the episodes to remove
+        """
+        self._generation += 1
+        # later entries first, so that earlier ones don't move
+        for entry in sorted(self._entries(feed_key, ep_ids), reverse=True):
+            ep_id = self._ids[entry]
+            for column in (
+                self._ids,
+                self._feeds,
+                self._published,
+                self._played,
+                self._progress,
+                self._titles,
+            ):
+                del column[entry]
+
+            position = bisect.bisect_left(self._sorted_ids, ep_id)
+            del self._sorted_ids[position]
+            del self._sorted_published[position]
+
+    def set_played(self, played, feed_key=None, ep_ids=None) -> None:
+        """Set whether the episodes of a feed, or a set of episodes, have been
+        played.
+
+        Exactly one of either feed_key or ep_ids must be given.
+
+        :param played whether the episodes have been played, or None to
+          invert whether each has been played
+        :param feed_key (optional) the key of the feed whose episodes to
+          update
+        :param ep_ids (optional) the database ids of the episodes to update
+        """
+        for entry in self._entries(feed_key, ep_ids):
+            if played is None:
+                self._played[entry] = not self._played[entry]
+            else:
+                self._played[entry] = bool(played)
+
+    def set_progress(self, progress, feed_key=None, ep_ids=None) -> None:
+        """Set the progress of the episodes of a feed, or a set of episodes.
+
+        Exactly one of either feed_key or ep_ids must be given.
+
+        :param progress the playback progress, in milliseconds
+        :param feed_key (optional) the key of the feed whose episodes to
+          update
+        :param ep_ids (optional) the database ids of the episodes to update
+        """
+        for entry in self._entries(feed_key, ep_ids):
+            self._progress[entry] = progress or 0
+
+    def select(self, descending=True, filter_text="") -> "EpisodeSelection":
+        """Select and order entries.
+
+        :param descending (optional) whether to order the newest episodes
+          first; episodes published at the same time are ordered by id
+        :param filter_text (optional) text which episode titles must contain,
+          in lowercase
+        :returns EpisodeSelection: the selected entries
+        """
+        entries = range(len(self._ids))
+        if not descending:
+            # the sort is stable, so episodes published at the same time stay
+            # ordered by id
+            entries = sorted(entries, key=self._published.__getitem__)
+        if filter_text != "":
+            entries = [
+                entry
+                for entry in entries
+                if filter_text in self._titles[entry]
+            ]
+        return EpisodeSelection(self, array.array("l", entries))
+
+
+class EpisodeSelection:
+    """An ordered selection of the episodes of an EpisodeIndex, which is used
+    as a sequence of Episodes.
+
+    Episodes are retrieved from the database when they are accessed. The
+    selection keeps the ids of its episodes, so that it still refers to the
+    same episodes once entries are inserted into or removed from the index.
+    """
+
+    def __init__(self, index, entries) -> None:
+        """
+        :param index the EpisodeIndex the entries are from
+        :param entries an array of the selected entries, in order
+        """
+        self._index = index
+        self._entries = entries
+        self._generation = index._generation
+        self._ep_ids = array.array("q", (index._ids[e] for e in entries))
+
+    def __len__(self) -> int:
+        return len(self._ep_ids)
+
+    def __getitem__(self, position) -> Episode:
+        episode = self._index._database.episode(self._ep_ids[position])
+        if episode is None:
+            # the episode was removed since it was selected
+            raise IndexError("episode index out of range")
+        return episode
+
+    def episodes(self, start, end) -> list:
+        """Retrieve the episodes of a range of the selection.
+
+        Episodes which were removed since they were selected are omitted.
+
+        :param start the position of the first episode
+        :param end the position after the last episode
+        :returns list: the Episodes, in order
+        """
+        ep_ids = list(self._ep_ids[start:end])
+        return self._index._database.episodes_by_ids(ep_ids)
+
+    @property
+    def unplayed(self) -> int:
+        """int: the number of selected episodes which have not been played"""
+        index = self._index
+        if self._generation != index._generation:
+            # entries moved since they were selected, so find them again
+            entries = index._entries(ep_ids=self._ep_ids)
+            self._entries = array.array("l", entries)
+            self._generation = index._generation
+        played = sum(map(index._played.__getitem__, self._entries))
+        return len(self._entries) - played
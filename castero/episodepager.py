@@ -0,0 +1,104 @@
+import collections
+
+from castero.episode import Episode
+
+
+class EpisodePager:
+    """A lazily loaded, ordered sequence of all episodes in the database.
+
+    The number of episodes is counted when the pager is created, but episodes
+    are only retrieved a page at a time, as they are accessed. Only a few
+    pages are kept at once; the rest are retrieved again if they are needed.
+
+    Pages are retrieved with keyset pagination (see Database.episodes_page).
+    We remember the ordering key before each page we have seen, so that
+    returning to a page is a single query.
+    """
+
+    PAGE_SIZE = 100
+    MAX_CACHED_PAGES = 3
+
+    def __init__(self, database, descending=True, filter_text="") -> None:
+        """
+        :param database the Database to retrieve episodes from
+        :param descending (optional) whether to order the newest episodes
+          first
+        :param filter_text (optional) text which episode titles must contain,
+          in lowercase
+        """
+        self._database = database
+        self._descending = descending
+        self._filter_text = filter_text
+        self._length, self._unplayed = database.episodes_count(filter_text)
+        self._anchors = [None]  # the ordering key before each known page
+        self._pages = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index) -> Episode:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("episode index out of range")
+
+        page = self._page(index // self.PAGE_SIZE)
+        offset = index % self.PAGE_SIZE
+        if offset >= len(page):
+            # episodes were removed since we counted them
+            raise IndexError("episode index out of range")
+        return page[offset][1]
+
+    def _page(self, number) -> list:
+        """Retrieve a page, from the cache if possible.
+
+        :param number the index of the page
+        :returns list: the page's (ordering key, Episode) pairs
+        """
+        if number in self._pages:
+            self._pages.move_to_end(number)
+            return self._pages[number]
+
+        # we can only find a page from the key before it, so walk forward
+        # from the last page we know of
+        page = []
+        for known in range(min(number, len(self._anchors) - 1), number + 1):
+            if known >= len(self._anchors):
+                # episodes were removed since we counted them
+                page = []
+                break
+            page = self._database.episodes_page(
+                self._anchors[known],
+                self.PAGE_SIZE,
+                self._descending,
+                self._filter_text,
+            )
+            if known + 1 == len(self._anchors) and len(page) > 0:
+                self._anchors.append(page[-1][0])
+
+        self._pages[number] = page
+        if len(self._pages) > self.MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def episodes(self, start, end) -> list:
+        """Retrieve the episodes of a range of the sequence.
+
+        Episodes which were removed since we counted them are omitted.
+
+        :param start the position of the first episode
+        :param end the position after the last episode
+        :returns list: the Episodes, in order
+        """
+        episodes = []
+        for index in range(start, min(end, self._length)):
+            try:
+                episodes.append(self[index])
+            except IndexError:
+                break
+        return episodes
+
+    @property
+    def unplayed(self) -> int:
+        """int: the number of episodes which have not been played"""
+        return self._unplayed
@@ -43,6 +43,19 @@ class Feed:
     The url for the feed should point to an RSS document.
     """
 
+    __slots__ = (
+        "_url",
+        "_file",
+        "_tree",
+        "_validated",
+        "_title",
+        "_description",
+        "_plain_description",
+        "_link",
+        "_last_build_date",
+        "_copyright",
+    )
+
     def __init__(self, url=None, file=None, text=None, **kwargs) -> None:
         """
         A feed can be provided as either a url or a file, but exactly one must
@@ -70,6 +83,7 @@ class Feed:
 
         self._title = kwargs.get("title", None)
         self._description = kwargs.get("description", None)
+        self._plain_description = kwargs.get("plain_description", None)
         self._link = kwargs.get("link", None)
         self._last_build_date = kwargs.get("last_build_date", None)
         self._copyright = kwargs.get("copyright", None)
@@ -281,6 +295,7 @@ class Feed:
 
         self._title = channel.find("title").text.strip()
         self._description = channel.find("description").text.strip()
+        self._plain_description = helpers.html_to_plain(self._description)
 
         link_tags = channel.findall("link")
         if len(link_tags) > 0:
@@ -351,6 +366,11 @@ class Feed:
                     self,
                     title=item_title_str,
                     description=item_description_str,
+                    plain_description=(
+                        None
+                        if item_description_str is None
+                        else helpers.html_to_plain(item_description_str)
+                    ),
                     link=item_link_str,
                     pubdate=item_pubdate_str,
                     copyright=item_copyright_str,
@@ -382,6 +402,17 @@ class Feed:
             result = "Description not available."
         return result
 
+    @property
+    def plain_description(self) -> str:
+        """str: the description of the feed with html removed
+
+        The description is converted when the feed is parsed, and stored with
+        it, so this is only converted here for feeds created otherwise.
+        """
+        if self._plain_description is None:
+            self._plain_description = helpers.html_to_plain(self.description)
+        return self._plain_description
+
     @property
     def link(self) -> str:
         """str: the link of/for the feed"""
@@ -407,7 +438,7 @@ class Feed:
     def metadata(self) -> str:
         """str: the user-displayed metadata of the feed"""
         description = (
-            helpers.html_to_plain(self.description)
+            self.plain_description
             if helpers.is_true(Config["clean_html_descriptions"])
             else self.description
         )
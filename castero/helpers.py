@@ -1,9 +1,9 @@
-from bs4 import BeautifulSoup
 import re
 from email.utils import parsedate_to_datetime
 from datetime import datetime
 import time
 import pytz
+from lxml import etree, html as lxml_html
 
 
 def third(n) -> int:
@@ -65,11 +65,20 @@ def is_true(string) -> bool:
 def html_to_plain(html) -> str:
     """Converts a potentially HTML-formatted string to user-friendly plaintext.
 
+    Descriptions are converted once, when feeds are parsed, and the result is
+    stored with them (see Episode.plain_description).
+
     :param html the text to convert with potential html tags
     :returns str: the given text with html tags removed
     """
-    soup = BeautifulSoup(html, "html.parser")
-    return soup.get_text()
+    if "<" not in html and "&" not in html:
+        return html
+
+    try:
+        fragment = lxml_html.fragment_fromstring(html, create_parent="div")
+        return str(fragment.text_content())
+    except etree.ParserError:
+        return html
 
 
 def datetime_from_rfc822(date) -> datetime:
@@ -87,6 +96,20 @@ def datetime_from_rfc822(date) -> datetime:
         return -1
 
 
+def timestamp_from_rfc822(date) -> int:
+    """Convert a date string in RFC822 format into a sortable timestamp.
+
+    Timestamps order the same way as the datetimes from datetime_from_rfc822.
+
+    :param date string for the date/time in RFC822 format
+    :returns int: the number of seconds since the epoch, or -1
+    """
+    result = datetime_from_rfc822(date)
+    if result == -1:
+        return -1
+    return int(result.timestamp())
+
+
 def seconds_to_time(seconds: int) -> str:
     seconds = max(0, seconds)
     return time.strftime("%H:%M:%S", time.gmtime(seconds))
@@ -1,6 +1,8 @@
 import curses
 from abc import ABC, abstractmethod, abstractproperty
 
+from castero.episode import Episode
+
 
 class Menu(ABC):
     """A navigable menu in the display.
@@ -11,8 +13,13 @@ class Menu(ABC):
     This class does not handle user input -- that is done in the Display class.
     Methods in that class simply call appropriate methods here in response to
     user input in order to change the state of the menu.
+
+    Only the visible items are created when the menu is displayed, and each
+    is cached until the object it represents changes (see _visible_items).
     """
 
+    MAX_CACHED_ITEMS = 1000
+
     @abstractmethod
     def __init__(self, window, source, child=None, active=False) -> None:
         """
@@ -34,18 +41,41 @@ class Menu(ABC):
         self._top_index = 0
         self._inverted = False
         self._filter_text = ""
+        self._cached_items = {}  # index -> (object, item)
+        self._filter_memo = (None, [], None, [])  # see _filter
 
     @abstractmethod
     def __len__(self) -> int:
         """int: the number of items in the menu"""
 
-    @abstractproperty
+    @abstractmethod
+    def _item_objects(self, start, end) -> list:
+        """Retrieve the objects represented by a range of the menu's items.
+
+        :param start the index of the first item
+        :param end the index after the last item
+        :returns list: the objects of the items in [start, end)
+        """
+
+    @abstractmethod
+    def _create_item(self, obj) -> dict:
+        """Create the item which represents an object.
+
+        The dictionary contains the fields 'attr', 'tags', and 'text'.
+
+        :param obj an object returned by _item_objects
+        :returns dict: the item
+        """
+
     @property
     def _items(self):
-        """A list of items in the menu represented as dictionaries.
+        """A list of all items in the menu represented as dictionaries.
 
-        The dictionary contains the fields 'attr', 'tags', and 'text'.
+        This creates every item; display() only creates the visible ones.
         """
+        return [
+            self._create_item(obj) for obj in self._item_objects(0, len(self))
+        ]
 
     @abstractproperty
     @property
@@ -69,6 +99,32 @@ class Menu(ABC):
         :param obj an object of some type understood by the specific
           implementation of this menu
         """
+        self._cached_items = {}
+
+    def refresh_items(self, changes) -> None:
+        """Called when rows in the database changed without rows being added
+        or removed, to create the items of the objects whose rows changed
+        again rather than updating all of our items.
+
+        :param changes the Changes to the database (see
+          Database.changes_since), whose feed_keys and ep_ids are not None
+        """
+        self._cached_items = {
+            index: cached
+            for (index, cached) in self._cached_items.items()
+            if not self._changed(cached[0], changes)
+        }
+        self.display()
+
+    def _changed(self, obj, changes) -> bool:
+        """Whether the row of one of our objects changed.
+
+        :param obj an object of the menu, which is an Episode unless this
+          method is overridden
+        :param changes the Changes to the database
+        :returns bool: whether the object's row changed
+        """
+        return isinstance(obj, Episode) and obj.ep_id in changes.ep_ids
 
     @abstractmethod
     def update_child(self) -> None:
@@ -86,6 +142,7 @@ class Menu(ABC):
         must also be reversed.
         """
         self._inverted = not self._inverted
+        self._cached_items = {}
 
     def _pad_text(self, text) -> str:
         """Pads an item string with spaces to be the full length of the menu.
@@ -159,6 +216,55 @@ class Menu(ABC):
         if self._top_index < 0:
             self._top_index = 0
 
+    def _filter(self, objects) -> list:
+        """Filter a list of objects by the menu's filter text.
+
+        The lowercase text of each object is only created once for a list, and
+        the result is reused until either the list or the filter text changes.
+        Therefore lists given to this method should be replaced rather than
+        modified.
+
+        :param objects the objects to filter
+        :returns list: the objects whose text contains the filter text
+        """
+        source, keys, filter_text, result = self._filter_memo
+        if source is objects and filter_text == self._filter_text:
+            return result
+
+        if source is not objects:
+            keys = [str(obj).lower() for obj in objects]
+        filter_text = self._filter_text
+        result = [obj for obj, key in zip(objects, keys) if filter_text in key]
+        self._filter_memo = (objects, keys, filter_text, result)
+        return result
+
+    def _visible_items(self) -> list:
+        """Retrieve the visible items, creating those which aren't cached.
+
+        A cached item is only used if the menu still has the same object at its
+        index. Changes to the objects themselves are not detected, so the cache
+        is cleared whenever the menu's items are updated.
+
+        :returns list: the items from _top_index which fit on the screen
+        """
+        start = self._top_index
+        end = min(start + self.max_displayed_items, len(self))
+
+        cached_items = self._cached_items
+        items = []
+        for index, obj in enumerate(self._item_objects(start, end), start):
+            cached = cached_items.get(index)
+            if cached is None or cached[0] is not obj:
+                cached = (obj, self._create_item(obj))
+                cached_items[index] = cached
+            items.append(cached[1])
+
+        if len(cached_items) > self.MAX_CACHED_ITEMS:
+            self._cached_items = {
+                index: cached_items[index] for index in range(start, end)
+            }
+        return items
+
     def display(self) -> None:
         """Draw all visible items on this menu to the window.
 
@@ -166,14 +272,10 @@ class Menu(ABC):
         _top_index but less than max_displayed_items greater than _top_index.
         That is, all items that can fit on the screen starting from _top_index.
         """
-        items = self._items
-
         position = 0
-        for i in range(self._top_index, self._top_index + self.max_displayed_items):
-            if i <= len(self) - 1:
-                selected = i == self._selected
-                self._draw_item(items[i], position, selected)
-                position += 1
+        for index, item in enumerate(self._visible_items(), self._top_index):
+            self._draw_item(item, position, index == self._selected)
+            position += 1
 
         # fill unused rows with blank lines
         # avoids an issue with entries not being properly removed when the
@@ -203,6 +305,9 @@ class Menu(ABC):
         """
         assert direction == 1 or direction == -1
 
+        # the selected item is the one most likely to have been changed by the
+        # user (i.e. marked as played), so create it again when it's next shown
+        self._cached_items.pop(self._selected, None)
         self._selected -= direction
 
         if self._selected < self._top_index:
@@ -279,3 +384,4 @@ class Menu(ABC):
     @filter_text.setter
     def filter_text(self, filter_text) -> None:
         self._filter_text = filter_text
+        self._cached_items = {}
@@ -1,14 +1,18 @@
 import curses
-import threading
 
 from castero.episode import Episode
-from castero.feed import Feed
+from castero.episodepager import EpisodePager
 from castero.menu import Menu
-from castero import helpers
 
 
 class ChronoMenu(Menu):
-    """The menu for all episodes in chronological order."""
+    """The menu for all episodes in chronological order.
+
+    Episodes are ordered and filtered with the source's (the database's)
+    index, and only retrieved as they are displayed (see EpisodeIndex). While
+    the index is being created, episodes are paged from the source instead
+    (see EpisodePager).
+    """
 
     def __init__(self, window, source, child=None, active=False) -> None:
         super().__init__(window, source, child=child, active=active)
@@ -16,75 +20,74 @@ class ChronoMenu(Menu):
         self._episodes = []
 
     def __len__(self) -> int:
-        return len(self._filtered_episodes)
+        return len(self._episodes)
 
-    @property
-    def _items(self):
-        """A list of items in the menu represented as dictionaries."""
-        result = []
-        for episode in self._filtered_episodes:
-            tags = []
-            if episode.downloaded:
-                tags.append("D")
-            if episode.progress > 0:
-                tags.append(Episode.PROGRESS_INDICATOR)
-
-            result.append(
-                {
-                    "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
-                    "tags": tags,
-                    "text": "[%s] %s" % (episode.feed_str, str(episode)),
-                }
-            )
-        return result
+    def _item_objects(self, start, end) -> list:
+        """The episodes of a range of items in the menu."""
+        if len(self._episodes) == 0:
+            return []
+
+        return self._episodes.episodes(start, end)
+
+    def _create_item(self, episode) -> dict:
+        """The item which represents an episode."""
+        tags = []
+        if episode.downloaded:
+            tags.append("D")
+        if episode.progress > 0:
+            tags.append(Episode.PROGRESS_INDICATOR)
+
+        return {
+            "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
+            "tags": tags,
+            "text": "[%s] %s" % (episode.feed_str, str(episode)),
+        }
 
     @property
     def title(self) -> str:
         """The title of the menu to display in the window header."""
         base = "Episodes"
-        if len(self._filtered_episodes) > 0:
-            unplayed_episodes = 0
-            for episode in self._filtered_episodes:
-                if not episode.played:
-                    unplayed_episodes += 1
-
-            return "%s (%d/%d)" % (base, unplayed_episodes, len(self._filtered_episodes))
+        if len(self._episodes) > 0:
+            return "%s (%d/%d)" % (
+                base,
+                self._episodes.unplayed,
+                len(self._episodes),
+            )
         return base
 
     @property
     def item(self) -> Episode:
         """The selected episode."""
-        if len(self._filtered_episodes) == 0:
+        if len(self._episodes) == 0:
             return None
 
-        return self._filtered_episodes[self._selected]
+        return self._episodes[self._selected]
 
     @property
     def metadata(self) -> str:
         """Metadata for the selected episode."""
-        if len(self._filtered_episodes) == 0:
+        if len(self._episodes) == 0:
             return ""
 
-        return self._filtered_episodes[self._selected].metadata
+        return self._episodes[self._selected].metadata
 
     def update_items(self, obj):
         """Called by the parent menu(the feeds menu) to update our items."""
         super().update_items(obj)
 
-        t = threading.Thread(target=self._request_source_episodes, name="episodes_all")
-        t.start()
-
-        self._sanitize()
-
-    def _request_source_episodes(self):
-        episodes = self._source.episodes()
-
-        self._episodes = sorted(
-            episodes, reverse=not self._inverted, key=lambda ep: helpers.datetime_from_rfc822(ep.pubdate)
-        )
+        descending = not self._inverted
+        filter_text = self._filter_text.lower()
+        index = self._source.episode_index()
+        if index is None:
+            self._episodes = EpisodePager(
+                self._source, descending=descending, filter_text=filter_text
+            )
+        else:
+            self._episodes = index.select(
+                descending=descending, filter_text=filter_text
+            )
 
         self._sanitize()
-        self.display()
 
     def update_child(self):
         """Not necessary for this menu - - does nothing."""
@@ -95,8 +98,3 @@ class ChronoMenu(Menu):
         super().invert()
 
         self.update_items(None)
-
-    @property
-    def _filtered_episodes(self):
-        """A list of episodes which match the menu filter."""
-        return list(filter(lambda ep: self._filter_text in str(ep).lower(), self._episodes))
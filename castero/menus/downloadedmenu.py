@@ -19,19 +19,17 @@ class DownloadedMenu(Menu):
     def __len__(self) -> int:
         return len(self._filtered_episodes)
 
-    @property
-    def _items(self):
-        """A list of items in the menu represented as dictionaries."""
-        result = []
-        for episode in self._filtered_episodes:
-            result.append(
-                {
-                    "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
-                    "tags": [],
-                    "text": "[%s] %s" % (episode.feed_str, str(episode)),
-                }
-            )
-        return result
+    def _item_objects(self, start, end) -> list:
+        """The episodes of a range of items in the menu."""
+        return self._filtered_episodes[start:end]
+
+    def _create_item(self, episode) -> dict:
+        """The item which represents an episode."""
+        return {
+            "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
+            "tags": [],
+            "text": "[%s] %s" % (episode.feed_str, str(episode)),
+        }
 
     @property
     def title(self) -> str:
@@ -79,17 +77,18 @@ class DownloadedMenu(Menu):
             if not path.startswith("/"):
                 path = "/%s" % path
 
-        self._episodes = []
+        episodes = []
         for (dirpath, dirnames, filenames) in os.walk(path):
             for filename in filenames:
                 ep_id = filename.split("-")[0]
                 if ep_id.isdigit():
                     episode = self._source.episode(int(ep_id))
                     if episode is not None:
-                        self._episodes.append(episode)
+                        episodes.append(episode)
 
         if self._inverted:
-            self._episodes.reverse()
+            episodes.reverse()
+        self._episodes = episodes
         self._sanitize()
         self.display()
 
@@ -106,4 +105,4 @@ class DownloadedMenu(Menu):
     @property
     def _filtered_episodes(self):
         """A list of episodes which match the menu filter."""
-        return list(filter(lambda ep: self._filter_text in str(ep).lower(), self._episodes))
+        return self._filter(self._episodes)
@@ -15,34 +15,42 @@ class EpisodeMenu(Menu):
 
         self._feed = None
         self._episodes = []
+        self._stats = None
 
     def __len__(self) -> int:
         return len(self._filtered_episodes)
 
-    @property
-    def _items(self):
-        """A list of items in the menu represented as dictionaries."""
-        result = []
-        for episode in self._filtered_episodes:
-            tags = []
-            if episode.downloaded:
-                tags.append("D")
-            if episode.progress > 0:
-                tags.append(Episode.PROGRESS_INDICATOR)
-
-            result.append(
-                {
-                    "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
-                    "tags": tags,
-                    "text": str(episode),
-                }
-            )
-        return result
+    def _item_objects(self, start, end) -> list:
+        """The episodes of a range of items in the menu."""
+        return self._filtered_episodes[start:end]
+
+    def _create_item(self, episode) -> dict:
+        """The item which represents an episode."""
+        tags = []
+        if episode.downloaded:
+            tags.append("D")
+        if episode.progress > 0:
+            tags.append(Episode.PROGRESS_INDICATOR)
+
+        return {
+            "attr": curses.color_pair(5) if episode.played else curses.A_NORMAL,
+            "tags": tags,
+            "text": str(episode),
+        }
 
     @property
     def title(self) -> str:
         """The title of the menu to display in the window header."""
         base = "Episodes"
+        if self._filter_text == "" and self._stats is not None:
+            if self._stats.episodes > 0:
+                return "%s (%d/%d)" % (
+                    base,
+                    self._stats.unplayed,
+                    self._stats.episodes,
+                )
+            return base
+
         if len(self._filtered_episodes) > 0:
             unplayed_episodes = 0
             for episode in self._filtered_episodes:
@@ -78,7 +86,9 @@ class EpisodeMenu(Menu):
 
         if feed is None:
             self._episodes = []
+            self._stats = None
         else:
+            self._stats = self._source.feed_stats(feed)
             t = threading.Thread(
                 target=self._request_source_episodes, args=[feed], name="episodes_%s" % feed
             )
@@ -86,6 +96,14 @@ class EpisodeMenu(Menu):
 
         self._sanitize()
 
+    def refresh_items(self, changes) -> None:
+        """Called when rows in the database changed in place; see
+        Menu.refresh_items.
+        """
+        if self._feed is not None and self._feed.key in changes.feed_keys:
+            self._stats = self._source.feed_stats(self._feed)
+        super().refresh_items(changes)
+
     def _request_source_episodes(self, feed):
         episodes = self._source.episodes(feed)
 
@@ -112,4 +130,4 @@ class EpisodeMenu(Menu):
     @property
     def _filtered_episodes(self):
         """A list of episodes which match the menu filter."""
-        return list(filter(lambda ep: self._filter_text in str(ep).lower(), self._episodes))
+        return self._filter(self._episodes)
@@ -12,16 +12,27 @@ class FeedMenu(Menu):
         assert child is not None and isinstance(child, EpisodeMenu)
 
         self._feeds = []
+        self._stats = {}
 
         super().__init__(window, source, child=child, active=active)
 
     def __len__(self) -> int:
         return len(self._filtered_feeds)
 
-    @property
-    def _items(self):
-        """A list of items in the menu represented as dictionaries."""
-        return [{"attr": curses.A_NORMAL, "tags": [], "text": str(feed)} for feed in self._feeds]
+    def _item_objects(self, start, end) -> list:
+        """The feeds of a range of items in the menu."""
+        return self._filtered_feeds[start:end]
+
+    def _create_item(self, feed) -> dict:
+        """The item which represents a feed, tagged with its number of
+        unplayed episodes.
+        """
+        tags = []
+        stats = self._stats.get(feed.key)
+        if stats is not None and stats.unplayed > 0:
+            tags.append(str(stats.unplayed))
+
+        return {"attr": curses.A_NORMAL, "tags": tags, "text": str(feed)}
 
     @property
     def title(self) -> str:
@@ -49,13 +60,27 @@ class FeedMenu(Menu):
         """Called by the parent menu (if we have one) to update our items."""
         super().update_items(obj)
 
-        self._feeds = self._source.feeds()
+        feeds = self._source.feeds()
         if self._inverted:
-            self._feeds.reverse()
+            feeds.reverse()
+        self._stats = self._source.all_feed_stats()
+        self._feeds = feeds
 
         self._sanitize()
         self.display()
 
+    def refresh_items(self, changes) -> None:
+        """Called when rows in the database changed in place; see
+        Menu.refresh_items.
+        """
+        if len(changes.feed_keys) > 0:
+            self._stats = self._source.all_feed_stats()
+        super().refresh_items(changes)
+
+    def _changed(self, feed, changes) -> bool:
+        """Whether a feed's row or statistics changed."""
+        return feed.key in changes.feed_keys
+
     def update_child(self):
         """Update our child menu, the episode menu."""
         if len(self._filtered_feeds) == 0:
@@ -73,4 +98,4 @@ class FeedMenu(Menu):
     @property
     def _filtered_feeds(self):
         """A list of feeds which match the menu filter."""
-        return list(filter(lambda feed: self._filter_text in str(feed).lower(), self._feeds))
+        return self._filter(self._feeds)
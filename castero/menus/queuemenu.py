@@ -1,4 +1,5 @@
 import curses
+import itertools
 
 from castero.player import Player
 from castero.menu import Menu
@@ -13,10 +14,13 @@ class QueueMenu(Menu):
     def __len__(self) -> int:
         return self._source.length
 
-    @property
-    def _items(self):
-        """A list of items in the menu represented as dictionaries."""
-        return [{"attr": curses.A_NORMAL, "tags": [], "text": str(player)} for player in self._source]
+    def _item_objects(self, start, end) -> list:
+        """The players of a range of items in the menu."""
+        return list(itertools.islice(self._source, start, end))
+
+    def _create_item(self, player) -> dict:
+        """The item which represents a player."""
+        return {"attr": curses.A_NORMAL, "tags": [], "text": str(player)}
 
     @property
     def title(self) -> str:
@@ -0,0 +1,99 @@
+import curses
+
+from castero.episode import Episode
+from castero.menu import Menu
+
+
+class SearchMenu(Menu):
+    """The menu for episodes from all feeds which match a search.
+
+    Episodes are found with the source's (the database's) full-text search
+    index, ordered by relevance.
+    """
+
+    def __init__(self, window, source, child=None, active=False) -> None:
+        super().__init__(window, source, child=child, active=active)
+
+        self._query = ""
+        self._episodes = []
+
+    def __len__(self) -> int:
+        return len(self._episodes)
+
+    def _item_objects(self, start, end) -> list:
+        """The episodes of a range of items in the menu."""
+        return self._episodes[start:end]
+
+    def _create_item(self, episode) -> dict:
+        """The item which represents an episode."""
+        tags = []
+        if episode.downloaded:
+            tags.append("D")
+        if episode.progress > 0:
+            tags.append(Episode.PROGRESS_INDICATOR)
+
+        return {
+            "attr": (
+                curses.color_pair(5) if episode.played else curses.A_NORMAL
+            ),
+            "tags": tags,
+            "text": "[%s] %s" % (episode.feed_str, str(episode)),
+        }
+
+    @property
+    def title(self) -> str:
+        """The title of the menu to display in the window header."""
+        if self._query == "":
+            return "Search"
+        return 'Search: "%s" (%d)' % (self._query, len(self._episodes))
+
+    @property
+    def item(self) -> Episode:
+        """The selected episode."""
+        if len(self._episodes) == 0:
+            return None
+
+        return self._episodes[self._selected]
+
+    @property
+    def metadata(self) -> str:
+        """Metadata for the selected episode."""
+        if len(self._episodes) == 0:
+            return ""
+
+        return self._episodes[self._selected].metadata
+
+    def update_items(self, query):
+        """Called to update our items.
+
+        :param query the text to search for, or None to search for the same
+          text again
+        """
+        super().update_items(query)
+
+        if query is not None:
+            self._query = query
+            self._selected = 0
+            self._top_index = 0
+
+        episodes = self._source.search(self._query)
+        if self._inverted:
+            episodes.reverse()
+        self._episodes = episodes
+
+        self._sanitize()
+
+    @property
+    def query(self) -> str:
+        """str: the text which episodes were searched for"""
+        return self._query
+
+    def update_child(self):
+        """Not necessary for this menu -- does nothing."""
+        pass
+
+    def invert(self):
+        """Invert the menu order."""
+        super().invert()
+
+        self.update_items(None)
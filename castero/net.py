@@ -18,12 +18,14 @@ class Net:
         """Send a GET request.
 
         :param *args arguments for requests.get(); particularly the URL
-        :param **kwargs optional arguments for requests.get()
+        :param **kwargs optional arguments for requests.get(); headers are
+          sent in addition to our own
         :returns requests.models.Response: response
         """
+        headers = dict(Net.HEADERS, **kwargs.pop("headers", {}))
         return requests.get(
             *args,
-            headers=Net.HEADERS,
+            headers=headers,
             timeout=float(castero.config.Config["request_timeout"]),
             proxies={
                 "http": castero.config.Config["proxy_http"],
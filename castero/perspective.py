@@ -89,6 +89,29 @@ class Perspective(ABC):
     def update_menus(self) -> None:
         """Update/refresh the contents of all menus."""
 
+    def database_changed(self, changes) -> bool:
+        """Called when the database changed, to refresh the items of our
+        menus whose rows changed.
+
+        :param changes the Changes to the database since our menus were last
+          updated or refreshed (see Database.changes_since)
+        :returns bool: whether our menus must be updated instead, because
+          rows may have been added or removed
+        """
+        if changes.ep_ids is None:
+            return True
+
+        for menu in self._menus():
+            menu.refresh_items(changes)
+        return False
+
+    def _menus(self) -> list:
+        """Retrieve all of our menus.
+
+        :returns list: the Menus
+        """
+        return [self._get_active_menu()]
+
     @abstractmethod
     def _invert_selected_menu(self) -> None:
         """Inverts the contents of the selected menu."""
@@ -208,11 +231,8 @@ class Perspective(ABC):
             if self._active_window == 0:
                 feed = self._feed_menu.item
                 if feed is not None:
-                    episodes = self._display.database.episodes(feed)
-                    for episode in episodes:
-                        episode.played = not episode.played
-                        self._clear_episode_progress(episode)
-                    self._display.modified_episodes.extend(episodes)
+                    self._display.database.toggle_played(feed=feed)
+                    self._display.database.clear_progress(feed=feed)
             elif self._active_window == 1:
                 episode = self._episode_menu.item
                 if episode is not None:
@@ -282,15 +302,22 @@ class Perspective(ABC):
             y += 1
 
     def update_current_episode_progress(self) -> None:
-        """Update progress of the first player in queue"""
+        """Update progress of the first player in queue
+
+        The progress is written to the database with the display's next
+        update, along with any other modified episodes.
+        """
         (episode, progress) = self._display.queue.get_episode_progress()
         if episode is not None and progress is not None:
             episode.progress = progress
-            self._display.database.replace_progress(episode, progress)
+            self._display.modified_episodes.append(episode)
 
     def _clear_episode_progress(self, episode) -> None:
         """remove progress of the episode
 
+        The episode must also be added to the display's modified_episodes for
+        this to be stored.
+
         :param episode the episode to clear progress from
         """
-        self._display.database.delete_progress(episode)
+        episode.progress = None
@@ -5,7 +5,6 @@ from castero.config import Config
 from castero.menu import Menu
 from castero.menus.chronomenu import ChronoMenu
 from castero.perspective import Perspective
-from castero.player import Player
 
 
 class ChronoPerspective(Perspective):
@@ -162,19 +161,12 @@ class ChronoPerspective(Perspective):
         self._metadata_updated = False
 
     def _create_player_from_selected(self) -> None:
-        """Creates player(s) based on the selected items and adds to the queue.
+        """Adds the episode selected in the episode menu to the queue.
 
-        If the active menu is the feed menu, then this will create players for
-        all episodes in the selected feed. If the active menu is the episode
-        menu, this will simply create a single player.
-
-        This method will not clear the queue prior to adding the new player(s),
-        nor will it play the episodes after running.
+        This method will not clear the queue prior to adding the episode, nor
+        will it play the episode after running.
         """
         episode = self._episode_menu.item
         if episode is not None:
-            player = Player.create_instance(
-                self._display.AVAILABLE_PLAYERS, str(episode), episode.get_playable(), episode
-            )
-            self._display.queue.add(player)
+            self._display.queue.add(episode)
         self._metadata_updated = False
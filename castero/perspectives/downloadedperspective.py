@@ -5,7 +5,6 @@ from castero.config import Config
 from castero.menu import Menu
 from castero.menus.downloadedmenu import DownloadedMenu
 from castero.perspective import Perspective
-from castero.player import Player
 
 
 class DownloadedPerspective(Perspective):
@@ -175,8 +174,5 @@ class DownloadedPerspective(Perspective):
         """
         episode = self._downloaded_menu.item
         if episode is not None:
-            player = Player.create_instance(
-                self._display.AVAILABLE_PLAYERS, str(episode), episode.get_playable(), episode
-            )
-            self._display.queue.add(player)
+            self._display.queue.add(episode)
         self._metadata_updated = False
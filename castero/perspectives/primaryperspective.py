@@ -6,7 +6,6 @@ from castero.menu import Menu
 from castero.menus.episodemenu import EpisodeMenu
 from castero.menus.feedmenu import FeedMenu
 from castero.perspective import Perspective
-from castero.player import Player
 
 
 class PrimaryPerspective(Perspective):
@@ -135,6 +134,12 @@ class PrimaryPerspective(Perspective):
             self._get_active_menu().move(-1)
         elif c == key_mapping[Config["key_clear_progress"]]:
             self._clear_progress_from_selected()
+        elif c == key_mapping[Config["key_restore_archived"]]:
+            if self._active_window == 0 and self._feed_menu.item:
+                self._display.restore_archived(feed=self._feed_menu.item)
+        elif c == key_mapping[Config["key_retention"]]:
+            if self._active_window == 0 and self._feed_menu.item:
+                self._display.set_retention(self._feed_menu.item)
         else:
             keep_running = self._generic_handle_input(c)
 
@@ -156,6 +161,10 @@ class PrimaryPerspective(Perspective):
         self._metadata_window.refresh()
         self._feed_menu.refresh()
 
+    def _menus(self) -> list:
+        """Retrieve all of our menus."""
+        return [self._feed_menu, self._episode_menu]
+
     def _get_active_menu(self) -> Menu:
         """Retrieve the active Menu, if there is one."""
         assert 0 <= self._active_window < 2
@@ -191,22 +200,16 @@ class PrimaryPerspective(Perspective):
                 else:
                     episodes = self._display.database.episodes(feed)
 
-                for episode in episodes:
-                    player = Player.create_instance(
-                        self._display.AVAILABLE_PLAYERS, str(episode), episode.get_playable(), episode
-                    )
-                    self._display.queue.add(player)
+                self._display.queue.extend(episodes)
         elif self._active_window == 1:
             episode = self._episode_menu.item
             if episode is not None:
-                player = Player.create_instance(
-                    self._display.AVAILABLE_PLAYERS, str(episode), episode.get_playable(), episode
-                )
-                self._display.queue.add(player)
+                self._display.queue.add(episode)
 
     def _clear_progress_from_selected(self) -> None:
         if self._active_window == 1:
             episode = self._episode_menu.item
             if episode is not None:
-                self._display.database.delete_progress(episode)
+                episode.progress = None
+                self._display.modified_episodes.append(episode)
                 self._episode_window.refresh()
@@ -0,0 +1,41 @@
+from castero.config import Config
+from castero.menus.searchmenu import SearchMenu
+from castero.perspectives.chronoperspective import ChronoPerspective
+
+
+class SearchPerspective(ChronoPerspective):
+    """The search perspective.
+
+    This class handles display elements while in the search perspective, which
+    is a listing of episodes from all feeds which match a search, ordered by
+    relevance. The filter key starts a new search.
+
+    The layout and the actions on the selected episode are those of the
+    chronological perspective; only the episode menu, which holds the search
+    results, differs.
+    """
+
+    ID = 6
+
+    def create_menus(self) -> None:
+        """Create the menus used in each window."""
+        assert all(window is not None for window in [self._episode_window])
+
+        self._episode_menu = SearchMenu(
+            self._episode_window, self._display.database, active=True
+        )
+
+    def handle_input(self, c) -> bool:
+        """Performs action corresponding to the user's input."""
+        key_mapping = self._display.KEY_MAPPING
+
+        if c == key_mapping[Config["key_restore_archived"]]:
+            if self._episode_menu.query:
+                self._display.restore_archived(text=self._episode_menu.query)
+        elif c == key_mapping[Config["key_filter"]]:
+            self._display.search_menu(self._episode_menu)
+            self._metadata_updated = False
+        else:
+            return super().handle_input(c)
+
+        return True
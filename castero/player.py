@@ -1,3 +1,4 @@
+import functools
 from abc import abstractmethod
 
 import castero
@@ -17,6 +18,32 @@ class PlayerCreateError(PlayerError):
     """An error occurred while creating the player."""
 
 
+def cache_dependency_check(check):
+    """Decorator for caching the outcome of a player's check_dependencies().
+
+    Checking dependencies usually means loading and initializing the
+    player's library, so the check is only actually performed once per
+    process. Subsequent calls raise the same PlayerDependencyError, if any.
+
+    :param check the function which checks dependencies
+    :returns function: the wrapped function
+    """
+    outcome = {}
+
+    @functools.wraps(check)
+    def wrapper():
+        if "error" not in outcome:
+            try:
+                check()
+                outcome["error"] = None
+            except PlayerDependencyError as e:
+                outcome["error"] = e
+        if outcome["error"] is not None:
+            raise outcome["error"]
+
+    return wrapper
+
+
 class Player:
     """Extendable class for media players.
 
@@ -39,11 +66,14 @@ class Player:
         self._episode = episode
         self._media = None
         self._player = None
+        self._engine = None
         self._duration = -1  # in milliseconds
         self._state = 0  # 0=stopped, 1=playing, 2=paused
+        self._ended = False
 
     def __del__(self) -> None:
-        if self._player is not None:
+        # a shared engine may already be playing another player's media
+        if self._player is not None and self._engine is None:
             self.stop()
 
     def __str__(self) -> str:
@@ -99,9 +129,50 @@ class Player:
     def check_dependencies():
         """Checks whether dependencies are met for playing a player.
 
+        Subclasses should decorate this with cache_dependency_check, since it
+        is called whenever a player is created.
+
         :raises PlayerDependencyError: a dependency was not met
         """
 
+    @staticmethod
+    @abstractmethod
+    def create_engine():
+        """Creates a media engine which players of this type can share.
+
+        Players of the same type can load their media into a single
+        long-lived engine, rather than each creating their own.
+
+        :returns: the engine, to be given to attach_engine()
+        """
+
+    @staticmethod
+    @abstractmethod
+    def release_engine(engine) -> None:
+        """Releases an engine created by create_engine().
+
+        :param engine the engine to release
+        """
+
+    def attach_engine(self, engine) -> None:
+        """Use a shared media engine for playing this player's media.
+
+        The engine is not released when this player is stopped or deleted;
+        its owner should call release_engine() when it is no longer needed.
+
+        :param engine an engine from create_engine()
+        """
+        self._engine = engine
+
+    def prepare(self) -> None:
+        """Open and buffer the media in the background before it is played.
+
+        This is called while the previous player in the queue is still
+        playing, so that play() can start without waiting for the media. It
+        should only be called after attach_engine(). Players which cannot
+        prepare their media ahead of time do nothing.
+        """
+
     @abstractmethod
     def _create_player(self) -> None:
         """Creates the player object while making sure it is a valid file.
@@ -168,6 +239,11 @@ class Player:
         """int: the state of the player"""
         return self._state
 
+    @property
+    def ended(self) -> bool:
+        """bool: whether the media has played to its end"""
+        return self._ended
+
     @property
     def title(self) -> str:
         """str: the title of the player"""
@@ -183,6 +259,12 @@ class Player:
     def duration(self) -> int:
         """int: the duration of the player, in ms"""
 
+    @property
+    @abstractmethod
+    def duration_known(self) -> bool:
+        """bool: whether the duration was reported by the media, rather than
+        taken from the episode or a placeholder"""
+
     @property
     @abstractmethod
     def volume(self) -> int:
@@ -1,4 +1,8 @@
-from castero.player import Player, PlayerDependencyError
+from castero.player import (
+    Player,
+    PlayerDependencyError,
+    cache_dependency_check,
+)
 from castero import helpers, constants
 
 
@@ -6,6 +10,8 @@ class MPVPlayer(Player):
     """Interface for the mpv media player."""
 
     NAME = "mpv"
+    # engine properties which we keep a snapshot of while playing
+    OBSERVED_PROPERTIES = ["path", "time-pos", "duration", "eof-reached"]
 
     def __init__(self, title, path, episode) -> None:
         super().__init__(title, path, episode)
@@ -13,33 +19,72 @@ class MPVPlayer(Player):
         import mpv
 
         self.mpv = mpv
+        self._prepared = False
+        self._snapshot = None
 
     @staticmethod
+    @cache_dependency_check
     def check_dependencies():
         """Checks whether dependencies are met for playing a player."""
         try:
             import mpv
 
-            mpv.MPV()
+            mpv.MPV().terminate()
         except (ImportError, NameError, OSError, AttributeError):
             raise PlayerDependencyError(
                 "Dependency mpv not found, which is required for playing" " media files"
             )
 
+    @staticmethod
+    def create_engine():
+        """Creates a media engine which players of this type can share."""
+        import mpv
+
+        engine = mpv.MPV()
+        engine.vid = False
+        # stay on a finished file until we load the next one ourselves, and
+        # buffer the next playlist entry (see prepare) ahead of time
+        engine.keep_open = "always"
+        engine.prefetch_playlist = True
+        return engine
+
+    @staticmethod
+    def release_engine(engine) -> None:
+        """Releases an engine created by create_engine()."""
+        engine.terminate()
+
     def _create_player(self) -> None:
         """Creates the player object while making sure it is a valid file."""
-        self._player = self.mpv.MPV()
-        self._player.vid = False
+        if self._engine is not None:
+            self._player = self._engine
+            # the engine may still have a start time from a previous player
+            self._player.start = "none"
+        else:
+            self._player = self.mpv.MPV()
+            self._player.vid = False
         self._player.pause = False
 
         self._duration = 5
 
+    def prepare(self) -> None:
+        """Open and buffer the media in the background before it is played."""
+        if self._engine is not None and not self._prepared:
+            self._engine.playlist_append(self._path)
+            self._prepared = True
+
     def play(self) -> None:
         """Plays the media."""
         if self._player is None:
             self._create_player()
 
-        self._player.play(self._path)
+        self._ended = False
+        self._observe()
+
+        if self._prepared:
+            self._prepared = False
+            self._play_prepared()
+        else:
+            self._player.play(self._path)
 
         self._player.pause = False
         self._state = 1
@@ -54,10 +99,68 @@ class MPVPlayer(Player):
 
         self.play()
 
+    def _play_prepared(self) -> None:
+        """Switch the engine to the playlist entry added by prepare()."""
+        filenames = [entry.get("filename") for entry in self._player.playlist]
+        if self._path not in filenames:
+            self._player.play(self._path)
+            return
+
+        index = filenames.index(self._path)
+        self._player.playlist_play_index(index)
+        # entries before ours belong to players which have left the queue
+        for _ in range(index):
+            self._player.playlist_remove(0)
+
+    def _observe(self) -> None:
+        """Keep a snapshot of the engine's state while we are playing.
+
+        Reading a property from mpv is a synchronous request to its core, so
+        instead mpv notifies us of changes to OBSERVED_PROPERTIES and time,
+        duration and ended are read from the snapshot.
+        """
+        if self._snapshot is None:
+            self._snapshot = {}
+            for name in self.OBSERVED_PROPERTIES:
+                self._player.observe_property(name, self._on_property_change)
+
+    def _unobserve(self) -> None:
+        """Stop updating the snapshot of the engine's state."""
+        if self._snapshot is not None:
+            for name in self.OBSERVED_PROPERTIES:
+                self._player.unobserve_property(name, self._on_property_change)
+            self._snapshot = None
+
+    def _on_property_change(self, name, value) -> None:
+        """Update the snapshot of the engine's state.
+
+        This is called from mpv's event thread. A shared engine may still
+        report the previous player's media for a moment after we start
+        playing, so values are ignored until the engine's path is ours.
+
+        :param name the name of the property which changed
+        :param value the new value of the property
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+
+        if name == "path":
+            snapshot["current"] = value == self._path
+        elif snapshot.get("current", False):
+            snapshot[name] = value
+            if name == "eof-reached":
+                self._ended = bool(value)
+
     def stop(self) -> None:
         """Stops the media."""
         if self._player is not None:
-            self._player.terminate()
+            self._unobserve()
+            if self._engine is not None:
+                # keep entries which the next player may have prepared
+                self._player.stop(keep_playlist=True)
+            else:
+                self._player.terminate()
             self._state = 0
 
     def pause(self) -> None:
@@ -82,15 +185,32 @@ class MPVPlayer(Player):
         if self._player is not None:
             self._player.volume = volume
 
+    def _media_duration(self) -> float:
+        """The duration reported by mpv, in seconds, or None if it is not
+        known yet."""
+        if self._snapshot is not None:
+            return self._snapshot.get("duration")
+        return self._player.duration
+
     @property
     def duration(self) -> int:
         """int: the duration of the player"""
         result = 0
         if self._player is not None:
-            d = self._player.duration
-            result = 5000 if d is None else d * constants.MILLISECONDS_IN_SECOND
+            d = self._media_duration()
+            if d is not None:
+                result = d * constants.MILLISECONDS_IN_SECOND
+            elif self._episode.duration is not None:
+                result = self._episode.duration
+            else:
+                result = 5000
         return result
 
+    @property
+    def duration_known(self) -> bool:
+        """bool: whether the duration was reported by mpv"""
+        return self._player is not None and self._media_duration() is not None
+
     @property
     def volume(self) -> int:
         """int: the volume of the player"""
@@ -101,7 +221,10 @@ class MPVPlayer(Player):
     def time(self) -> int:
         """int: the current time of the player"""
         if self._player is not None:
-            t = self._player.time_pos
+            if self._snapshot is not None:
+                t = self._snapshot.get("time-pos")
+            else:
+                t = self._player.time_pos
             return 0 if t is None else t * constants.MILLISECONDS_IN_SECOND
 
     @property
@@ -1,7 +1,11 @@
 import time
 
 from castero import constants
-from castero.player import Player, PlayerDependencyError
+from castero.player import (
+    Player,
+    PlayerDependencyError,
+    cache_dependency_check,
+)
 
 
 class VLCPlayer(Player):
@@ -15,8 +19,11 @@ class VLCPlayer(Player):
         import vlc
 
         self.vlc = vlc
+        self._events = None
+        self._time = 0
 
     @staticmethod
+    @cache_dependency_check
     def check_dependencies():
         """Checks whether dependencies are met for playing a player."""
         try:
@@ -29,29 +36,113 @@ class VLCPlayer(Player):
                 "Dependency VLC not found, which is required for playing" " media files"
             )
 
+    @staticmethod
+    def create_engine():
+        """Creates a media engine which players of this type can share."""
+        import vlc
+
+        return vlc.Instance("--no-video --quiet").media_player_new()
+
+    @staticmethod
+    def release_engine(engine) -> None:
+        """Releases an engine created by create_engine()."""
+        vlc_instance = engine.get_instance()
+        engine.release()
+        vlc_instance.release()
+
     def _create_player(self) -> None:
         """Creates the player object while making sure it is a valid file."""
-        vlc_instance = self.vlc.Instance("--no-video --quiet")
+        if self._engine is not None:
+            self._player = self._engine
+            vlc_instance = self._engine.get_instance()
+        else:
+            vlc_instance = self.vlc.Instance("--no-video --quiet")
+            self._player = vlc_instance.media_player_new()
+
+        if self._media is None:
+            self._open_media(vlc_instance)
+        self._player.set_media(self._media)
+
+    def _open_media(self, vlc_instance) -> None:
+        """Create the media object and parse it in the background.
+
+        Parsing a remote file can take seconds, so it is not waited on; the
+        media's duration is available once parsing has finished (see duration).
 
-        self._player = vlc_instance.media_player_new()
+        :param vlc_instance the vlc.Instance to create the media with
+        """
         self._media = vlc_instance.media_new(self._path)
-        self._media.parse()  # may output some junk into the console
-        self._player.set_media(self._media)
+        self._media.parse_with_options(self.vlc.MediaParseFlag.network, 0)
 
-        self._duration = self._media.get_duration()
+    def prepare(self) -> None:
+        """Open and buffer the media in the background before it is played."""
+        if self._engine is not None and self._media is None:
+            # parsing in the background also opens the stream
+            self._open_media(self._engine.get_instance())
 
     def play(self) -> None:
         """Plays the media."""
         if self._player is None:
             self._create_player()
 
+        self._ended = False
+        self._observe()
+
         self._player.play()
         self._state = 1
 
+    def _observe(self) -> None:
+        """Keep a snapshot of the player's state while we are playing.
+
+        The snapshot is updated from the player's events, so that time and
+        ended can be read on every update without calling into libvlc.
+        """
+        if self._events is None:
+            self._events = self._player.event_manager()
+            for event_type in self._observed_event_types():
+                self._events.event_attach(event_type, self._on_event)
+
+    def _unobserve(self) -> None:
+        """Stop updating the snapshot of the player's state."""
+        if self._events is not None:
+            for event_type in self._observed_event_types():
+                self._events.event_detach(event_type)
+            self._events = None
+
+    def _observed_event_types(self) -> list:
+        """The player events which the snapshot is updated from.
+
+        :returns list: vlc.EventType's to attach to
+        """
+        return [
+            self.vlc.EventType.MediaPlayerTimeChanged,
+            self.vlc.EventType.MediaPlayerLengthChanged,
+            self.vlc.EventType.MediaPlayerEndReached,
+        ]
+
+    def _on_event(self, event) -> None:
+        """Update the snapshot of the player's state.
+
+        This is called from a libvlc thread, which must not call back into
+        libvlc, so we only record the event's values.
+
+        :param event the vlc.Event which occurred
+        """
+        if event.type == self.vlc.EventType.MediaPlayerTimeChanged:
+            self._time = event.u.new_time
+        elif event.type == self.vlc.EventType.MediaPlayerLengthChanged:
+            self._duration = event.u.new_length
+        elif event.type == self.vlc.EventType.MediaPlayerEndReached:
+            self._ended = True
+
     def stop(self) -> None:
         """Stops the media."""
         if self._player is not None:
-            if self._player.get_state() == self.vlc.State.Opening:
+            self._unobserve()
+            if (
+                self._player.get_state() == self.vlc.State.Opening
+                and self._engine is None
+            ):
                 self._player.release()
             else:
                 self._player.stop()
@@ -96,15 +187,27 @@ class VLCPlayer(Player):
         if self._player is not None:
             self._player.audio_set_volume(volume)
 
+    def _media_duration(self) -> int:
+        """The duration reported by the media, in ms, or 0 if it is not known
+        yet."""
+        if self._media is not None and self._duration <= 0:
+            # not known (i.e. -1) until the media has been parsed
+            self._duration = self._media.get_duration()
+        return max(self._duration, 0)
+
     @property
     def duration(self) -> int:
         """int: the duration of the player"""
-        result = 0
-        if self._media is not None:
-            self._duration = self._media.get_duration()
-            result = self._duration
+        result = self._media_duration()
+        if result == 0 and self._episode.duration is not None:
+            result = self._episode.duration
         return result
 
+    @property
+    def duration_known(self) -> bool:
+        """bool: whether the duration was reported by the media"""
+        return self._media_duration() > 0
+
     @property
     def volume(self) -> int:
         """int: the volume of the player"""
@@ -115,6 +218,8 @@ class VLCPlayer(Player):
     def time(self) -> int:
         """int: the current time of the player"""
         if self._player is not None:
+            if self._events is not None:
+                return self._time
             return self._player.get_time()
 
     @property
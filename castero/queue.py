@@ -1,26 +1,85 @@
+import time
+
 from castero import constants
 from castero.config import Config
+from castero.episode import Episode
 from castero.player import Player
 
 
+class QueueEntry:
+    """A queued episode which does not have a Player yet.
+
+    Creating a Player requires checking the dependencies of the available
+    players, which is slow. The queue holds these lightweight entries instead,
+    and only creates a Player when the entry reaches the front of the queue or
+    is about to.
+    """
+
+    def __init__(self, episode) -> None:
+        """
+        :param episode the Episode which is queued
+        """
+        assert isinstance(episode, Episode)
+
+        self._episode = episode
+
+    def __str__(self) -> str:
+        """Represent this object as a string.
+
+        :returns string: the name of the feed and the title of the episode
+        """
+        return "[%s] %s" % (self._episode.feed_str, self.title)
+
+    @property
+    def title(self) -> str:
+        """str: the title of the entry"""
+        return str(self._episode)
+
+    @property
+    def episode(self) -> Episode:
+        """Episode: the Episode which is queued"""
+        return self._episode
+
+
 class Queue:
     """A FIFO ordered queue of Player instances.
 
     This class is also the display class' main interface for accessing
     information about the current player.
+
+    Players of the same type share one media engine, owned by the queue. The
+    player after the first is prepared while the first is playing, so that
+    advancing to it is effectively gapless. The episodes of the next few
+    players can also be downloaded in the background (see _prefetch).
+
+    Episodes can be added without a Player, in which case they are held as a
+    QueueEntry until they are near the front of the queue (see _realize).
+
+    Every change to the queue is immediately reflected in the database's
+    queue table, so the stored queue is always current. Each player's entry
+    there is identified by an ordering key, which we keep in _keys.
+
+    While the first player is playing, its position is periodically recorded
+    as its episode's progress (see _checkpoint).
     """
 
     MIN_VOLUME = 0
     MAX_VOLUME = 100
     MIN_SPEED = 0.5
     MAX_SPEED = 2.0
+    CHECKPOINT_MIN_MOVEMENT = 5000  # in milliseconds
 
     def __init__(self, display) -> None:
         self._players = []
+        self._keys = []
+        self._engines = {}
         self._display = display
         self._volume = int(Config["default_volume"])
         self._speed = float(Config["default_playback_speed"])
         self._resume_rewind = int(Config["resume_rewind_distance"])
+        self._prefetch_count = int(Config["prefetch_count"])
+        self._checkpoint_interval = int(Config["progress_checkpoint_interval"])
+        self._last_checkpoint = time.monotonic()
         self._sanitize_volume()
         self._sanitize_speed()
 
@@ -39,6 +98,8 @@ class Queue:
         for p in self._players:
             del p
         self._players = []
+        self._keys = []
+        self._display.database.delete_queue()
 
     def jump(self, player) -> None:
         """Jump to the given player.
@@ -52,22 +113,75 @@ class Queue:
             index = self._players.index(player)
             if index > 0:
                 self.stop()
+                for key in self._keys[:index]:
+                    self._remove_stored(key)
                 self._players = self._players[index:]
+                self._keys = self._keys[index:]
 
     def next(self) -> None:
         """Proceed to the next player in the queue."""
         if len(self._players) > 0:
             self._players.pop(0)
+            self._remove_stored(self._keys.pop(0))
+            self._replay_prefetched()
+
+    def add(self, player, key=None) -> None:
+        """Adds a player to the end of the queue.
+
+        :param player the Player to add, or an Episode to create a Player for
+          when it is needed
+        :param key (optional) the ordering key of the player's entry in the
+          stored queue, if it is already stored there
+        """
+        if key is None:
+            self.extend([player])
+            return
 
-    def add(self, player) -> None:
-        """Adds a player to the end of the queue."""
-        assert isinstance(player, Player)
+        if isinstance(player, Episode):
+            player = QueueEntry(player)
+        assert isinstance(player, (Player, QueueEntry))
 
         self._players.append(player)
+        self._keys.append(key)
+
+    def extend(self, players) -> None:
+        """Adds players to the end of the queue.
+
+        Their entries are stored in the database in a single write.
+
+        :param players the Players to add, or Episodes to create Players for
+          when they are needed
+        """
+        players = [
+            QueueEntry(player) if isinstance(player, Episode) else player
+            for player in players
+        ]
+        assert all(
+            isinstance(player, (Player, QueueEntry)) for player in players
+        )
+
+        # only episodes from the database can be stored
+        stored = [
+            index
+            for (index, player) in enumerate(players)
+            if isinstance(player.episode, Episode)
+            and player.episode.ep_id is not None
+        ]
+        keys = [None] * len(players)
+        if len(stored) > 0:
+            stored_keys = self._display.database.append_queue(
+                [players[index].episode for index in stored]
+            )
+            for (index, key) in zip(stored, stored_keys):
+                keys[index] = key
+
+        self._players.extend(players)
+        self._keys.extend(keys)
 
     def play(self) -> None:
         """Plays the first player in the queue."""
         if self.first is not None:
+            self._attach_engine(self.first)
             self._display.modified_episodes.append(self.first.episode)
             progress = self.first.episode.progress
             if progress is None or progress == 0:
@@ -77,6 +191,10 @@ class Queue:
             self.first.set_volume(self.volume)
             self.first.set_rate(self.speed)
 
+            # the next player is likely needed soon; prepare it now rather
+            # than when the current one finishes
+            self._preroll()
+
     def _play_from_progress(self):
         """Seek forward to progress from start of episode"""
         progress = self.first.episode.progress
@@ -162,22 +280,38 @@ class Queue:
         result = -1
         if player in self._players:
             result = self._players.index(player)
-            self._players.remove(player)
+            self._players.pop(result)
+            self._remove_stored(self._keys.pop(result))
         return result
 
     def update(self) -> None:
         """Checks the status of the current player."""
+        if self.first is not None and self.first.state == 1:
+            # the player after the first may have changed since play()
+            self._preroll()
+            self._store_duration()
+            self._prefetch()
+            self._checkpoint()
+
         if self.first is not None and self.first.duration is not None:
-            # sanity check the player's current time
-            if self.first.duration > 0:
-                if (self.first.time / constants.MILLISECONDS_IN_SECOND) + 1 >= (
+            # the player reports when its media ends; we also sanity check
+            # the player's current time
+            ended = self.first.ended
+            if not ended and self.first.duration > 0:
+                position = self.first.time / constants.MILLISECONDS_IN_SECOND
+                duration = (
                     self.first.duration / constants.MILLISECONDS_IN_SECOND
-                ):
-                    self.first.episode.played = True
-                    self.first.episode.progress = None
-                    self._display.modified_episodes.append(self.first.episode)
-                    self.next()
-                    self.play()
+                )
+                ended = position + 1 >= duration
+            if ended:
+                self.first.episode.played = True
+                self.first.episode.progress = None
+                self._display.modified_episodes.append(self.first.episode)
+                self._display.stream_cache.promote(self.first.episode)
+                self.stop()
+                self._evict_prefetched(self.first.episode)
+                self.next()
+                self.play()
 
     def get_episode_progress(self):
         """Get progress of the current playing episode
@@ -188,6 +322,171 @@ class Queue:
             return (self.first.episode, self.first.time)
         return (None, None)
 
+    def release_engines(self) -> None:
+        """Release the media engines shared by the players.
+
+        The caller should stop the first player prior to calling this method.
+        """
+        for (engine, release) in self._engines.values():
+            release(engine)
+        self._engines = {}
+
+    def _attach_engine(self, player) -> None:
+        """Give a player the shared media engine for its type.
+
+        Engines are created as needed and then kept until release_engines() is
+        called, so that changing tracks does not create a new one each time.
+
+        :param player the Player to attach an engine to
+        """
+        player_type = type(player)
+        if player_type not in self._engines:
+            self._engines[player_type] = (
+                player.create_engine(),
+                player.release_engine,
+            )
+        player.attach_engine(self._engines[player_type][0])
+
+    def _store_duration(self) -> None:
+        """Record the duration of the first player's media in its episode.
+
+        Players learn the duration asynchronously after their media is opened.
+        Once the media reports it, the episode is marked as modified so that
+        the duration is stored and does not need to be discovered again.
+        Durations which players report before then, from the episode or as a
+        placeholder, are not stored.
+        """
+        if (
+            self.first.time > 0
+            and self.first.duration_known
+            and self.first.duration > 0
+        ):
+            duration = int(self.first.duration)
+            if self.first.episode.duration != duration:
+                self.first.episode.duration = duration
+                self._display.modified_episodes.append(self.first.episode)
+
+    def _checkpoint(self) -> None:
+        """Record the first player's position as its episode's progress.
+
+        This happens at most every progress_checkpoint_interval seconds, and
+        only if the position has moved by at least CHECKPOINT_MIN_MOVEMENT
+        since the progress was last recorded. The episode is marked as
+        modified, so it is written with the display's other pending changes.
+        """
+        if self._checkpoint_interval <= 0:
+            return
+
+        now = time.monotonic()
+        if now - self._last_checkpoint < self._checkpoint_interval:
+            return
+        self._last_checkpoint = now
+
+        episode = self.first.episode
+        position = self.first.time
+        if position is not None and (
+            abs(position - episode.progress) >= self.CHECKPOINT_MIN_MOVEMENT
+        ):
+            episode.progress = int(position)
+            self._display.modified_episodes.append(episode)
+
+    def _prefetch(self) -> None:
+        """Download the episodes of the players after the first.
+
+        Up to the prefetch_count config option's number of players are
+        considered. Their episodes are downloaded in the background, and
+        marked in the database so that they are only downloaded once and can
+        be deleted after they are played (see _evict_prefetched).
+        """
+        database = self._display.database
+        for player in self._players[1:self._prefetch_count + 1]:
+            episode = player.episode
+            if (
+                episode.ep_id is None
+                or episode.downloaded
+                or database.prefetched(episode)
+            ):
+                continue
+            database.add_prefetch(episode)
+            self._display.download_queue.add(episode, background=True)
+
+    def _evict_prefetched(self, episode) -> None:
+        """Delete an episode's download if it was prefetched.
+
+        :param episode the Episode which finished playing
+        """
+        database = self._display.database
+        if episode.ep_id is not None and database.prefetched(episode):
+            if (
+                episode not in self._display.download_queue
+                and episode.check_downloaded()
+            ):
+                episode.delete()
+                database.remove_prefetch([episode])
+
+    def _replay_prefetched(self) -> None:
+        """Have the first player play its prefetched download, if it can.
+
+        The player may have been created to stream its episode before the
+        prefetched download finished. If it has not been played yet, it is
+        replaced so that a new player is created from the download.
+        """
+        if len(self._players) > 0 and isinstance(self._players[0], Player):
+            player = self._players[0]
+            episode = player.episode
+            if (
+                player.state == 0
+                and episode.ep_id is not None
+                and self._display.database.prefetched(episode)
+                and episode not in self._display.download_queue
+                and episode.check_downloaded()
+            ):
+                self._players[0] = QueueEntry(episode)
+
+    def _preroll(self) -> None:
+        """Prepare the second player in the queue, if there is one.
+
+        The player is given the shared engine and opens its media in the
+        background, so that advancing to it does not wait on the network.
+        Preparing the same player more than once has no effect.
+        """
+        if len(self._players) > 1:
+            self._realize(1)
+            self._attach_engine(self._players[1])
+            self._players[1].prepare()
+
+    def _realize(self, index) -> None:
+        """Ensure the item at the given index of the queue is a Player.
+
+        If the index is out of range, this method safely does nothing.
+
+        :param index the index of the item in the queue
+        :raises PlayerDependencyError: dependencies were not met for any
+          players
+        """
+        if index < len(self._players) and isinstance(
+            self._players[index], QueueEntry
+        ):
+            episode = self._players[index].episode
+            playable = self._display.stream_cache.playable(
+                episode, episode.get_playable()
+            )
+            self._players[index] = Player.create_instance(
+                self._display.AVAILABLE_PLAYERS,
+                str(episode),
+                playable,
+                episode,
+            )
+
+    def _remove_stored(self, key) -> None:
+        """Remove an entry from the stored queue.
+
+        :param key the ordering key of the entry, or None if the player was
+          never stored (i.e. its episode is not in the database)
+        """
+        if key is not None:
+            self._display.database.remove_queue(key)
+
     def _sanitize_volume(self) -> None:
         """Ensure the volume is an acceptable value (0-100 inclusive)."""
         if self._volume > self.MAX_VOLUME:
@@ -207,6 +506,7 @@ class Queue:
         """Player: the first player in the queue"""
         result = None
         if len(self._players) > 0:
+            self._realize(0)
             result = self._players[0]
         return result
 
@@ -0,0 +1,471 @@
+import json
+import os
+import threading
+
+import requests
+from gevent.hub import get_hub
+from gevent.pywsgi import WSGIServer
+
+from castero import helpers
+from castero.config import Config
+from castero.datafile import DataFile
+from castero.net import Net
+
+
+class StreamCacheEntry:
+    """The cached media of a single streamed episode.
+
+    Bytes are written to a sparse data file at their offset in the media. The
+    ranges of the file which have been written are kept in an index file next
+    to it, so that they can still be used after the client restarts.
+    """
+
+    def __init__(self, directory, ep_id, url) -> None:
+        """
+        :param directory the directory of the cache
+        :param ep_id the database id of the episode
+        :param url the URL which the media is streamed from
+        """
+        self.data_path = os.path.join(directory, "%d.part" % ep_id)
+        self.index_path = os.path.join(directory, "%d.json" % ep_id)
+        self.url = url
+        self.length = None
+        self.ranges = []  # sorted, non-overlapping [start, end) pairs
+        self.users = 0
+        self._lock = threading.Lock()
+
+        self._load()
+
+    def _load(self) -> None:
+        """Load the index file, if it exists and is for the same URL."""
+        if os.path.exists(self.index_path) and os.path.exists(self.data_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    index = json.loads(f.read())
+            except (OSError, ValueError):
+                return
+            if index.get("url") == self.url:
+                self.length = index.get("length")
+                self.ranges = [list(r) for r in index.get("ranges", [])]
+
+    def save(self) -> None:
+        """Write the index file.
+
+        This also marks the entry as recently used (see StreamCache.evict).
+        """
+        with self._lock:
+            index = {
+                "url": self.url,
+                "length": self.length,
+                "ranges": self.ranges,
+            }
+        DataFile.ensure_path(self.index_path)
+        with open(self.index_path, "w") as f:
+            f.write(json.dumps(index))
+
+    def add_range(self, start, end) -> None:
+        """Record that the bytes in [start, end) have been cached.
+
+        :param start the offset of the first byte
+        :param end the offset after the last byte
+        """
+        with self._lock:
+            ranges = []
+            for (r_start, r_end) in self.ranges:
+                if r_end < start or r_start > end:
+                    ranges.append([r_start, r_end])
+                else:
+                    start, end = min(start, r_start), max(end, r_end)
+            ranges.append([start, end])
+            self.ranges = sorted(ranges)
+
+    def cached_until(self, position) -> int:
+        """Find how far the media is cached, starting from a position.
+
+        :param position the offset to start from
+        :returns int: the offset after the last cached byte which directly
+          follows position, or position itself if it is not cached
+        """
+        with self._lock:
+            for (r_start, r_end) in self.ranges:
+                if r_start <= position < r_end:
+                    return r_end
+        return position
+
+    @property
+    def size(self) -> int:
+        """int: the number of cached bytes"""
+        with self._lock:
+            return sum(r_end - r_start for (r_start, r_end) in self.ranges)
+
+    @property
+    def complete(self) -> bool:
+        """bool: whether all of the media is cached"""
+        return self.length is not None and self.cached_until(0) >= self.length
+
+
+class StreamCache:
+    """A size-bounded on-disk cache of streamed episodes.
+
+    Episodes played from their enclosure URL are given to the player as the
+    URL of a small local HTTP server instead (see playable). The server reads
+    the media from the cache where it can, and otherwise fetches it and writes
+    it to the cache as it is passed on to the player. Seeking backward or
+    resuming an episode later therefore does not fetch the same bytes again.
+
+    The least recently used entries are removed when the cache grows beyond
+    the stream_cache_size config option. An entry which is complete when its
+    episode finishes playing can be moved to the episode's download location
+    (see promote).
+    """
+
+    DIRECTORY = os.path.join(DataFile.DATA_DIR, "cache")
+    CHUNK_SIZE = 64 * 1024
+    BYTES_IN_MEGABYTE = 1024 * 1024
+
+    def __init__(self) -> None:
+        self._max_size = (
+            int(Config["stream_cache_size"]) * self.BYTES_IN_MEGABYTE
+        )
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._server_loop = None
+
+    def playable(self, episode, path) -> str:
+        """Get a playable path for an episode which reads through the cache.
+
+        :param episode the Episode to play
+        :param path the playable path of the episode (see
+          Episode.get_playable)
+        :returns str: a URL of the local server if the episode can be cached,
+          otherwise path
+        """
+        if not self.enabled or episode.ep_id is None:
+            return path
+        if not path.startswith("http://") and not path.startswith("https://"):
+            return path
+
+        with self._lock:
+            if (
+                episode.ep_id not in self._entries
+                or self._entries[episode.ep_id].url != path
+            ):
+                self._entries[episode.ep_id] = StreamCacheEntry(
+                    self.DIRECTORY, episode.ep_id, path
+                )
+        self._start()
+
+        # keep the extension, which players may use to detect the format
+        extension = os.path.splitext(path)[1].split("?")[0]
+        return "http://127.0.0.1:%d/%d%s" % (
+            self._server.server_port,
+            episode.ep_id,
+            extension,
+        )
+
+    def promote(self, episode) -> bool:
+        """Move an episode's cached media to its download location.
+
+        This only happens if the stream_cache_promote config option is set and
+        all of the media is cached.
+
+        :param episode the Episode which finished playing
+        :returns bool: whether the cached media was moved
+        """
+        if not helpers.is_true(Config["stream_cache_promote"]):
+            return False
+
+        with self._lock:
+            entry = self._entries.get(episode.ep_id)
+            if entry is None or not entry.complete:
+                return False
+            del self._entries[episode.ep_id]
+
+        download_path = episode.get_download_path()
+        DataFile.ensure_path(download_path)
+        os.replace(entry.data_path, download_path)
+        if os.path.exists(entry.index_path):
+            os.remove(entry.index_path)
+        episode.check_downloaded()
+        return True
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is small
+        enough.
+
+        Entries which are currently being read by a player are kept.
+        """
+        if not os.path.exists(self.DIRECTORY):
+            return
+
+        with self._lock:
+            in_use = {
+                entry.index_path
+                for entry in self._entries.values()
+                if entry.users > 0
+            }
+
+        indexes = []
+        for filename in os.listdir(self.DIRECTORY):
+            if filename.endswith(".json"):
+                index_path = os.path.join(self.DIRECTORY, filename)
+                try:
+                    with open(index_path, "r") as f:
+                        ranges = json.loads(f.read()).get("ranges", [])
+                    size = sum(r_end - r_start for (r_start, r_end) in ranges)
+                    mtime = os.path.getmtime(index_path)
+                    indexes.append((mtime, index_path, size))
+                except (OSError, ValueError):
+                    continue
+
+        total = sum(size for (mtime, index_path, size) in indexes)
+        for (mtime, index_path, size) in sorted(indexes):
+            if total <= self._max_size:
+                break
+            if index_path in in_use:
+                continue
+            self._remove(index_path)
+            total -= size
+
+    def stop(self) -> None:
+        """Stop the local server, if it is running."""
+        if self._server is not None:
+            # the server belongs to the hub of its own thread
+            self._server_loop.run_callback_threadsafe(self._server.stop)
+            self._server = None
+
+    def entry(self, ep_id) -> StreamCacheEntry:
+        """Retrieve the entry for an episode given to playable().
+
+        :param ep_id the database id of the episode
+        :returns StreamCacheEntry: the entry, or None
+        """
+        with self._lock:
+            return self._entries.get(ep_id)
+
+    def _remove(self, index_path) -> None:
+        """Remove an entry's files from the cache.
+
+        :param index_path the path to the entry's index file
+        """
+        ep_id = int(os.path.basename(index_path).split(".")[0])
+        with self._lock:
+            self._entries.pop(ep_id, None)
+        part_path = os.path.join(self.DIRECTORY, "%d.part" % ep_id)
+        for path in (index_path, part_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _start(self) -> None:
+        """Start the local server, if it is not already running.
+
+        The server runs its own gevent hub in a separate thread, where each
+        connection is handled by a greenlet.
+        """
+        if self._server is None:
+            ready = threading.Event()
+            thread = threading.Thread(
+                target=self._serve,
+                args=[ready],
+                name="stream_cache",
+                daemon=True,
+            )
+            thread.start()
+            ready.wait()
+
+    def _serve(self, ready) -> None:
+        """Run the local server; the target of the server's thread.
+
+        :param ready a threading.Event to set once the server is listening
+        """
+        server = WSGIServer(
+            ("127.0.0.1", 0), self._application, log=None, error_log=None
+        )
+        server.start()
+        self._server = server
+        self._server_loop = get_hub().loop
+        ready.set()
+        server.serve_forever()
+
+    def _application(self, environ, start_response):
+        """The WSGI application of the local server.
+
+        Serves the media of the episode whose id is the requested path, or the
+        requested range of it.
+        """
+        try:
+            ep_id = int(environ.get("PATH_INFO", "").lstrip("/").split(".")[0])
+        except ValueError:
+            ep_id = None
+        entry = None if ep_id is None else self.entry(ep_id)
+        if entry is None:
+            start_response("404 Not Found", [])
+            return [b""]
+
+        # a single "bytes=start-" or "bytes=start-end" range; anything else
+        # is ignored and the whole media is served
+        start, end = 0, None
+        partial = False
+        header = environ.get("HTTP_RANGE", "")
+        if header.startswith("bytes="):
+            first, _, last = header[len("bytes="):].partition("-")
+            if first.isdigit() and (
+                last == "" or (last.isdigit() and int(last) >= int(first))
+            ):
+                start, end = int(first), int(last) if last else None
+                partial = True
+
+        upstream = None
+        if entry.length is None:
+            upstream = self._open_upstream(entry, start)
+            if entry.length is None:
+                # without a known length we can't serve ranges; let the player
+                # stream the media directly instead
+                _close_upstream(upstream)
+                start_response("302 Found", [("Location", entry.url)])
+                return [b""]
+
+        if start >= entry.length:
+            _close_upstream(upstream)
+            start_response(
+                "416 Range Not Satisfiable",
+                [("Content-Range", "bytes */%d" % entry.length)],
+            )
+            return [b""]
+
+        stop = entry.length if end is None else min(end + 1, entry.length)
+        headers = [
+            ("Accept-Ranges", "bytes"),
+            ("Content-Length", str(stop - start)),
+        ]
+        if partial:
+            content_range = "bytes %d-%d/%d" % (start, stop - 1, entry.length)
+            headers.append(("Content-Range", content_range))
+        start_response("206 Partial Content" if partial else "200 OK", headers)
+        return self._read_through(entry, start, stop, upstream)
+
+    def _read_through(self, entry, start, stop, upstream):
+        """Yield the media from start up to stop, filling gaps in the cache.
+
+        The player closing the connection (i.e. when it seeks) closes this
+        generator.
+
+        :param entry the StreamCacheEntry of the requested episode
+        :param start the offset of the first byte to yield
+        :param stop the offset after the last byte to yield
+        :param upstream (optional) a triple from _open_upstream, at start
+        """
+        entry.users += 1
+        try:
+            DataFile.ensure_path(entry.data_path)
+            with open(entry.data_path, "ab"):
+                pass  # ensure the file exists without truncating it
+            with open(entry.data_path, "r+b") as handle:
+                position = start
+                while position < stop:
+                    cached_end = entry.cached_until(position)
+                    if cached_end > position:
+                        _close_upstream(upstream)
+                        upstream = None
+                        handle.seek(position)
+                        length = min(cached_end, stop) - position
+                        chunk = handle.read(min(length, self.CHUNK_SIZE))
+                    else:
+                        if upstream is None or upstream[1] != position:
+                            _close_upstream(upstream)
+                            upstream = self._open_upstream(entry, position)
+                            if upstream is None:
+                                return
+                        chunk = next(upstream[0], b"")
+                        if chunk:
+                            # the whole chunk is cached, even past stop
+                            handle.seek(position)
+                            handle.write(chunk)
+                            entry.add_range(position, position + len(chunk))
+                            upstream = (
+                                upstream[0],
+                                position + len(chunk),
+                                upstream[2],
+                            )
+                            chunk = chunk[:stop - position]
+
+                    if not chunk:
+                        return
+                    yield chunk
+                    position += len(chunk)
+        except (OSError, requests.exceptions.RequestException):
+            return
+        finally:
+            _close_upstream(upstream)
+            entry.users -= 1
+            with self._lock:
+                cached = entry in self._entries.values()
+            if cached:  # i.e. it was not promoted in the meantime
+                entry.save()
+            self.evict()
+
+    def _open_upstream(self, entry, position):
+        """Request the media from its URL, starting at a position.
+
+        Sets the entry's length if it was not known.
+
+        :param entry the StreamCacheEntry of the requested episode
+        :param position the offset to start from
+        :returns: a (chunk iterator, position, response) triple, or None if
+          the request failed
+        """
+        try:
+            response = Net.Get(
+                entry.url,
+                stream=True,
+                headers={"Range": "bytes=%d-" % position},
+            )
+        except requests.exceptions.RequestException:
+            return None
+
+        if response.status_code == 206:
+            total = response.headers.get("Content-Range", "").split("/")[-1]
+        elif response.status_code == 200:
+            total = response.headers.get("Content-Length", "")
+        else:
+            response.close()
+            return None
+        if entry.length is None and total.isdigit():
+            entry.length = int(total)
+
+        chunks = response.iter_content(chunk_size=self.CHUNK_SIZE)
+        if response.status_code == 200 and position > 0:
+            # the server ignored the range, so skip to our position
+            skipped = 0
+            while skipped < position:
+                chunk = next(chunks, b"")
+                if not chunk:
+                    response.close()
+                    return None
+                if skipped + len(chunk) > position:
+                    chunks = _prepend(chunk[position - skipped:], chunks)
+                    break
+                skipped += len(chunk)
+
+        return (chunks, position, response)
+
+    @property
+    def enabled(self) -> bool:
+        """bool: whether streamed episodes are cached"""
+        return self._max_size > 0
+
+
+def _close_upstream(upstream):
+    """Close the response of an upstream triple, if there is one.
+
+    :param upstream a triple from StreamCache._open_upstream, or None
+    """
+    if upstream is not None:
+        upstream[2].close()
+
+
+def _prepend(first, rest):
+    """Yield an item followed by the items of an iterator."""
+    yield first
+    yield from rest
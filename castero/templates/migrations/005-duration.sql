@@ -0,0 +1,3 @@
+PRAGMA user_version=5;
+
+alter table episode add column duration integer;
@@ -0,0 +1,6 @@
+PRAGMA user_version=6;
+
+create table prefetch (
+    ep_id integer primary key,
+    FOREIGN KEY (ep_id) REFERENCES episode(id) ON DELETE CASCADE
+);
@@ -0,0 +1,5 @@
+PRAGMA user_version=7;
+
+alter table episode add column published integer;
+create index episode_published on episode (published, id);
+create index episode_played on episode (played);
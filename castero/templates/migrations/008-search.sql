@@ -0,0 +1,38 @@
+PRAGMA user_version=8;
+
+create virtual table episode_search using fts5 (
+    title,
+    description,
+    feed_title,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+insert into episode_search (rowid, title, description, feed_title)
+select episode.id, episode.title, episode.description, feed.title
+from episode left join feed on episode.feed_key=feed.key;
+
+create trigger episode_search_insert after insert on episode begin
+    delete from episode_search where rowid=new.id;
+    insert into episode_search (rowid, title, description, feed_title)
+    values (new.id, new.title, new.description, (select title from feed where key=new.feed_key));
+end;
+
+create trigger episode_search_update after update of title, description, feed_key on episode begin
+    delete from episode_search where rowid=old.id;
+    insert into episode_search (rowid, title, description, feed_title)
+    values (new.id, new.title, new.description, (select title from feed where key=new.feed_key));
+end;
+
+create trigger episode_search_delete after delete on episode begin
+    delete from episode_search where rowid=old.id;
+end;
+
+create trigger feed_search_insert after insert on feed begin
+    update episode_search set feed_title=new.title
+    where rowid in (select id from episode where feed_key=new.key);
+end;
+
+create trigger feed_search_update after update of title on feed begin
+    update episode_search set feed_title=new.title
+    where rowid in (select id from episode where feed_key=new.key);
+end;
@@ -0,0 +1,89 @@
+PRAGMA user_version=9;
+
+create index episode_feed_key on episode (feed_key, published);
+
+create table feed_stats (
+    feed_key    text primary key,
+    episodes    integer not null default 0,
+    unplayed    integer not null default 0,
+    newest      integer,
+    in_progress integer not null default 0,
+    FOREIGN KEY (feed_key) REFERENCES feed(key) ON DELETE CASCADE
+);
+
+insert into feed_stats (feed_key, episodes, unplayed, newest, in_progress)
+select feed.key,
+    (select count(*) from episode where feed_key=feed.key),
+    (select count(*) from episode where feed_key=feed.key and not played),
+    (select max(published) from episode where feed_key=feed.key),
+    (select count(*) from progress join episode on progress.ep_id=episode.id where episode.feed_key=feed.key)
+from feed;
+
+-- a feed's stats are counted when it is inserted; updating an existing feed
+-- (see Database.replace_feed) doesn't fire this, so they are kept
+create trigger feed_stats_feed_insert after insert on feed begin
+    replace into feed_stats (feed_key, episodes, unplayed, newest, in_progress)
+    values (
+        new.key,
+        (select count(*) from episode where feed_key=new.key),
+        (select count(*) from episode where feed_key=new.key and not played),
+        (select max(published) from episode where feed_key=new.key),
+        (select count(*) from progress join episode on progress.ep_id=episode.id where episode.feed_key=new.key)
+    );
+end;
+
+create trigger feed_stats_feed_delete after delete on feed begin
+    delete from feed_stats where feed_key=old.key;
+end;
+
+create trigger feed_stats_episode_insert after insert on episode begin
+    update feed_stats set
+        episodes=episodes + 1,
+        unplayed=unplayed + (not new.played),
+        newest=case when newest is null or new.published > newest then new.published else newest end
+    where feed_key=new.feed_key;
+end;
+
+create trigger feed_stats_episode_delete after delete on episode begin
+    update feed_stats set
+        episodes=episodes - 1,
+        unplayed=unplayed - (not old.played),
+        newest=case when old.published >= newest then (select max(published) from episode where feed_key=old.feed_key) else newest end,
+        in_progress=(select count(*) from progress join episode on progress.ep_id=episode.id where episode.feed_key=old.feed_key)
+    where feed_key=old.feed_key;
+end;
+
+create trigger feed_stats_episode_played after update of played on episode
+when new.feed_key is old.feed_key and (not new.played) != (not old.played) begin
+    update feed_stats set unplayed=unplayed + (case when new.played then -1 else 1 end)
+    where feed_key=new.feed_key;
+end;
+
+create trigger feed_stats_episode_published after update of published on episode
+when new.feed_key is old.feed_key and new.published is not old.published begin
+    update feed_stats set newest=(select max(published) from episode where feed_key=new.feed_key)
+    where feed_key=new.feed_key;
+end;
+
+create trigger feed_stats_episode_feed after update of feed_key on episode
+when new.feed_key is not old.feed_key begin
+    update feed_stats set
+        episodes=(select count(*) from episode where feed_key=feed_stats.feed_key),
+        unplayed=(select count(*) from episode where feed_key=feed_stats.feed_key and not played),
+        newest=(select max(published) from episode where feed_key=feed_stats.feed_key),
+        in_progress=(select count(*) from progress join episode on progress.ep_id=episode.id where episode.feed_key=feed_stats.feed_key)
+    where feed_key in (old.feed_key, new.feed_key);
+end;
+
+-- progress is written with replace, which doesn't fire delete triggers, so
+-- it is counted again rather than incremented
+create trigger feed_stats_progress_insert after insert on progress begin
+    update feed_stats set
+        in_progress=(select count(*) from progress join episode on progress.ep_id=episode.id where episode.feed_key=feed_stats.feed_key)
+    where feed_key=(select feed_key from episode where id=new.ep_id);
+end;
+
+create trigger feed_stats_progress_delete after delete on progress begin
+    update feed_stats set in_progress=in_progress - 1
+    where feed_key=(select feed_key from episode where id=old.ep_id);
+end;
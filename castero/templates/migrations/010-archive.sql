@@ -0,0 +1,51 @@
+PRAGMA user_version=10;
+
+-- episodes are archived by moving them here (see Database.archive_played).
+-- archived episodes are deleted with their feed by a trigger rather than on
+-- delete cascade, since triggers also fire on connections which don't enable
+-- foreign keys, such as the one which migrates the database
+create table episode_archive (
+    id          integer primary key,
+    feed_key    text,
+    title       text,
+    description text,
+    link        text,
+    pubdate     text,
+    copyright   text,
+    enclosure   text,
+    played      integer,
+    duration    integer,
+    published   integer
+);
+
+create index episode_archive_feed_key on episode_archive (feed_key);
+
+create trigger episode_archive_feed_delete after delete on feed begin
+    delete from episode_archive where feed_key=old.key;
+end;
+
+-- archived episodes stay searchable, with negated ids so that they are never
+-- matched to episodes in the episode table
+create trigger episode_archive_search_insert after insert on episode_archive begin
+    insert into episode_search (rowid, title, description, feed_title)
+    values (-new.id, new.title, new.description, (select title from feed where key=new.feed_key));
+end;
+
+create trigger episode_archive_search_delete after delete on episode_archive begin
+    delete from episode_search where rowid=-old.id;
+end;
+
+drop trigger feed_search_insert;
+drop trigger feed_search_update;
+
+create trigger feed_search_insert after insert on feed begin
+    update episode_search set feed_title=new.title
+    where rowid in (select id from episode where feed_key=new.key)
+        or rowid in (select -id from episode_archive where feed_key=new.key);
+end;
+
+create trigger feed_search_update after update of title on feed begin
+    update episode_search set feed_title=new.title
+    where rowid in (select id from episode where feed_key=new.key)
+        or rowid in (select -id from episode_archive where feed_key=new.key);
+end;
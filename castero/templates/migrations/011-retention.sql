@@ -0,0 +1,17 @@
+PRAGMA user_version=11;
+
+-- per-feed overrides of the retention settings in the config, where null
+-- columns use the config's (see Database.enforce_retention). as with the
+-- archive, overrides are deleted with their feed by a trigger rather than on
+-- delete cascade, which only applies where foreign keys are enabled
+create table retention (
+    feed_key       text primary key,
+    max_episodes   integer,
+    max_age        integer,
+    keep_unplayed  integer,
+    download_quota integer
+);
+
+create trigger retention_feed_delete after delete on feed begin
+    delete from retention where feed_key=old.key;
+end;
@@ -0,0 +1,8 @@
+PRAGMA user_version=12;
+
+-- descriptions as plain text, converted from their html once when they are
+-- stored rather than each time they are shown (see helpers.html_to_plain).
+-- rows stored before this are converted when the database is next opened
+alter table feed add column plain_description text;
+alter table episode add column plain_description text;
+alter table episode_archive add column plain_description text;
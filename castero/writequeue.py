@@ -0,0 +1,115 @@
+import atexit
+import collections
+import sqlite3
+import threading
+
+
+class WriteQueue:
+    """A write-behind queue of modified episodes.
+
+    Episodes which are modified by the client are added here rather than being
+    written to the database right away. Modifications are merged by episode,
+    so that only the latest state of each episode is written, no matter how
+    many times it was modified.
+
+    Pending episodes are written by a background thread in a single
+    transaction when flush() is called, and synchronously when the queue is
+    closed or the process exits.
+    """
+
+    def __init__(self, database) -> None:
+        """
+        :param database the Database to write episodes to
+        """
+        self._database = database
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="write_behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __contains__(self, episode) -> bool:
+        with self._lock:
+            return self._pending.get(self._key(episode)) is episode
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def append(self, episode) -> None:
+        """Add a modified episode to the queue.
+
+        If the episode is already pending, it is written only once, in its
+        latest state.
+
+        :param episode the modified Episode
+        """
+        with self._lock:
+            key = self._key(episode)
+            self._pending.pop(key, None)
+            self._pending[key] = episode
+
+    def extend(self, episodes) -> None:
+        """Add a list of modified episodes to the queue.
+
+        :param episodes the modified Episodes
+        """
+        for episode in episodes:
+            self.append(episode)
+
+    def flush(self) -> None:
+        """Have the background thread write all pending episodes."""
+        self._wake.set()
+
+    def close(self) -> None:
+        """Stop the background thread and write any pending episodes.
+
+        This method is safe to call more than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # don't keep the queue, and with it its database, alive until exit
+        atexit.unregister(self.close)
+        self._wake.set()
+        self._thread.join()
+        self._write()
+
+    def _run(self) -> None:
+        """Write pending episodes whenever flush() is called; the target of
+        the background thread.
+        """
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._closed:
+                self._write()
+
+    def _write(self) -> None:
+        """Write all pending episodes in a single transaction."""
+        with self._lock:
+            episodes = list(self._pending.values())
+            self._pending.clear()
+        if len(episodes) > 0:
+            try:
+                self._database.save_episodes(episodes)
+            except sqlite3.Error:
+                # i.e. the database was already closed; the episodes are
+                # still modified in memory, and will be written again if they
+                # are modified again
+                pass
+
+    @staticmethod
+    def _key(episode) -> object:
+        """Get the key which modifications to an episode are merged by.
+
+        :param episode the Episode
+        :returns object: the episode's database id, or the episode itself if
+          it is not in the database
+        """
+        return episode if episode.ep_id is None else episode.ep_id
@@ -7,7 +7,6 @@ install_requires = [
     'grequests',
     'cjkwrap',
     'pytz',
-    'beautifulsoup4',
     'lxml',
     'python-vlc',
     'python-mpv'
@@ -1,12 +1,17 @@
 import os
+import threading
 from shutil import copyfile
 from unittest import mock
 
+from castero import helpers
+from castero.config import Config
 from castero.episode import Episode
+from castero.episodeindex import EpisodeIndex
 from castero.feed import Feed
-from castero.database import Database
+from castero.database import Database, Retention
 from castero.queue import Queue
 from castero.player import Player
+from castero.writequeue import WriteQueue
 
 my_dir = os.path.dirname(os.path.realpath(__file__))
 
@@ -227,6 +232,78 @@ def test_database_reload(prevent_modification, display):
     assert mydatabase.feeds()[0].title == real_title
 
 
+def test_database_reload_keeps_queue(prevent_modification):
+    mydatabase = Database()
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    mydatabase.replace_feed(feed)
+    mydatabase.replace_episodes(feed, feed.parse_episodes())
+    episode = mydatabase.episodes(feed)[0]
+    mydatabase.append_queue([episode])
+    mydatabase.replace_progress(episode, 1000)
+
+    # reloading the feed updates its rows rather than replacing them
+    mydatabase._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    entries = mydatabase.queue_entries()
+    assert [entry.ep_id for (key, entry) in entries] == [episode.ep_id]
+    assert mydatabase.episode(episode.ep_id).progress == 1000
+
+
+def test_database_reload_after_crash(prevent_modification):
+    Config.data.update({"restrict_memory_usage": "False"})
+    mydatabase = Database()
+    for path in ("/feeds/valid_basic.xml", "/feeds/valid_complete.xml"):
+        feed = Feed(file=my_dir + path)
+        mydatabase.replace_feed(feed)
+        mydatabase._reload_feed_data(feed, Feed(file=my_dir + path))
+    feed = mydatabase.feed(my_dir + "/feeds/valid_complete.xml")
+    episode = mydatabase.episodes(feed)[1]
+    mydatabase.append_queue([episode])
+
+    # the database is not closed, so only what was written to the file
+    # remains; its queue must still refer to the same episode
+    crashed = Database()
+    assert crashed._file_conn.execute("pragma foreign_keys").fetchone()[0] == 1
+    [queued] = crashed.queue()
+    assert (queued.ep_id, str(queued), queued._feed.key) == (
+        episode.ep_id,
+        str(episode),
+        episode._feed.key,
+    )
+
+    crashed.reload()
+    [queued] = crashed.queue()
+    assert (queued.ep_id, str(queued), queued._feed.key) == (
+        episode.ep_id,
+        str(episode),
+        episode._feed.key,
+    )
+
+
+def test_database_writequeue_survives_crash(prevent_modification):
+    database = Database()
+    feeds = [
+        Feed(file=my_dir + path)
+        for path in ("/feeds/valid_basic.xml", "/feeds/valid_complete.xml")
+    ]
+    for reloaded in feeds:
+        database.replace_feed(reloaded)
+        database._reload_feed_data(reloaded, Feed(file=reloaded.key))
+    episode = database.episodes(feeds[1])[1]
+    episode.played = True
+    mywritequeue = WriteQueue(database)
+    mywritequeue.append(episode)
+    mywritequeue.close()
+
+    # the database is not closed; the written state is found on the same
+    # episode in the file, also once its feeds are reloaded
+    crashed = Database()
+    crashed.reload()
+    played = [(e._feed.key, str(e)) for e in crashed.episodes() if e.played]
+    assert played == [(feeds[1].key, str(episode))]
+
+
 def test_database_replace_queue(display):
     copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
     mydatabase = Database()
@@ -277,6 +354,110 @@ def test_database_replace_queue_with_deleted_episode(display):
     assert len(mydatabase.queue()) == 0
 
 
+def test_database_append_queue(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    episode1 = mydatabase.episodes(mydatabase.feeds()[0])[0]
+    episode2 = mydatabase.episodes(mydatabase.feeds()[1])[0]
+    [key1] = mydatabase.append_queue([episode1])
+    [key2] = mydatabase.append_queue([episode2])
+
+    assert key2 > key1
+    entries = mydatabase.queue_entries()
+    assert [key for (key, episode) in entries] == [key1, key2]
+    assert [episode.ep_id for (key, episode) in entries] == [
+        episode1.ep_id,
+        episode2.ep_id,
+    ]
+
+
+def test_database_append_queue_many(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    feed = mydatabase.feeds()[0]
+    episodes = mydatabase.episodes(feed)
+    keys = mydatabase.append_queue(episodes)
+
+    assert keys == sorted(keys) and len(set(keys)) == len(episodes)
+    assert [key for (key, episode) in mydatabase.queue_entries()] == keys
+    assert [episode.ep_id for episode in Database().queue()] == [
+        episode.ep_id for episode in episodes
+    ]
+
+
+def test_database_append_queue_deleted_episode(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    feed = mydatabase.feeds()[0]
+    episode = mydatabase.episodes(feed)[0]
+    mydatabase.delete_feed(feed)
+
+    assert mydatabase.append_queue([episode]) == [None]
+    assert len(mydatabase.queue()) == 0
+
+
+def test_database_remove_queue(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    episode1 = mydatabase.episodes(mydatabase.feeds()[0])[0]
+    episode2 = mydatabase.episodes(mydatabase.feeds()[1])[0]
+    [key1] = mydatabase.append_queue([episode1])
+    mydatabase.append_queue([episode2])
+
+    mydatabase.remove_queue(key1)
+    queue = mydatabase.queue()
+    assert len(queue) == 1
+    assert queue[0].ep_id == episode2.ep_id
+
+
+def test_database_queue_durable(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    feed = mydatabase.feeds()[0]
+    episode = mydatabase.episodes(feed)[0]
+    mydatabase.append_queue([episode])
+
+    # the database is not closed, as if the application had crashed
+    otherdatabase = Database()
+    assert len(otherdatabase.queue()) == 1
+
+
+def test_database_replace_episode_keeps_queue(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    feed = mydatabase.feeds()[0]
+    episode = mydatabase.episodes(feed)[0]
+    mydatabase.append_queue([episode])
+    episode.played = True
+    mydatabase.replace_episode(feed, episode)
+
+    queue = mydatabase.queue()
+    assert len(queue) == 1
+    assert queue[0].played
+
+
+def test_database_replace_episode_duration(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+
+    feed = mydatabase.feeds()[0]
+    episode = mydatabase.episodes(feed)[0]
+    episode.duration = 60000
+    mydatabase.replace_episode(feed, episode)
+    assert mydatabase.episode(episode.ep_id).duration == 60000
+
+    # an unknown duration does not overwrite the stored one
+    episode.duration = None
+    mydatabase.replace_episode(feed, episode)
+    assert mydatabase.episode(episode.ep_id).duration == 60000
+
+
 def test_database_from_json(prevent_modification):
     copyfile(my_dir + "/datafiles/feeds_working", Database.OLD_PATH)
     mydatabase = Database()
@@ -317,3 +498,589 @@ def test_database_from_json(prevent_modification):
     assert episodes1[0].copyright == "episode copyright"
     assert episodes1[0].enclosure == "episode enclosure"
     assert not episodes1[0].played
+
+
+def test_database_prefetch(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+    episode = mydatabase.episodes()[0]
+    assert not mydatabase.prefetched(episode)
+    mydatabase.add_prefetch(episode)
+    assert mydatabase.prefetched(episode)
+    mydatabase.remove_prefetch([episode])
+    assert not mydatabase.prefetched(episode)
+
+
+def test_database_remove_prefetch_bulk(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+    episodes = mydatabase.episodes()
+    assert len(episodes) == 2
+    for episode in episodes:
+        mydatabase.add_prefetch(episode)
+    mydatabase.remove_prefetch(episodes)
+    assert not any(mydatabase.prefetched(episode) for episode in episodes)
+
+    # the removal was written to the file
+    reloaded = Database()
+    assert not any(reloaded.prefetched(episode) for episode in episodes)
+
+
+def test_database_remove_prefetch_keeps_others(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+    episodes = mydatabase.episodes()
+    for episode in episodes:
+        mydatabase.add_prefetch(episode)
+    mydatabase.remove_prefetch(episodes[:1])
+    assert not mydatabase.prefetched(episodes[0])
+    assert mydatabase.prefetched(episodes[1])
+    mydatabase.remove_prefetch([])
+    assert mydatabase.prefetched(episodes[1])
+
+
+def test_database_save_episodes(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+    episodes = mydatabase.episodes()
+    episodes[0].played = True
+    episodes[0].progress = 1000
+    episodes[1].progress = 2000
+    mydatabase.save_episodes(episodes)
+    mydatabase.close()
+
+    mydatabase = Database()
+    assert mydatabase.episode(episodes[0].ep_id).played
+    assert mydatabase.episode(episodes[0].ep_id).progress == 1000
+    assert mydatabase.episode(episodes[1].ep_id).progress == 2000
+
+    episodes[1].progress = None
+    mydatabase.save_episodes([episodes[1]])
+    assert mydatabase.episode(episodes[1].ep_id).progress == 0
+
+
+def test_database_bulk_played_and_progress(prevent_modification):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    mydatabase = Database()
+    feeds = mydatabase.feeds()
+    ep_ids = [mydatabase.episodes(feed)[0].ep_id for feed in feeds]
+    for ep_id in ep_ids:
+        mydatabase.replace_progress(mydatabase.episode(ep_id), 1000)
+
+    mydatabase.mark_played(True, feed=feeds[0])
+    assert mydatabase.episode(ep_ids[0]).played
+    assert not mydatabase.episode(ep_ids[1]).played
+    mydatabase.toggle_played(ep_ids=ep_ids)
+    assert not mydatabase.episode(ep_ids[0]).played
+    assert mydatabase.episode(ep_ids[1]).played
+    mydatabase.mark_played(False, ep_ids=[])
+
+    mydatabase.clear_progress(feed=feeds[1])
+    assert mydatabase.episode(ep_ids[0]).progress == 1000
+    assert mydatabase.episode(ep_ids[1]).progress == 0
+    mydatabase.clear_progress(ep_ids=ep_ids)
+    assert mydatabase.episode(ep_ids[0]).progress == 0
+
+
+def _database_with_dated_episodes(count):
+    feed = Feed(
+        url="feed url",
+        title="feed title",
+        description="feed description",
+        link="feed link",
+        last_build_date="feed last_build_date",
+        copyright="feed copyright",
+        episodes=[],
+    )
+    episodes = [
+        Episode(
+            feed,
+            title="episode %d" % i,
+            pubdate="Thu, %02d Jan 2015 00:00:00 +0000" % (1 + i // 2),
+            played=i % 3 == 0,
+        )
+        for i in range(count)
+    ]
+    mydatabase = Database()
+    mydatabase.replace_feed(feed)
+    mydatabase.replace_episodes(feed, episodes)
+    return mydatabase, episodes
+
+
+def test_database_episodes_page(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    # newest first; episodes published at the same time are in id order
+    expected = ["episode %d" % i for i in (6, 4, 5, 2, 3, 0, 1)]
+
+    titles = []
+    after = None
+    while True:
+        page = mydatabase.episodes_page(after, limit=3)
+        if len(page) == 0:
+            break
+        titles.extend(episode.title for (key, episode) in page)
+        after = page[-1][0]
+    assert titles == expected
+
+    page = mydatabase.episodes_page(limit=10, descending=False)
+    ascending = [episode.title for (key, episode) in page]
+    assert ascending == [episode.title for episode in episodes]
+
+    filtered = mydatabase.episodes_page(limit=10, filter_text="episode 6")
+    assert [episode.title for (key, episode) in filtered] == ["episode 6"]
+
+
+def test_database_episode_index(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    index = mydatabase.episode_index(wait=True)
+    assert len(index) == 7
+
+    selection = index.select()
+    titles = [episode.title for episode in selection.episodes(0, 7)]
+    assert titles == ["episode %d" % i for i in (6, 4, 5, 2, 3, 0, 1)]
+    assert selection[0].title == "episode 6"
+    assert selection.unplayed == 4
+    ascending = index.select(descending=False)
+    titles = [episode.title for episode in ascending.episodes(0, 7)]
+    assert titles == [episode.title for episode in episodes]
+    filtered = index.select(filter_text="episode 6")
+    assert [episode.title for episode in filtered.episodes(0, 7)] == [
+        "episode 6"
+    ]
+
+    # writes are applied to the index rather than indexing again
+    mydatabase.mark_played(True, feed=episodes[0]._feed)
+    assert mydatabase.episode_index() is index
+    assert index.select().unplayed == 0
+    mydatabase.toggle_played(ep_ids=[selection[0].ep_id])
+    assert selection.unplayed == 1
+    mydatabase.replace_progress(selection[1], 1000)
+    assert index._progress[1] == 1000
+
+    feed = episodes[0]._feed
+    newest = Episode(
+        feed, title="newest", pubdate="Thu, 01 Jan 2099 00:00:00 +0000"
+    )
+    mydatabase.replace_episodes(feed, [newest])
+    date = "Sat, 03 Jan 2015 00:00:00 +0000"
+    mydatabase.archive_played(helpers.timestamp_from_rfc822(date))
+    assert mydatabase.episode_index() is index
+    titles = [episode.title for episode in index.select().episodes(0, 8)]
+    assert titles == ["newest", "episode 6", "episode 4", "episode 5"]
+    assert index.select().unplayed == 2
+    # selections keep their episodes
+    assert selection.unplayed == 1 and selection[0].title == "episode 6"
+
+    # the index matches one created again
+    mydatabase.restore_archived(feed=feed)
+    rows = mydatabase._conn.execute(Database.SQL_EPISODE_INDEX).fetchall()
+    created = EpisodeIndex(mydatabase, rows)
+    for column in (
+        "_ids",
+        "_published",
+        "_played",
+        "_progress",
+        "_titles",
+        "_sorted_ids",
+    ):
+        assert getattr(index, column) == getattr(created, column)
+
+    mydatabase.delete_feed(feed)
+    assert mydatabase.episode_index() is index
+    assert len(index) == 0
+
+
+def test_database_episodes_count(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    assert mydatabase.episodes_count() == (7, 4)
+    assert mydatabase.episodes_count("episode 3") == (1, 0)
+    assert mydatabase.episodes_count("nothing") == (0, 0)
+
+
+def test_database_search(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(3)
+    feed = mydatabase.feeds()[0]
+    episode = mydatabase.episodes(feed)[1]
+    mydatabase.replace_episode(
+        feed,
+        Episode(
+            feed,
+            ep_id=episode.ep_id,
+            title=episode.title,
+            description="all about cats",
+        ),
+    )
+
+    found = mydatabase.search("episode 2")
+    assert [episode.title for episode in found] == ["episode 2"]
+    found = mydatabase.search("ca")
+    assert [episode.title for episode in found] == ["episode 1"]
+    assert len(mydatabase.search("feed titl")) == 3
+    assert mydatabase.search('"unbalanced') == []
+    assert mydatabase.search("   ") == []
+
+    mydatabase.delete_feed(feed)
+    assert mydatabase.search("episode") == []
+
+
+def test_database_archive_played(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    feed = mydatabase.feeds()[0]
+    episodes = {
+        episode.title: episode for episode in mydatabase.episodes(feed)
+    }
+    # queued episodes aren't archived
+    mydatabase.append_queue([episodes["episode 0"]])
+    before = helpers.timestamp_from_rfc822("Thu, 04 Jan 2015 00:00:00 +0000")
+    assert mydatabase.archive_played(before) == 1
+    titles = [episode.title for episode in mydatabase.episodes(feed)]
+    assert "episode 3" not in titles
+    assert mydatabase.feed_stats(feed).episodes == 6
+    assert mydatabase.archive_played(before) == 0
+
+    # archived episodes can be found and restored by search, or by feed
+    assert mydatabase.search("episode 3") == []
+    assert mydatabase.restore_archived(text="episode 3") == 1
+    found = mydatabase.search("episode 3")
+    assert [episode.title for episode in found] == ["episode 3"]
+    assert mydatabase.restore_archived(feed=feed) == 0
+    assert len(mydatabase.episodes(feed)) == 7
+
+
+def test_database_archive_unknown_published(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(1)
+    feed = mydatabase.feeds()[0]
+    mydatabase.replace_episodes(
+        feed,
+        [Episode(feed, title="undated", pubdate="not a date", played=True)],
+    )
+    before = helpers.timestamp_from_rfc822("Thu, 01 Jan 2015 00:00:00 +0000")
+    assert mydatabase.archive_played(before) == 0
+
+
+def test_database_restore_archived_ids(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    feed = mydatabase.feeds()[0]
+    before = helpers.timestamp_from_rfc822("Thu, 04 Jan 2015 00:00:00 +0000")
+    assert mydatabase.archive_played(before) == 2
+    mydatabase._copy_database(mydatabase._conn, mydatabase._file_conn)
+    pubdate = "Thu, 01 Jan 2099 00:00:00 +0000"
+    mydatabase.replace_episodes(
+        feed, [Episode(feed, title="newer", pubdate=pubdate)]
+    )
+
+    # the file doesn't have the newer episode, but the restored episode has
+    # the same id there
+    assert mydatabase.restore_archived(text="episode 3") == 1
+    query = "select id from episode where title='episode 3'"
+    restored = mydatabase._conn.execute(query).fetchone()
+    assert mydatabase._file_conn.execute(query).fetchone() == restored
+
+
+def _dated_basic_feed():
+    # the basic feed's episodes have no pubdates, and undated episodes are
+    # never archived
+    with open(my_dir + "/feeds/valid_basic.xml", "rb") as f:
+        text = f.read().replace(
+            b"<enclosure",
+            b"<pubDate>Thu, 01 Jan 2015 00:00:00 +0000</pubDate><enclosure",
+        )
+    return Feed(file=my_dir + "/feeds/valid_basic.xml", text=text)
+
+
+def test_database_archive_reload(prevent_modification):
+    mydatabase = Database()
+    feed = _dated_basic_feed()
+    mydatabase.replace_feed(feed)
+    mydatabase.replace_episodes(feed, feed.parse_episodes())
+    mydatabase.mark_played(True, feed=feed)
+    before = helpers.timestamp_from_rfc822("Thu, 01 Jan 2099 00:00:00 +0000")
+    assert mydatabase.archive_played(before) > 0
+
+    # archived episodes are not added again, and survive the feed being
+    # replaced
+    mydatabase._reload_feed_data(feed, _dated_basic_feed())
+    assert mydatabase.episodes(feed) == []
+    assert len(mydatabase.search("feed")) == 0
+    assert mydatabase.restore_archived(feed=feed) > 0
+
+    mydatabase.mark_played(True, feed=feed)
+    mydatabase.archive_played(before)
+    mydatabase.delete_feed(feed)
+    assert mydatabase.restore_archived(feed=feed) == 0
+
+
+def test_database_enforce_retention(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    feed = mydatabase.feeds()[0]
+    assert mydatabase.enforce_retention() == 0
+
+    # the newest episodes are kept, along with unplayed and queued episodes
+    Config.data.update(
+        {"max_episodes": "3", "retain_unplayed_episodes": "True"}
+    )
+    episodes = {
+        episode.title: episode for episode in mydatabase.episodes(feed)
+    }
+    mydatabase.append_queue([episodes["episode 0"]])
+    assert mydatabase.enforce_retention() == 1
+    titles = [episode.title for episode in mydatabase.episodes(feed)]
+    assert "episode 3" not in titles
+    assert mydatabase.feed_stats(feed).episodes == 6
+
+    # a feed's rules override the config's
+    Config.data.update({"max_episodes": "-1", "max_episode_age": "1"})
+    mydatabase.replace_retention(feed, Retention(None, None, False, None))
+    assert mydatabase.retention(feed) == (None, None, False, None)
+    assert mydatabase.enforce_retention() == 5
+    titles = [episode.title for episode in mydatabase.episodes(feed)]
+    assert titles == ["episode 0"]
+
+    mydatabase.delete_feed(feed)
+    assert mydatabase.retention(feed) == (None, None, None, None)
+
+
+def test_database_enforce_retention_by_id(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(4)
+    mydatabase._copy_database(mydatabase._conn, mydatabase._file_conn)
+    feed = mydatabase.feeds()[0]
+    pubdate = "Thu, 01 Jan 2099 00:00:00 +0000"
+    newer = [
+        Episode(feed, title="newer %d" % i, pubdate=pubdate) for i in range(2)
+    ]
+    mydatabase.replace_episodes(feed, newer)
+
+    # the file loses the same episodes
+    Config.data.update({"max_episodes": "2"})
+    assert mydatabase.enforce_retention() == 4
+    remaining = "select id from episode order by id"
+    remaining_ids = mydatabase._conn.execute(remaining).fetchall()
+    assert mydatabase._file_conn.execute(remaining).fetchall() == remaining_ids
+    assert [episode.ep_id for episode in newer] == [
+        row[0] for row in remaining_ids
+    ]
+
+
+def test_database_reload_retain_absent(prevent_modification):
+    mydatabase = Database()
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    mydatabase.replace_feed(feed)
+    absent = Episode(feed, title="absent", description="d")
+    mydatabase.replace_episodes(feed, feed.parse_episodes() + [absent])
+
+    Config.data.update({"retain_absent_episodes": "True"})
+    mydatabase._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    absent = [
+        episode
+        for episode in mydatabase.episodes(feed)
+        if episode.title == "absent"
+    ]
+    assert len(absent) == 1 and absent[0].description == "d"
+
+    Config.data.update({"retain_absent_episodes": "False"})
+    mydatabase._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    titles = [episode.title for episode in mydatabase.episodes(feed)]
+    assert "absent" not in titles
+
+
+def test_database_feed_stats(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(7)
+    feed = mydatabase.feeds()[0]
+    date = "Thu, 04 Jan 2015 00:00:00 +0000"
+    published = helpers.timestamp_from_rfc822(date)
+    assert mydatabase.feed_stats(feed) == (7, 4, published, 0)
+    assert mydatabase.all_feed_stats() == {feed.key: (7, 4, published, 0)}
+    assert mydatabase.feeds_count() == 1
+
+    feed_episodes = mydatabase.episodes(feed)
+    mydatabase.toggle_played(
+        ep_ids=[feed_episodes[0].ep_id, feed_episodes[1].ep_id]
+    )
+    feed_episodes[2].progress = 1000
+    feed_episodes[2].progress = 2000
+    mydatabase.save_episodes([feed_episodes[2]])
+    assert mydatabase.feed_stats(feed) == (7, 4, published, 1)
+
+    mydatabase.clear_progress(feed=feed)
+    assert mydatabase.feed_stats(feed).in_progress == 0
+
+    mydatabase.delete_feed(feed)
+    assert mydatabase.feed_stats(feed) is None
+    assert mydatabase.feeds_count() == 0
+
+
+def test_database_feeds_by_newest(prevent_modification):
+    mydatabase = Database()
+    for title, day in (("a older", 1), ("b newer", 2)):
+        feed = Feed(
+            url="url %s" % title,
+            title=title,
+            description="",
+            link="",
+            last_build_date="",
+            copyright="",
+            episodes=[],
+        )
+        mydatabase.replace_feed(feed)
+        pubdate = "Thu, %02d Jan 2015 00:00:00 +0000" % day
+        mydatabase.replace_episodes(
+            feed, [Episode(feed, title="e", pubdate=pubdate)]
+        )
+
+    titles = [feed.title for feed in mydatabase.feeds()]
+    assert titles == ["a older", "b newer"]
+    Config.data.update({"feed_order": "newest"})
+    titles = [feed.title for feed in mydatabase.feeds()]
+    assert titles == ["b newer", "a older"]
+
+
+def test_database_episode_details_loaded_lazily(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(1)
+    feed = mydatabase.feeds()[0]
+    mydatabase.replace_episodes(
+        feed,
+        [
+            Episode(
+                feed,
+                title="titled",
+                description="long notes",
+                copyright="notice",
+            )
+        ],
+    )
+    episode = [
+        episode
+        for episode in mydatabase.episodes(feed)
+        if episode.title == "titled"
+    ][0]
+    assert episode._description is None and episode._copyright is None
+
+    with mock.patch.object(
+        mydatabase, "episode_details", wraps=mydatabase.episode_details
+    ) as details:
+        episode._details = details
+        assert episode.description == "long notes"
+        assert episode.copyright == "notice"
+        assert details.call_count == 1
+
+    # saving the episode's state doesn't overwrite the details it didn't load
+    other = [
+        episode
+        for episode in mydatabase.episodes(feed)
+        if episode.title == "titled"
+    ][0]
+    other.played = True
+    mydatabase.save_episodes([other])
+    assert mydatabase.episode_details(other.ep_id) == (
+        "long notes",
+        "long notes",
+        "notice",
+    )
+
+
+def test_database_plain_descriptions(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(1)
+    feed = mydatabase.feeds()[0]
+    description = "<p>long <b>notes</b></p>"
+    mydatabase.replace_episodes(
+        feed, [Episode(feed, title="html", description=description)]
+    )
+    episode = [
+        episode
+        for episode in mydatabase.episodes(feed)
+        if episode.title == "html"
+    ][0]
+    assert mydatabase.episode_details(episode.ep_id)[1] == "long notes"
+    assert mydatabase.feed(feed.key).plain_description == "feed description"
+
+    # descriptions stored before plain text was recorded are converted on
+    # opening
+    mydatabase._conn.execute("update episode set plain_description=null")
+    mydatabase._fill_plain_descriptions()
+    assert mydatabase.episode_details(episode.ep_id)[1] == "long notes"
+
+
+def test_database_writes_hold_write_lock(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(1)
+    episode = mydatabase.episodes()[0]
+    written = threading.Event()
+
+    # a write from another thread waits for a batch to finish
+    with mydatabase._write_lock:
+        thread = threading.Thread(
+            target=lambda: (mydatabase.save_episodes([episode]), written.set())
+        )
+        thread.start()
+        assert not written.wait(timeout=0.2)
+    assert written.wait(timeout=5)
+    thread.join()
+
+
+def test_database_feeds_interned(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(2)
+    feed = mydatabase.feeds()[0]
+    assert mydatabase.feed(feed.key) is feed
+    assert all(episode._feed is feed for episode in mydatabase.episodes())
+    page = mydatabase.episodes_page()
+    assert all(episode._feed is feed for (key, episode) in page)
+
+    held = mydatabase.episodes()
+    mydatabase.replace_feed(feed)
+    assert mydatabase.feed(feed.key) is not feed
+    assert all(episode._feed is mydatabase.feed(feed.key) for episode in held)
+
+
+def test_database_episodes_shared(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(2)
+    episode = mydatabase.episodes()[0]
+    assert mydatabase.episode(episode.ep_id) is episode
+    page = mydatabase.episodes_page()
+    assert episode in [episode for (key, episode) in page]
+
+    # bulk writes update the shared instance
+    mydatabase.mark_played(True, ep_ids=[episode.ep_id])
+    assert mydatabase.episode(episode.ep_id) is episode
+    assert episode.played
+
+    # so do other writes of its row
+    copy = Episode(
+        episode._feed, ep_id=episode.ep_id, title="new title", played=True
+    )
+    mydatabase.replace_episodes(episode._feed, [copy])
+    assert mydatabase.episode(episode.ep_id) is episode
+    assert str(episode) == "new title"
+
+
+def test_database_changes_since(prevent_modification):
+    mydatabase, episodes = _database_with_dated_episodes(3)
+    episodes = mydatabase.episodes()
+    feed = episodes[0]._feed
+    version = mydatabase.version()
+    assert mydatabase.version("episode") == version
+    assert mydatabase.changes_since(version) == (set(), set(), set())
+
+    mydatabase.toggle_played(ep_ids=[episodes[0].ep_id])
+    mydatabase.clear_progress(feed=feed)
+    progress_version = mydatabase.version("progress")
+    assert progress_version == mydatabase.version()
+    assert progress_version > mydatabase.version("episode") > version
+    changes = mydatabase.changes_since(version)
+    assert changes.tables == {"episode", "progress"}
+    assert changes.feed_keys == {feed.key}
+    assert changes.ep_ids == {episode.ep_id for episode in episodes}
+
+    # added or removed rows aren't listed
+    mydatabase.replace_episodes(feed, episodes[:1])
+    changes = mydatabase.changes_since(version)
+    assert changes.feed_keys is None and changes.ep_ids is None
+
+    # nor are changes older than the log
+    version = mydatabase.version()
+    for i in range(Database.MAX_LOGGED_CHANGES + 1):
+        mydatabase.toggle_played(ep_ids=[episodes[0].ep_id])
+    assert mydatabase.changes_since(version).ep_ids is None
+    assert mydatabase.changes_since(version + 1).ep_ids == {episodes[0].ep_id}
@@ -99,6 +99,38 @@ def test_display_update(display):
     assert display._status == ""
 
 
+def test_display_update_menus(display):
+    for perspective in display.perspectives.values():
+        perspective.update_menus = mock.MagicMock()
+        perspective.database_changed = mock.MagicMock(return_value=False)
+    active_id = display._active_perspective
+    active = display.perspectives[active_id]
+
+    # only the visible perspective is updated
+    display.menus_valid = False
+    display.update()
+    perspectives = display.perspectives.values()
+    assert [p.update_menus.call_count for p in perspectives].count(1) == 1
+    assert active.update_menus.call_count == 1
+
+    # the others are updated once they are shown
+    other_id = next(i for i in display.perspectives if i != active_id)
+    display._change_active_perspective(other_id)
+    assert display.perspectives[other_id].update_menus.call_count == 1
+
+    # database changes are given to perspectives which aren't already stale
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    display.database.replace_feed(feed)
+    display.update()
+    calls = {
+        i: p.database_changed.call_count
+        for (i, p) in display.perspectives.items()
+    }
+    assert calls.pop(active_id) == 1
+    assert calls.pop(other_id) == 1
+    assert set(calls.values()) == {0}
+
+
 def test_display_nonempty(display):
     myfeed = Feed(file=my_dir + "/feeds/valid_basic.xml")
     display.database.feeds = mock.MagicMock(return_value=[myfeed])
@@ -28,13 +28,13 @@ def test_downloadqueue_add():
     assert mydownloadqueue.length == 2
 
 
-def test_downloadqueue_start():
+@mock.patch.object(Episode, "download")
+def test_downloadqueue_start(mock_download):
     mydownloadqueue = DownloadQueue()
     mydownloadqueue._display = mock.MagicMock()
     mydownloadqueue.add(episode1)
-    episode1.download = mock.MagicMock(name="download")
     mydownloadqueue.start()
-    episode1.download.assert_called_with(
+    mock_download.assert_called_with(
         mydownloadqueue,
         mydownloadqueue._display,
     )
@@ -62,3 +62,13 @@ def test_downloadqueue_update():
     mydownloadqueue.start = mock.MagicMock(name="start")
     mydownloadqueue.update()
     assert mydownloadqueue.start.call_count == 1
+
+
+def test_downloadqueue_add_background():
+    episode3 = Episode(feed=feed, title="episode3 title")
+    mydownloadqueue = DownloadQueue()
+    mydownloadqueue.add(episode1)
+    mydownloadqueue.add(episode2, background=True)
+    mydownloadqueue.add(episode3)
+    assert mydownloadqueue._episodes == [episode1, episode3, episode2]
+    assert episode2 in mydownloadqueue
@@ -217,6 +217,21 @@ def test_episode_metadata_with_progress_no_error():
     assert isinstance(episode.metadata, str)
 
 
+def test_episode_plain_description():
+    myfeed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    episode = Episode(
+        myfeed, title=title, description="<p>episode <b>description</b></p>"
+    )
+    assert episode.plain_description == "episode description"
+
+    # parsed episodes are converted once, when the feed is parsed
+    episode = myfeed.parse_episodes()[0]
+    assert episode._plain_description is not None
+    with mock.patch("castero.helpers.html_to_plain") as mock_html_to_plain:
+        assert isinstance(episode.metadata, str)
+        mock_html_to_plain.assert_not_called()
+
+
 def test_episode_without_progress():
     myfeed = Feed(file=my_dir + "/feeds/valid_basic.xml")
     episode = myfeed.parse_episodes()[0]
@@ -228,3 +243,38 @@ def test_episode_progress():
     episode = myfeed.parse_episodes()[0]
     episode._progress = 1000
     assert episode.progress == 1000
+
+
+def test_episode_downloaded_files():
+    DataFile.DEFAULT_DOWNLOADED_DIR = os.path.join(my_dir, "downloaded")
+    myfeed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    assert Episode.downloaded_files(myfeed) == {
+        1: os.path.join(
+            DataFile.DEFAULT_DOWNLOADED_DIR,
+            "myfeed_title",
+            "1-myfeed_item1_title.mp3",
+        )
+    }
+
+    DataFile.DEFAULT_DOWNLOADED_DIR = os.path.join(
+        DataFile.DATA_DIR, "downloaded"
+    )
+
+
+def test_episode_delete_downloads():
+    DataFile.DEFAULT_DOWNLOADED_DIR = os.path.join(my_dir, "downloaded")
+    for filename in ("2-myfeed_item2_title.mp3", "3-myfeed_item3_title.mp3"):
+        path = os.path.join(
+            DataFile.DEFAULT_DOWNLOADED_DIR, "myfeed_title", filename
+        )
+        with open(path, "w") as file:
+            file.write(
+                "temp file for test_episode.test_episode_delete_downloads"
+            )
+    myfeed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    assert Episode.delete_downloads(myfeed, ep_ids={2, 3}) == 2
+    assert list(Episode.downloaded_files(myfeed)) == [1]
+
+    DataFile.DEFAULT_DOWNLOADED_DIR = os.path.join(
+        DataFile.DATA_DIR, "downloaded"
+    )
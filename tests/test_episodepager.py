@@ -0,0 +1,81 @@
+from unittest import mock
+
+import pytest
+
+from castero.episode import Episode
+from castero.episodepager import EpisodePager
+
+database = mock.MagicMock()
+
+
+def make_page(start, end):
+    return [
+        ((0, ep_id), mock.MagicMock(spec=Episode, ep_id=ep_id))
+        for ep_id in range(start, end)
+    ]
+
+
+def episodes_page(after, limit, descending, filter_text):
+    start = 0 if after is None else after[1] + 1
+    return make_page(start, min(start + limit, 250))
+
+
+def test_episodepager_len():
+    database.episodes_count.return_value = (250, 10)
+    mypager = EpisodePager(database)
+    assert len(mypager) == 250
+    assert mypager.unplayed == 10
+    assert database.episodes_page.call_count == 0
+
+
+def test_episodepager_getitem():
+    database.reset_mock()
+    database.episodes_count.return_value = (250, 10)
+    database.episodes_page.side_effect = episodes_page
+    mypager = EpisodePager(database)
+
+    assert mypager[0].ep_id == 0
+    assert mypager[99].ep_id == 99
+    assert database.episodes_page.call_count == 1
+    assert mypager[249].ep_id == 249
+    assert mypager[-1].ep_id == 249
+    assert database.episodes_page.call_count == 3
+    with pytest.raises(IndexError):
+        mypager[250]
+
+
+def test_episodepager_cached_pages():
+    database.reset_mock()
+    database.episodes_count.return_value = (250, 10)
+    database.episodes_page.side_effect = episodes_page
+    mypager = EpisodePager(database)
+    mypager.MAX_CACHED_PAGES = 1
+
+    mypager[249]
+    mypager[0]
+    assert database.episodes_page.call_count == 4
+    mypager[150]
+    assert database.episodes_page.call_count == 5
+    database.episodes_page.assert_called_with(
+        (0, 99), EpisodePager.PAGE_SIZE, True, ""
+    )
+
+
+def test_episodepager_fewer_than_counted():
+    database.reset_mock()
+    database.episodes_count.return_value = (300, 10)
+    database.episodes_page.side_effect = episodes_page
+    mypager = EpisodePager(database)
+
+    with pytest.raises(IndexError):
+        mypager[299]
+
+
+def test_episodepager_episodes():
+    database.reset_mock()
+    database.episodes_count.return_value = (300, 10)
+    database.episodes_page.side_effect = episodes_page
+    mypager = EpisodePager(database)
+
+    assert [episode.ep_id for episode in mypager.episodes(0, 3)] == [0, 1, 2]
+    assert len(mypager.episodes(240, 300)) == 10
@@ -91,3 +91,18 @@ def test_is_true_no():
     assert not helpers.is_true("False")
     assert not helpers.is_true("")
     assert not helpers.is_true("hi")
+
+
+def test_timestamp_from_rfc822():
+    date = "Thu, 01 Jan 1970 00:01:00 +0000"
+    assert helpers.timestamp_from_rfc822(date) == 60
+    assert helpers.timestamp_from_rfc822("not a date") == -1
+    assert helpers.timestamp_from_rfc822(None) == -1
+
+
+def test_html_to_plain():
+    assert helpers.html_to_plain("plain text") == "plain text"
+    html = "<p>some <b>bold</b> text</p> &amp; more"
+    assert helpers.html_to_plain(html) == "some bold text & more"
+    assert helpers.html_to_plain("leading <i>text</i>") == "leading text"
+    assert helpers.html_to_plain("") == ""
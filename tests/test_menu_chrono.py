@@ -0,0 +1,22 @@
+from unittest import mock
+
+from castero.database import Database
+from castero.episodeindex import EpisodeIndex, EpisodeSelection
+from castero.episodepager import EpisodePager
+from castero.menus.chronomenu import ChronoMenu
+
+window = mock.MagicMock()
+window.getmaxyx = mock.MagicMock(return_value=(40, 80))
+
+
+def test_menu_chrono_pages_until_indexed():
+    source = mock.MagicMock(spec=Database)
+    source.episode_index.return_value = None
+    source.episodes_count.return_value = (0, 0)
+    mymenu = ChronoMenu(window, source)
+    mymenu.update_items(None)
+    assert isinstance(mymenu._episodes, EpisodePager)
+
+    source.episode_index.return_value = EpisodeIndex(source, [])
+    mymenu.update_items(None)
+    assert isinstance(mymenu._episodes, EpisodeSelection)
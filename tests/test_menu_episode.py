@@ -86,3 +86,21 @@ def test_menu_episode_invert():
     mymenu.invert()
     assert mymenu._inverted
     mymenu.update_items(feed)
+
+
+def test_menu_episode_filtered_episodes_memoized():
+    episodes = [mock.MagicMock(spec=Episode) for _ in range(3)]
+    texts = ["First Episode", "second episode", "Third"]
+    for episode, text in zip(episodes, texts):
+        episode.__str__.return_value = text
+    mymenu = EpisodeMenu(window, source)
+    mymenu._episodes = episodes
+
+    assert mymenu._filtered_episodes == episodes
+    mymenu.filter_text = "episode"
+    assert mymenu._filtered_episodes == episodes[:2]
+    assert mymenu._filtered_episodes is mymenu._filtered_episodes
+    assert episodes[0].__str__.call_count == 1
+
+    mymenu._episodes = episodes[1:]
+    assert mymenu._filtered_episodes == episodes[1:2]
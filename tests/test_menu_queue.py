@@ -15,6 +15,7 @@ window.getmaxyx = mock.MagicMock(return_value=(40, 80))
 source = mock.MagicMock(spec=Queue)
 source.__iter__.return_value = [player1, player2]
 source.__getitem__.return_value = player1
+source.length = 2
 
 
 def test_menu_queue_init():
@@ -53,3 +54,30 @@ def test_menu_queue_update_child(display):
     items = mymenu._items
     mymenu.update_child()
     assert mymenu._items == items
+
+
+@mock.patch("curses.color_pair")
+def test_menu_queue_display_visible_items(mock_color_pair):
+    players = [mock.MagicMock(spec=Player) for _ in range(100)]
+    long_source = mock.MagicMock(spec=Queue)
+    long_source.__iter__.side_effect = lambda: iter(players)
+    long_source.length = len(players)
+    mymenu = QueueMenu(window, long_source)
+
+    displayed = mymenu.max_displayed_items
+    with mock.patch.object(
+        QueueMenu, "_create_item", wraps=mymenu._create_item
+    ) as mock_create_item:
+        mymenu.display()
+        assert mock_create_item.call_count == displayed
+
+        # moving creates only the newly visible item and the previously
+        # selected one
+        for _ in range(displayed):
+            mymenu.move(-1)
+        assert mock_create_item.call_count == 2 * displayed + 1
+
+        # a different object at the same index is not taken from the cache
+        players[mymenu._top_index] = mock.MagicMock(spec=Player)
+        mymenu.display()
+        assert mock_create_item.call_count == 2 * displayed + 2
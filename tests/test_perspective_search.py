@@ -0,0 +1,98 @@
+import os
+from unittest import mock
+
+from castero.config import Config
+from castero.feed import Feed
+
+my_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def get_search_perspective(display):
+    """Retrieve the Search perspective.
+
+    :param display the display containing the loaded perspective
+    :returns SearchPerspective: the loaded search perspective
+    """
+    display._active_perspective = 6
+    return display.perspectives[6]
+
+
+def test_perspective_search_borders(display):
+    perspective = get_search_perspective(display)
+
+    display.display()
+    assert perspective._episode_window.hline.call_count == 1
+    assert perspective._episode_window.vline.call_count == 1
+    assert perspective._metadata_window.hline.call_count == 1
+    display._stdscr.reset_mock()
+
+
+def test_perspective_search_input_keys(display):
+    perspective = get_search_perspective(display)
+
+    display._footer_window.getch = mock.MagicMock(return_value=10)
+
+    operation_keys = [
+        display.KEY_MAPPING[Config["key_delete"]],
+        display.KEY_MAPPING[Config["key_save"]],
+        display.KEY_MAPPING[Config["key_play_selected"]],
+        display.KEY_MAPPING[Config["key_add_selected"]],
+        display.KEY_MAPPING[Config["key_invert"]],
+        display.KEY_MAPPING[Config["key_filter"]],
+        display.KEY_MAPPING[Config["key_mark_played"]],
+    ]
+    for key in operation_keys:
+        assert perspective.handle_input(key)
+
+    ret_val = perspective.handle_input(ord("q"))
+    assert not ret_val
+    display._stdscr.reset_mock()
+
+
+def test_perspective_search_incremental(display):
+    perspective = get_search_perspective(display)
+
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    display.database.replace_feed(feed)
+    display.database.replace_episodes(feed, feed.parse_episodes())
+
+    # type "item" followed by enter, one character at a time
+    display._footer_window.getch = mock.MagicMock(
+        side_effect=[ord(c) for c in "item"] + [10]
+    )
+    with mock.patch("curses.newpad") as mock_newpad:
+        typed = []
+        pad = mock_newpad.return_value
+        pad.getmaxyx.return_value = (1, 999)
+        pad.addch.side_effect = lambda y, x, c: typed.append(chr(c))
+        pad.instr.side_effect = lambda y, x, n: (
+            "".join(typed[:n]).encode("utf-8")
+        )
+        with mock.patch.object(
+            display.database, "search", wraps=display.database.search
+        ) as mock_search:
+            perspective.handle_input(
+                display.KEY_MAPPING[Config["key_filter"]]
+            )
+
+    searched = [call.args[0] for call in mock_search.call_args_list]
+    assert searched[0] == "i" and searched[-1] == "item"
+    assert perspective._episode_menu.query == "item"
+    assert len(perspective._episode_menu) == 3
+    display._stdscr.reset_mock()
+
+
+def test_perspective_search_add_selected(display):
+    perspective = get_search_perspective(display)
+
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    display.database.replace_feed(feed)
+    display.database.replace_episodes(feed, feed.parse_episodes())
+    perspective._episode_menu.update_items("item")
+    selected = perspective._episode_menu.item
+
+    perspective.handle_input(display.KEY_MAPPING[Config["key_add_selected"]])
+    assert display.queue.length == 1
+    assert display.queue._players[0].episode is selected
+    display.queue.clear()
+    display._stdscr.reset_mock()
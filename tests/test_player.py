@@ -6,7 +6,11 @@ import castero.config
 from castero.config import Config
 from castero.episode import Episode
 from castero.feed import Feed
-from castero.player import Player, PlayerDependencyError
+from castero.player import (
+    Player,
+    PlayerDependencyError,
+    cache_dependency_check,
+)
 
 my_dir = os.path.dirname(os.path.realpath(__file__))
 
@@ -52,3 +56,23 @@ def test_player_create_instance_dep_error_indirect():
     with pytest.raises(PlayerDependencyError):
         Player.create_instance(available_players, "t", "p", episode)
         assert SomePlayer.check_dependencies.call_count == 1
+
+
+def test_player_cache_dependency_check():
+    check = mock.MagicMock()
+    check.__name__ = "check"
+    cached = cache_dependency_check(check)
+    cached()
+    cached()
+    assert check.call_count == 1
+
+
+def test_player_cache_dependency_check_error():
+    check = mock.MagicMock(side_effect=PlayerDependencyError())
+    check.__name__ = "check"
+    cached = cache_dependency_check(check)
+    with pytest.raises(PlayerDependencyError):
+        cached()
+    with pytest.raises(PlayerDependencyError):
+        cached()
+    assert check.call_count == 1
@@ -52,6 +52,64 @@ def test_player_mpv_stop():
     assert myplayer.state == 0
 
 
+def test_player_mpv_stop_shared_engine():
+    myplayer = MPVPlayer("player1 title", "player1 path", episode)
+    engine = mock.MagicMock()
+    myplayer.attach_engine(engine)
+    myplayer._player = engine
+
+    myplayer.stop()
+    assert engine.stop.call_count == 1
+    assert engine.terminate.call_count == 0
+    assert myplayer.state == 0
+
+
+def test_player_mpv_play_prepared():
+    myplayer = MPVPlayer("player1 title", "player1 path", episode)
+    engine = mock.MagicMock()
+    engine.playlist = [
+        {"filename": "player0 path"},
+        {"filename": "player1 path"},
+    ]
+    myplayer.attach_engine(engine)
+
+    myplayer.prepare()
+    engine.playlist_append.assert_called_with("player1 path")
+    myplayer.play()
+    engine.playlist_play_index.assert_called_with(1)
+    engine.playlist_remove.assert_called_with(0)
+    assert engine.play.call_count == 0
+    assert myplayer.state == 1
+
+
+def test_player_mpv_observed_snapshot():
+    myplayer = MPVPlayer("player1 title", "player1 path", episode)
+    myplayer._player = mock.MagicMock()
+
+    myplayer.play()
+    observed = len(MPVPlayer.OBSERVED_PROPERTIES)
+    assert myplayer._player.observe_property.call_count == observed
+
+    # values for another player's media are ignored
+    myplayer._on_property_change("path", "player0 path")
+    myplayer._on_property_change("eof-reached", True)
+    assert not myplayer.ended
+
+    myplayer._on_property_change("path", "player1 path")
+    assert not myplayer.duration_known
+    myplayer._on_property_change("time-pos", 5)
+    myplayer._on_property_change("duration", 10)
+    assert myplayer.time == 5000
+    assert myplayer.duration == 10000
+    assert myplayer.duration_known
+    myplayer._on_property_change("eof-reached", True)
+    assert myplayer.ended
+
+    myplayer.stop()
+    observed = len(MPVPlayer.OBSERVED_PROPERTIES)
+    assert myplayer._player.unobserve_property.call_count == observed
+
+
 def test_player_mpv_del():
     myplayer = MPVPlayer("player1 title", "player1 path", episode)
     assert "myplayer" in locals()
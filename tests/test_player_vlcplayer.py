@@ -37,6 +37,32 @@ def test_player_vlc_play():
     assert myplayer.state == 1
 
 
+def test_player_vlc_create_player_shared_engine():
+    myplayer = VLCPlayer("player1 title", "player1 path", episode)
+    engine = mock.MagicMock()
+    myplayer.attach_engine(engine)
+
+    myplayer.play()
+    assert myplayer._player == engine
+    instance = engine.get_instance.return_value
+    instance.media_new.assert_called_with("player1 path")
+    assert engine.play.call_count == 1
+
+
+def test_player_vlc_prepare():
+    myplayer = VLCPlayer("player1 title", "player1 path", episode)
+    engine = mock.MagicMock()
+    myplayer.attach_engine(engine)
+
+    myplayer.prepare()
+    media = engine.get_instance.return_value.media_new.return_value
+    assert media.parse_with_options.call_count == 1
+    assert engine.set_media.call_count == 0
+    myplayer.play()
+    engine.set_media.assert_called_with(media)
+    assert media.parse.call_count == 0
+
+
 def test_player_vlc_pause():
     myplayer = VLCPlayer("player1 title", "player1 path", episode)
     myplayer._player = mock.MagicMock()
@@ -119,3 +145,40 @@ def test_player_vlc_time_str():
     myplayer._player.get_time = mock.MagicMock(return_value=3000)
     myplayer._media.get_duration = mock.MagicMock(return_value=6000)
     assert myplayer.time_str == "00:00:03/00:00:06"
+
+
+def test_player_vlc_duration_from_episode():
+    myplayer = VLCPlayer("player1 title", "player1 path", episode)
+    myplayer._media = mock.MagicMock()
+    myplayer._media.get_duration = mock.MagicMock(return_value=-1)
+
+    episode.duration = 6000
+    assert myplayer.duration == 6000
+    assert not myplayer.duration_known
+    episode.duration = None
+
+    myplayer._media.get_duration = mock.MagicMock(return_value=7000)
+    assert myplayer.duration == 7000
+    assert myplayer.duration_known
+
+
+def test_player_vlc_observed_snapshot():
+    myplayer = VLCPlayer("player1 title", "player1 path", episode)
+    myplayer._player = mock.MagicMock()
+
+    myplayer.play()
+    events = myplayer._player.event_manager.return_value
+    assert events.event_attach.call_count == 3
+
+    event = mock.MagicMock()
+    event.type = myplayer.vlc.EventType.MediaPlayerTimeChanged
+    event.u.new_time = 5000
+    myplayer._on_event(event)
+    assert myplayer.time == 5000
+
+    event.type = myplayer.vlc.EventType.MediaPlayerEndReached
+    myplayer._on_event(event)
+    assert myplayer.ended
+
+    myplayer.stop()
+    assert events.event_detach.call_count == 3
@@ -1,10 +1,13 @@
 import os
+from shutil import copyfile
 from unittest import mock
 
 
 from castero.config import Config
+from castero.database import Database
+from castero.episode import Episode
 from castero.feed import Feed
-from castero.queue import Queue
+from castero.queue import Queue, QueueEntry
 from castero.player import Player
 
 my_dir = os.path.dirname(os.path.realpath(__file__))
@@ -12,6 +15,15 @@ my_dir = os.path.dirname(os.path.realpath(__file__))
 feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
 
 
+def _database_episodes(display):
+    copyfile(my_dir + "/datafiles/database_example1.db", Database.PATH)
+    display._database = Database()
+    return [
+        display.database.episodes(feed)[0]
+        for feed in display.database.feeds()
+    ]
+
+
 def test_queue_init(display):
     myqueue = Queue(display)
     assert isinstance(myqueue, Queue)
@@ -223,3 +235,384 @@ def test_queue_change_volume(display):
     myqueue.add(player1)
     myqueue.change_volume(1)
     assert player1.set_volume.call_count == 1
+
+
+def test_queue_add_stores(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player2 = mock.MagicMock(spec=Player)
+    player2.episode = episodes[1]
+
+    myqueue.add(player1)
+    myqueue.add(player2)
+    assert [e.ep_id for e in display.database.queue()] == [
+        episodes[0].ep_id,
+        episodes[1].ep_id,
+    ]
+
+
+def test_queue_extend_stores_once(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+
+    with mock.patch.object(
+        display.database, "append_queue", wraps=display.database.append_queue
+    ) as append_queue:
+        myqueue.extend(episodes)
+        append_queue.assert_called_once()
+    assert myqueue.length == len(episodes)
+    assert [e.ep_id for e in display.database.queue()] == [
+        e.ep_id for e in episodes
+    ]
+
+
+def test_queue_shares_episodes_after_reload(display):
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    display.database.replace_feed(feed)
+    display.database._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    myqueue = Queue(display)
+    myqueue.add(display.database.episodes(feed)[0])
+
+    display.database._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    assert display.database.episodes(feed)[0] is myqueue[0].episode
+
+
+def test_queue_next_removes_stored(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player2 = mock.MagicMock(spec=Player)
+    player2.episode = episodes[1]
+
+    myqueue.add(player1)
+    myqueue.add(player2)
+    myqueue.next()
+    assert [e.ep_id for e in display.database.queue()] == [episodes[1].ep_id]
+
+
+def test_queue_remove_stored(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player2 = mock.MagicMock(spec=Player)
+    player2.episode = episodes[1]
+
+    myqueue.add(player1)
+    myqueue.add(player2)
+    myqueue.remove(player2)
+    assert [e.ep_id for e in display.database.queue()] == [episodes[0].ep_id]
+
+
+def test_queue_clear_stored(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+
+    myqueue.add(player1)
+    myqueue.clear()
+    assert len(display.database.queue()) == 0
+
+
+def test_queue_add_episode_lazy(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+
+    with mock.patch(
+        "castero.player.Player.create_instance"
+    ) as create_instance:
+        myqueue.add(episodes[0])
+        myqueue.add(episodes[1])
+        assert myqueue.length == 2
+        assert isinstance(myqueue[1], QueueEntry)
+        assert str(myqueue[1]) == "[%s] %s" % (
+            episodes[1].feed_str,
+            str(episodes[1]),
+        )
+        create_instance.assert_not_called()
+
+
+def test_queue_first_realizes(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+
+    with mock.patch(
+        "castero.player.Player.create_instance", return_value=player1
+    ) as create_instance:
+        myqueue.add(episodes[0])
+        assert myqueue.first == player1
+        assert myqueue[0] == player1
+        assert create_instance.call_count == 1
+
+
+def test_queue_play_realizes_next(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player2 = mock.MagicMock(spec=Player)
+
+    with mock.patch(
+        "castero.player.Player.create_instance", return_value=player2
+    ) as create_instance:
+        myqueue.add(player1)
+        myqueue.add(episodes[1])
+        myqueue.play()
+        assert myqueue[1] == player2
+        assert create_instance.call_count == 1
+
+
+def test_queue_play_shares_engine(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = Player("t", "p", episodes[0])
+    player2 = Player("t", "p", episodes[1])
+
+    with mock.patch.object(Player, "create_engine") as create_engine:
+        myqueue.add(player1)
+        myqueue.add(player2)
+        myqueue.play()
+        myqueue.next()
+        myqueue.play()
+        assert create_engine.call_count == 1
+        assert player2._engine == player1._engine == create_engine.return_value
+
+
+def test_queue_release_engines(display):
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+
+    myqueue.add(player1)
+    myqueue.play()
+    myqueue.release_engines()
+    engine = player1.create_engine.return_value
+    player1.release_engine.assert_called_with(engine)
+
+
+def test_queue_play_prepares_next(display):
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player2 = mock.MagicMock(spec=Player)
+
+    myqueue.add(player1)
+    myqueue.add(player2)
+    myqueue.play()
+    assert player2.attach_engine.call_count == 1
+    assert player2.prepare.call_count == 1
+    assert player1.prepare.call_count == 0
+
+
+def test_queue_update_prepares_added(display):
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = False
+    player1.time = 0
+    player1.duration = None
+    player2 = mock.MagicMock(spec=Player)
+
+    myqueue.add(player1)
+    myqueue.play()
+    myqueue.add(player2)
+    myqueue.update()
+    assert player2.prepare.call_count == 1
+
+
+def test_queue_update_stores_duration(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player1.state = 1
+    player1.ended = False
+    player1.time = 1000
+    player1.duration = 60000
+
+    myqueue.add(player1)
+    myqueue.update()
+    assert episodes[0].duration == 60000
+    assert episodes[0] in display.modified_episodes
+
+
+def test_queue_update_skips_placeholder_duration(display):
+    episodes = _database_episodes(display)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.episode = episodes[0]
+    player1.state = 1
+    player1.ended = False
+    player1.time = 1000
+    player1.duration = 5000
+    player1.duration_known = False
+
+    myqueue.add(player1)
+    myqueue.update()
+    assert episodes[0].duration is None
+
+
+def test_queue_update_ended(display):
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = True
+    player1.time = 1000
+    player1.duration = 60000
+    player1.episode.ep_id = None
+    player2 = mock.MagicMock(spec=Player)
+    player2.episode.progress = 0
+    player2.episode.ep_id = None
+
+    myqueue.add(player1)
+    myqueue.add(player2)
+    myqueue.update()
+    assert player1.episode.played
+    assert player1.stop.call_count == 1
+    assert myqueue.first == player2
+    assert player2.play.call_count == 1
+
+
+def test_queue_update_prefetches(display):
+    episodes = _database_episodes(display)
+    Config.data["prefetch_count"] = "1"
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = False
+    player1.time = 1000
+    player1.duration = 60000
+    player1.episode.ep_id = None
+
+    myqueue.add(player1)
+    for episode in episodes:
+        episode._downloaded = False
+        myqueue.add(episode)
+    with mock.patch.object(
+        Player,
+        "create_instance",
+        side_effect=lambda players, title, path, episode: mock.MagicMock(
+            spec=Player, episode=episode
+        ),
+    ):
+        myqueue.update()
+        myqueue.update()
+
+    assert display.download_queue.length == 1
+    assert display.download_queue.first == episodes[0]
+    assert display.database.prefetched(episodes[0])
+    assert not display.database.prefetched(episodes[1])
+
+
+def test_queue_update_ended_evicts_prefetched(display):
+    episode = _database_episodes(display)[0]
+    display.database.add_prefetch(episode)
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = True
+    player1.time = 1000
+    player1.duration = 60000
+    player1.episode = episode
+
+    myqueue.add(player1)
+    with mock.patch.object(
+        Episode, "check_downloaded", return_value=True
+    ), mock.patch.object(Episode, "delete") as delete:
+        myqueue.update()
+    assert delete.call_count == 1
+    assert not display.database.prefetched(episode)
+
+
+def test_queue_update_evicts_prefetched_after_reload(display):
+    display._database = Database()
+    display.database.replace_feed(feed)
+    display.database.replace_episodes(feed, feed.parse_episodes())
+    episode = display.database.episodes(feed)[0]
+    display.database.add_prefetch(episode)
+
+    # reloading the feed keeps the episode's prefetch mark
+    display.database._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    episode = display.database.episode(episode.ep_id)
+    assert display.database.prefetched(episode)
+
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = True
+    player1.time = 1000
+    player1.duration = 60000
+    player1.episode = episode
+
+    myqueue.add(player1)
+    with mock.patch.object(
+        Episode, "check_downloaded", return_value=True
+    ), mock.patch.object(Episode, "delete") as delete:
+        myqueue.update()
+    assert delete.call_count == 1
+    assert not display.database.prefetched(episode)
+
+
+def test_queue_update_checkpoint(display):
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = False
+    player1.duration = 600000
+    player1.episode.duration = 600000
+    player1.episode.progress = 10000
+
+    myqueue.add(player1)
+    myqueue._last_checkpoint -= myqueue._checkpoint_interval
+    player1.time = 12000
+    myqueue.update()
+    assert player1.episode.progress == 10000
+    assert player1.episode not in display.modified_episodes
+
+    myqueue._last_checkpoint -= myqueue._checkpoint_interval
+    player1.time = 60000
+    myqueue.update()
+    assert player1.episode.progress == 60000
+    assert player1.episode in display.modified_episodes
+
+
+def test_queue_update_checkpoint_survives_crash(display):
+    feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+    display.database.replace_feed(feed)
+    display.database._reload_feed_data(
+        feed, Feed(file=my_dir + "/feeds/valid_basic.xml")
+    )
+    episode = display.database.episodes(feed)[1]
+    myqueue = Queue(display)
+    player1 = mock.MagicMock(spec=Player)
+    player1.state = 1
+    player1.ended = False
+    player1.duration = 600000
+    player1.episode = episode
+
+    myqueue.add(player1)
+    myqueue._last_checkpoint -= myqueue._checkpoint_interval
+    player1.time = 60000
+    myqueue.update()
+    display.modified_episodes.close()
+
+    # the database is not closed; the progress is found on the same episode
+    # in the file, also once the feed is reloaded
+    crashed = Database()
+    crashed.reload()
+    progress = {
+        str(e): e.progress for e in crashed.episodes(crashed.feed(feed.key))
+    }
+    assert progress == {
+        str(e): 60000 if e is episode else 0
+        for e in display.database.episodes(feed)
+    }
@@ -0,0 +1,181 @@
+import os
+import threading
+from unittest import mock
+
+import pytest
+import requests
+from gevent.hub import get_hub
+from gevent.pywsgi import WSGIServer
+
+from castero.config import Config
+from castero.episode import Episode
+from castero.feed import Feed
+from castero.streamcache import StreamCache, StreamCacheEntry
+
+my_dir = os.path.dirname(os.path.realpath(__file__))
+
+feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+MEDIA = bytes(range(256)) * 1024
+
+
+class Upstream:
+    """Serves MEDIA with support for ranges, counting the bytes sent."""
+
+    sent = 0
+
+    def __call__(self, environ, start_response):
+        start = 0
+        if "HTTP_RANGE" in environ:
+            start = int(environ["HTTP_RANGE"].split("=")[1].split("-")[0])
+        start_response(
+            "206 Partial Content",
+            [
+                ("Content-Length", str(len(MEDIA) - start)),
+                (
+                    "Content-Range",
+                    "bytes %d-%d/%d" % (start, len(MEDIA) - 1, len(MEDIA)),
+                ),
+            ],
+        )
+        Upstream.sent += len(MEDIA) - start
+        return [MEDIA[start:]]
+
+
+@pytest.fixture()
+def cache_dir(tmp_path):
+    Config.data.update({"stream_cache_size": "500"})
+    with mock.patch.object(StreamCache, "DIRECTORY", str(tmp_path)):
+        yield str(tmp_path)
+
+
+@pytest.fixture()
+def upstream():
+    # like the cache's server, this runs in its own thread with its own hub
+    servers = []
+    ready = threading.Event()
+
+    def serve():
+        server = WSGIServer(
+            ("127.0.0.1", 0), Upstream(), log=None, error_log=None
+        )
+        server.start()
+        servers.append((server, get_hub().loop))
+        ready.set()
+        server.serve_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    Upstream.sent = 0
+    server, loop = servers[0]
+    yield "http://127.0.0.1:%d/media.mp3" % server.server_port
+    loop.run_callback_threadsafe(server.stop)
+
+
+def make_episode(ep_id, enclosure):
+    return Episode(
+        feed, ep_id=ep_id, title="episode title", enclosure=enclosure
+    )
+
+
+def test_streamcache_entry_ranges(cache_dir):
+    entry = StreamCacheEntry(cache_dir, 1, "http://url")
+    entry.add_range(0, 10)
+    entry.add_range(20, 30)
+    assert entry.cached_until(5) == 10
+    assert entry.cached_until(15) == 15
+    entry.add_range(10, 20)
+    assert entry.ranges == [[0, 30]]
+    assert entry.size == 30
+
+
+def test_streamcache_entry_save_load(cache_dir):
+    entry = StreamCacheEntry(cache_dir, 1, "http://url")
+    entry.length = 30
+    entry.add_range(0, 30)
+    open(entry.data_path, "wb").close()
+    entry.save()
+
+    loaded = StreamCacheEntry(cache_dir, 1, "http://url")
+    assert loaded.complete
+    other_url = StreamCacheEntry(cache_dir, 1, "http://other")
+    assert other_url.ranges == []
+
+
+def test_streamcache_playable_local(cache_dir):
+    cache = StreamCache()
+    episode = make_episode(1, "/some/file.mp3")
+    assert cache.playable(episode, "/some/file.mp3") == "/some/file.mp3"
+
+
+def test_streamcache_playable_disabled(cache_dir):
+    Config.data = {"stream_cache_size": "0"}
+    cache = StreamCache()
+    episode = make_episode(1, "http://url/file.mp3")
+    url = "http://url/file.mp3"
+    assert cache.playable(episode, url) == url
+
+
+def test_streamcache_read_through(cache_dir, upstream):
+    cache = StreamCache()
+    episode = make_episode(1, upstream)
+    url = cache.playable(episode, upstream)
+    assert url.startswith("http://127.0.0.1:") and url.endswith("/1.mp3")
+
+    assert requests.get(url).content == MEDIA
+    sent = Upstream.sent
+    response = requests.get(url, headers={"Range": "bytes=1000-"})
+    assert response.content == MEDIA[1000:]
+    assert Upstream.sent == sent
+    assert cache.entry(1).complete
+    cache.stop()
+
+
+def test_streamcache_ranges(cache_dir, upstream):
+    cache = StreamCache()
+    url = cache.playable(make_episode(1, upstream), upstream)
+
+    response = requests.get(url, headers={"Range": "bytes=1000-1999"})
+    assert response.status_code == 206
+    content_range = "bytes 1000-1999/%d" % len(MEDIA)
+    assert response.headers["Content-Range"] == content_range
+    assert response.content == MEDIA[1000:2000]
+
+    response = requests.get(url)
+    assert response.status_code == 200
+    assert "Content-Range" not in response.headers
+    assert response.content == MEDIA
+
+    response = requests.get(url, headers={"Range": "bytes=%d-" % len(MEDIA)})
+    assert response.status_code == 416
+    cache.stop()
+
+
+def test_streamcache_evict(cache_dir):
+    Config.data = {"stream_cache_size": "1"}
+    cache = StreamCache()
+    for ep_id in (1, 2):
+        entry = StreamCacheEntry(cache_dir, ep_id, "http://url")
+        entry.add_range(0, StreamCache.BYTES_IN_MEGABYTE)
+        open(entry.data_path, "wb").close()
+        entry.save()
+        os.utime(entry.index_path, (ep_id, ep_id))
+
+    cache.evict()
+    assert not os.path.exists(os.path.join(cache_dir, "1.json"))
+    assert not os.path.exists(os.path.join(cache_dir, "1.part"))
+    assert os.path.exists(os.path.join(cache_dir, "2.json"))
+
+
+def test_streamcache_promote(cache_dir, upstream, tmp_path):
+    Config.data.update({"stream_cache_promote": "True"})
+    cache = StreamCache()
+    episode = make_episode(1, upstream)
+    requests.get(cache.playable(episode, upstream))
+
+    path = str(tmp_path / "downloaded" / "1-e.mp3")
+    with mock.patch.object(Episode, "get_download_path", return_value=path):
+        assert cache.promote(episode)
+    with open(path, "rb") as f:
+        assert f.read() == MEDIA
+    assert cache.entry(1) is None
+    cache.stop()
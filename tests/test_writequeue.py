@@ -0,0 +1,64 @@
+import os
+import threading
+from unittest import mock
+
+from castero.episode import Episode
+from castero.feed import Feed
+from castero.writequeue import WriteQueue
+
+my_dir = os.path.dirname(os.path.realpath(__file__))
+
+feed = Feed(file=my_dir + "/feeds/valid_basic.xml")
+
+
+def test_writequeue_merges_by_episode():
+    database = mock.MagicMock()
+    mywritequeue = WriteQueue(database)
+    episode1 = Episode(feed, ep_id=1, title="episode1 title")
+    episode1_again = Episode(
+        feed, ep_id=1, title="episode1 title", played=True
+    )
+    episode2 = Episode(feed, ep_id=2, title="episode2 title")
+
+    mywritequeue.append(episode1)
+    mywritequeue.extend([episode2, episode1_again])
+    assert len(mywritequeue) == 2
+    assert episode1_again in mywritequeue
+    assert episode1 not in mywritequeue
+
+    mywritequeue.close()
+    database.save_episodes.assert_called_once_with([episode2, episode1_again])
+    assert len(mywritequeue) == 0
+
+
+def test_writequeue_flush():
+    written = threading.Event()
+    database = mock.MagicMock()
+    database.save_episodes.side_effect = lambda episodes: written.set()
+    mywritequeue = WriteQueue(database)
+    episode = Episode(feed, ep_id=1, title="episode1 title")
+
+    mywritequeue.append(episode)
+    mywritequeue.flush()
+    assert written.wait(timeout=5)
+    database.save_episodes.assert_called_once_with([episode])
+    assert len(mywritequeue) == 0
+    mywritequeue.close()
+    assert database.save_episodes.call_count == 1
+
+
+def test_writequeue_close_twice():
+    database = mock.MagicMock()
+    mywritequeue = WriteQueue(database)
+    mywritequeue.append(Episode(feed, ep_id=1, title="episode1 title"))
+    mywritequeue.close()
+    mywritequeue.close()
+    assert database.save_episodes.call_count == 1
+
+
+def test_writequeue_close_unregisters():
+    database = mock.MagicMock()
+    with mock.patch("atexit.unregister") as unregister:
+        mywritequeue = WriteQueue(database)
+        mywritequeue.close()
+    unregister.assert_called_once_with(mywritequeue.close)